@@ -3,32 +3,91 @@
 # Data: 29/10/2025
 # Versão: 2.0.1 - Corrigido
 
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, Response, render_template, stream_template, request, redirect, url_for, flash, jsonify, g
+from flask import before_render_template, template_rendered
+from markupsafe import Markup
+import click
+from flask.cli import AppGroup
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import wraps
+import copy
+import hashlib
+import json
 import os
+import time
 
 # Importa configurações e serviços
 try:
     from config import Config
     from services.tmdb_service import TMDBService
     from services.auth_service import AuthService, User
-    from utils.helpers import carregar_json, salvar_json, mesclar_filmes, criar_diretorios
+    from utils.helpers import (carregar_json, salvar_json, mesclar_catalogo, criar_diretorios, venda_atende_filtros,
+                               filme_retirado, filmes_em_cartaz)
+    from services.estoque_service import EstoqueService
+    from repositorios import criar_repositorios
+    from utils.cache import CacheVersionado, CacheLRU
+    from services.atualizacao_service import AtualizacaoCatalogoService
+    from services.sessao_service import SessaoService, SESSAO_NAO_ENCONTRADA, RESERVA_NAO_ENCONTRADA
+    from services.reserva_service import ReservaService
+    from services.analise_service import AnaliseVendasService
+    from services.reserva_service import RESERVA_NAO_ENCONTRADA as RESERVA_INGRESSOS_NAO_ENCONTRADA
+    from utils.busca import IndiceBusca, tokenizar
+    from utils.commit_grupo import CommitEmGrupo
+    from utils.metricas import metricas, server_timing
+    from utils.exportacao import exportar_vendas, nome_arquivo, FORMATOS as FORMATOS_EXPORTACAO
+    from services.catalogo_service import CatalogoService, ler_arquivo_filmes, converter_campos
+    from services.arquivo_service import ArquivoVendasService
 except ImportError as e:
     print(f"Erro de importação: {e}")
     print("Verifique se os arquivos existem em:")
     print("  - services/tmdb_service.py")
     print("  - services/auth_service.py")
     print("  - utils/helpers.py")
+    print("  - services/estoque_service.py")
+    print("  - repositorios/")
+    print("  - utils/cache.py")
+    print("  - services/atualizacao_service.py")
+    print("  - services/sessao_service.py")
+    print("  - services/reserva_service.py")
+    print("  - services/analise_service.py")
+    print("  - utils/busca.py")
+    print("  - utils/commit_grupo.py")
+    print("  - utils/metricas.py")
+    print("  - utils/exportacao.py")
+    print("  - services/catalogo_service.py")
+    print("  - services/arquivo_service.py")
     Config = None
     TMDBService = None
     AuthService = None
     User = None
     carregar_json = None
     salvar_json = None
-    mesclar_filmes = None
+    mesclar_catalogo = None
     criar_diretorios = None
+    venda_atende_filtros = None
+    filme_retirado = None
+    filmes_em_cartaz = None
+    EstoqueService = None
+    criar_repositorios = None
+    CacheVersionado = None
+    CacheLRU = None
+    AtualizacaoCatalogoService = None
+    SessaoService = None
+    SESSAO_NAO_ENCONTRADA = RESERVA_NAO_ENCONTRADA = None
+    ReservaService = None
+    AnaliseVendasService = None
+    RESERVA_INGRESSOS_NAO_ENCONTRADA = None
+    CommitEmGrupo = None
+    metricas = None
+    server_timing = None
+    exportar_vendas = nome_arquivo = None
+    FORMATOS_EXPORTACAO = {}
+    CatalogoService = None
+    ler_arquivo_filmes = converter_campos = None
+    ArquivoVendasService = None
+    IndiceBusca = None
+    tokenizar = None
 
 app = Flask(__name__)
 
@@ -46,9 +105,60 @@ login_manager.login_view = 'login'
 login_manager.login_message = 'Por favor, faça login para acessar esta página.'
 login_manager.login_message_category = 'warning'
 
+# Catálogo usado quando dados/filmes.json ainda não existe
+FILMES_PADRAO = {
+    "Titanic": {
+        "estoque": 100,
+        "preco": 20.0,
+        "imagem": "https://image.tmdb.org/t/p/w500/9xjZS2rlVxm8SFx8kPC3aIGCOYQ.jpg",
+        "ano": 1997,
+        "genero": "Romance/Drama",
+    },
+    "O Poderoso Chefão": {
+        "estoque": 80,
+        "preco": 20.0,
+        "imagem": "https://image.tmdb.org/t/p/w500/3bhkrj58Vtu7enYsRolD1fZdja1.jpg",
+        "ano": 1972,
+        "genero": "Crime/Drama",
+    },
+    "A Origem": {
+        "estoque": 50,
+        "preco": 20.0,
+        "imagem": "https://image.tmdb.org/t/p/w500/edv5CZvWj09upOsy2Y6IwDhK8bt.jpg",
+        "ano": 2010,
+        "genero": "Ação/Ficção",
+    },
+    "Na sua pele": {
+        "estoque": 60,
+        "preco": 20.0,
+        "imagem": "https://image.tmdb.org/t/p/w500/mwUUv7cEHvwz6re2rDbvLGN0qCo.jpg",
+        "ano": 2020,
+        "genero": "Terror/Suspense",
+    },
+}
+
+# Inicializa armazenamento (backend escolhido em Config.BACKEND_ARMAZENAMENTO)
+repositorios = criar_repositorios(Config, catalogo_padrao=FILMES_PADRAO) if criar_repositorios and Config else None
+
 # Inicializa serviços
 tmdb_service = TMDBService() if TMDBService else None
-auth_service = AuthService() if AuthService else None
+auth_service = AuthService(
+    repositorio=repositorios.usuarios if repositorios else None,
+    cache_tamanho=Config.CACHE_USUARIOS_TAMANHO,
+    cache_ttl=Config.CACHE_USUARIOS_TTL,
+) if AuthService and Config else None
+estoque_service = EstoqueService(repositorios.filmes) if EstoqueService and repositorios else None
+
+# Cache do catálogo por worker: só relê o armazenamento quando a versão muda
+cache_catalogo = CacheVersionado(
+    repositorios.filmes.carregar, repositorios.filmes.versao
+) if CacheVersionado and repositorios else None
+
+# Índice de busca do catálogo (por worker, atualizado quando o catálogo muda)
+indice_busca = IndiceBusca() if IndiceBusca else None
+
+# HTML da grade de filmes já renderizado, por versão do catálogo/vendas e busca
+cache_fragmentos = CacheLRU(max_itens=Config.CACHE_FRAGMENTOS_ITENS, ttl=0) if CacheLRU and Config else None
 
 # User loader para Flask-Login
 @login_manager.user_loader
@@ -73,39 +183,24 @@ def admin_required(f):
 
 # ================== FUNÇÕES DE PERSISTÊNCIA ==================
 
+# Vendas exibidas por página no histórico
+HISTORICO_POR_PAGINA = 50
+
 def carregar_filmes():
-    """Carregar os filmes do arquivo JSON"""
+    """
+    Carregar os filmes do armazenamento configurado
+
+    Servido do cache em memória enquanto o catálogo não muda. O dicionário
+    retornado é uma cópia rasa: os dados de cada filme não devem ser
+    alterados no lugar (use salvar_filmes / estoque_service).
+    """
+    if cache_catalogo:
+        return dict(cache_catalogo.obter())
+    if repositorios:
+        return repositorios.filmes.carregar()
+
     arquivo = 'dados/filmes.json'
-    dados_padrao = {
-        "Titanic": {
-            "estoque": 100,
-            "preco": 20.0,
-            "imagem": "https://image.tmdb.org/t/p/w500/9xjZS2rlVxm8SFx8kPC3aIGCOYQ.jpg",
-            "ano": 1997,
-            "genero": "Romance/Drama",
-        },
-        "O Poderoso Chefão": {
-            "estoque": 80,
-            "preco": 20.0,
-            "imagem": "https://image.tmdb.org/t/p/w500/3bhkrj58Vtu7enYsRolD1fZdja1.jpg",
-            "ano": 1972,
-            "genero": "Crime/Drama",
-        },
-        "A Origem": {
-            "estoque": 50,
-            "preco": 20.0,
-            "imagem": "https://image.tmdb.org/t/p/w500/edv5CZvWj09upOsy2Y6IwDhK8bt.jpg",
-            "ano": 2010,
-            "genero": "Ação/Ficção",
-        },
-        "Na sua pele": {
-            "estoque": 60,
-            "preco": 20.0,
-            "imagem": "https://image.tmdb.org/t/p/w500/mwUUv7cEHvwz6re2rDbvLGN0qCo.jpg",
-            "ano": 2020,
-            "genero": "Terror/Suspense",
-        },
-    }
+    dados_padrao = copy.deepcopy(FILMES_PADRAO)
 
     if carregar_json:
         return carregar_json(arquivo, dados_padrao)
@@ -118,8 +213,24 @@ def carregar_filmes():
             return dados_padrao
 
 
+def carregar_filmes_em_cartaz():
+    """Filmes à venda: o catálogo sem os retirados (que seguem no admin e no histórico)"""
+    return filmes_em_cartaz(carregar_filmes())
+
+
+def filme_a_venda(filmes, titulo):
+    """O filme existe no catálogo e não foi retirado"""
+    return titulo in filmes and not filme_retirado(filmes[titulo])
+
+
 def salvar_filmes(dados_filmes):
-    """Salvar os filmes no arquivo JSON"""
+    """Salvar os filmes no armazenamento configurado"""
+    if repositorios:
+        repositorios.filmes.salvar(dados_filmes)
+        if cache_catalogo:
+            cache_catalogo.invalidar()
+        return
+
     arquivo = 'dados/filmes.json'
     if salvar_json:
         salvar_json(arquivo, dados_filmes)
@@ -131,7 +242,10 @@ def salvar_filmes(dados_filmes):
 
 
 def carregar_historico():
-    """Carrega o histórico do arquivo JSON"""
+    """Carrega o histórico completo em uma lista"""
+    if repositorios:
+        return repositorios.vendas.carregar()
+
     arquivo = 'dados/historico.json'
     if carregar_json:
         return carregar_json(arquivo, [])
@@ -143,8 +257,135 @@ def carregar_historico():
         except FileNotFoundError:
             return []
 
+def iterar_historico():
+    """Percorre o histórico venda a venda, sem montar a lista inteira"""
+    if repositorios:
+        return repositorios.vendas.iterar()
+    return iter(carregar_historico())
+
+def iterar_historico_filtrado(filme=None, tipo=None, inicio=None, fim=None):
+    """Percorre só as vendas que passam nos filtros do histórico (exportação)"""
+    if repositorios:
+        return repositorios.vendas.iterar_filtrado(filme, tipo, inicio, fim)
+    return (venda for venda in carregar_historico()
+            if venda_atende_filtros(venda, filme, tipo, inicio, fim))
+
+def registrar_venda(venda):
+    """Registra uma venda sem reescrever o histórico"""
+    if repositorios:
+        repositorios.vendas.registrar(venda)
+    else:
+        historico = carregar_historico()
+        historico.append(venda)
+        salvar_historico(historico)
+
+def registrar_vendas(vendas):
+    """Registra várias vendas (ex: um carrinho) com uma única escrita"""
+    if repositorios:
+        repositorios.vendas.registrar_varias(vendas)
+    else:
+        historico = carregar_historico()
+        historico.extend(vendas)
+        salvar_historico(historico)
+
+def processar_compras(compras):
+    """
+    Grava um lote de compras do commit em grupo
+
+    Um único débito no estoque para todos os pedidos (cada um atendido ou
+    recusado sozinho) e uma única escrita durável no histórico.
+
+    Args:
+        compras: Lista de (venda, debitar); debitar=False quando o estoque já
+            foi debitado antes (reserva confirmada)
+
+    Returns:
+        Lista de (sucesso, mensagem, estoque_restante), na mesma ordem
+    """
+    pedidos = [(venda["filme"], venda["quantidade"]) for venda, debitar in compras if debitar]
+    debitos = iter(estoque_service.reservar_varios(pedidos) if pedidos else ())
+
+    resultados, vendas, debitados = [], [], []
+    for venda, debitar in compras:
+        resultado = next(debitos) if debitar else (True, "", None)
+        if resultado[0]:
+            vendas.append(venda)
+            if debitar:
+                debitados.append(venda)
+        resultados.append(resultado)
+
+    if vendas:
+        try:
+            repositorios.vendas.registrar_varias(vendas, duravel=True)
+        except BaseException:
+            # Sem venda registrada o débito não vale: devolve o estoque do lote
+            devolver_estoque(debitados)
+            raise
+    return resultados
+
+def devolver_estoque(vendas):
+    """Devolve ao estoque os ingressos de vendas que não chegaram ao histórico"""
+    if not estoque_service:
+        filmes = carregar_filmes()
+        for venda in vendas:
+            filme = filmes[venda["filme"]]
+            filmes[venda["filme"]] = dict(filme, estoque=filme["estoque"] + venda["quantidade"])
+        salvar_filmes(filmes)
+        return
+    for venda in vendas:
+        try:
+            estoque_service.devolver(venda["filme"], venda["quantidade"])
+        except Exception as e:
+            print(f"❌ Erro ao devolver {venda['quantidade']} ingressos de '{venda['filme']}': {e}")
+
+def efetivar_compra(venda, debitar=True):
+    """
+    Debita o estoque (se `debitar`) e registra a venda
+
+    Com o commit em grupo ligado, a compra entra no próximo lote e só
+    retorna depois que o lote inteiro foi gravado.
+
+    Returns:
+        Tupla (sucesso, mensagem, estoque_restante)
+    """
+    if commit_compras:
+        return commit_compras.enviar((venda, debitar))
+
+    resultado = (True, "", None)
+    if debitar:
+        resultado = estoque_service.reservar(venda["filme"], venda["quantidade"])
+    if resultado[0]:
+        try:
+            registrar_venda(venda)
+        except BaseException:
+            if debitar:
+                devolver_estoque([venda])
+            raise
+    return resultado
+
+def registrar_venda_confirmada(venda):
+    """
+    Registra a venda de uma reserva já fechada (estoque debitado antes)
+
+    Returns:
+        True se a venda foi gravada; em caso de falha quem chamou desfaz a
+        reserva (devolve os ingressos ou libera os assentos)
+    """
+    try:
+        sucesso, mensagem, _ = efetivar_compra(venda, debitar=False)
+    except Exception as e:
+        print(f"❌ Erro ao registrar venda de '{venda['filme']}': {e}")
+        return False
+    if not sucesso:
+        print(f"❌ Venda de '{venda['filme']}' não registrada: {mensagem}")
+    return sucesso
+
 def salvar_historico(dados_historico):
-    """Salva o histórico no arquivo JSON"""
+    """Substitui o histórico inteiro (manutenção; compras usam registrar_venda)"""
+    if repositorios:
+        repositorios.vendas.substituir(dados_historico)
+        return
+
     arquivo = 'dados/historico.json'
     if salvar_json:
         salvar_json(arquivo, dados_historico)
@@ -154,8 +395,27 @@ def salvar_historico(dados_historico):
         with open(arquivo, 'w', encoding='utf-8') as f:
             json.dump(dados_historico, f, indent=2, ensure_ascii=False)
 
+def resumo_vendas():
+    """Agregados de vendas (totais e por filme) sem percorrer o histórico"""
+    if repositorios:
+        return repositorios.vendas.resumo()
+
+    resumo = {"total_vendas": 0, "total_ingressos": 0, "total_arrecadado": 0.0, "por_filme": {}}
+    for item in carregar_historico():
+        qtd = item.get("quantidade", 0)
+        resumo["total_vendas"] += 1
+        resumo["total_ingressos"] += qtd
+        resumo["total_arrecadado"] += item["total"]
+        resumo["por_filme"].setdefault(item.get("filme"), {"ingressos": 0})["ingressos"] += qtd
+    return resumo
+
+def vendas_por_filme_resumo(resumo=None):
+    """Ingressos vendidos por filme a partir dos agregados"""
+    resumo = resumo or resumo_vendas()
+    return {filme: dados["ingressos"] for filme, dados in resumo["por_filme"].items()}
+
 def contar_vendas_por_filme(historico):
-    """Conta vendas por filme"""
+    """Conta vendas por filme (aceita lista ou gerador de vendas)"""
     vendas = {}
     for item in historico:
         filme = item.get("filme")
@@ -163,62 +423,138 @@ def contar_vendas_por_filme(historico):
         vendas[filme] = vendas.get(filme, 0) + qtd
     return vendas
 
+# ================== BUSCA ==================
+
+def buscar_filmes(termo):
+    """
+    Filmes cujo título, gênero, ano ou sinopse casam com `termo`
+
+    Usa o índice invertido (sem acentos, ranqueado), sincronizado com o
+    catálogo só quando a versão dele muda.
+
+    Returns:
+        Dicionário {titulo: dados} na ordem de relevância
+    """
+    versao = cache_catalogo.versao() if cache_catalogo else None
+    filmes = carregar_filmes_em_cartaz()
+    if not termo:
+        return filmes
+    if indice_busca is None:
+        termo = termo.lower()
+        return {nome: dados for nome, dados in filmes.items() if termo in nome.lower()}
+
+    indice_busca.sincronizar(filmes, versao)
+    return {titulo: filmes[titulo] for titulo in indice_busca.buscar(termo) if titulo in filmes}
+
+
+def renderizar_lista_filmes(termo=""):
+    """
+    HTML da grade de filmes (templates/_lista_filmes.html)
+
+    A grade só muda quando o catálogo (estoque, preços, filmes) ou as vendas
+    mudam, então o HTML fica em cache por worker com chave (versão do
+    catálogo, versão das vendas, busca). Compras e alterações do admin mudam
+    as versões e a próxima requisição renderiza de novo; entradas antigas
+    saem pelo limite do LRU.
+    """
+    chave = None
+    if cache_fragmentos is not None and repositorios:
+        versoes = (repositorios.filmes.versao(), repositorios.vendas.versao())
+        if None not in versoes:
+            busca = " ".join(tokenizar(termo)) if tokenizar else termo.strip().lower()
+            chave = (versoes, busca)
+            html = cache_fragmentos.obter(chave)
+            if html is not None:
+                return html
+
+    html = Markup(render_template(
+        "_lista_filmes.html",
+        filmes=buscar_filmes(termo),
+        vendas_por_filme=vendas_por_filme_resumo(),
+    ))
+    if chave is not None:
+        cache_fragmentos.definir(chave, html)
+    return html
+
+
 # ================== FUNÇÕES DA API TMDB ==================
 
-def atualizar_filmes_tmdb(manter_estoque=True):
-    """Atualiza catálogo de filmes usando a API do TMDB"""
+def atualizar_filmes_tmdb(manter_estoque=True, progresso=None):
+    """
+    Atualiza catálogo de filmes usando a API do TMDB
+
+    Args:
+        manter_estoque: Preserva estoque e preço dos filmes já existentes
+        progresso: Função opcional progresso(feitos, total) (ver TMDBService)
+
+    Returns:
+        Tupla (sucesso, mensagem)
+    """
     if not tmdb_service:
         print("⚠️ Serviço TMDB não disponível")
-        return False
+        return False, "⚠️ Serviço TMDB não disponível"
     
     try:
-        filmes_atuais = carregar_filmes()
-        filmes_novos = tmdb_service.atualizar_catalogo()
+        filmes_novos = tmdb_service.atualizar_catalogo(progresso=progresso)
 
         if not filmes_novos:
             print("❌ Nenhum filme retornado da API")
-            return False
+            return False, "❌ Nenhum filme retornado da API"
 
-        if manter_estoque and mesclar_filmes:
-            filmes_final = mesclar_filmes(filmes_atuais, filmes_novos, manter_estoque=True)
-        else:
-            filmes_final = filmes_novos
+        diferenca = {}
 
-        salvar_filmes(filmes_final)
-        print(f"✅ Catálogo atualizado com {len(filmes_final)} filmes")
-        return True
+        def mesclar(filmes_atuais):
+            if not mesclar_catalogo:
+                return filmes_novos
+            # Filmes que saíram do TMDB são retirados, não apagados (vendas apontam para eles)
+            mesclados, resultado = mesclar_catalogo(filmes_atuais, filmes_novos, manter_estoque=manter_estoque)
+            diferenca.update(resultado)
+            return mesclados
+
+        # A mescla roda sob a trava do estoque: nenhuma compra concorrente se perde
+        if estoque_service:
+            filmes_final = estoque_service.alterar_catalogo(mesclar)
+        else:
+            filmes_final = mesclar(carregar_filmes())
+            salvar_filmes(filmes_final)
+        if diferenca:
+            mensagem = (f"✅ Catálogo atualizado: {len(diferenca['adicionados'])} adicionados, "
+                        f"{len(diferenca['atualizados'])} atualizados, {len(diferenca['retirados'])} retirados")
+            if diferenca['ignorados']:
+                # Título já usado por outro filme e sem ano para diferenciar
+                mensagem += (f", {len(diferenca['ignorados'])} ignorados por título repetido "
+                             f"({', '.join(diferenca['ignorados'])})")
+        else:
+            mensagem = f"✅ Catálogo atualizado com {len(filmes_final)} filmes"
+        print(mensagem)
+        return True, mensagem
     except Exception as e:
         print(f"❌ Erro ao atualizar filmes: {e}")
-        return False
+        return False, "❌ Erro ao atualizar catálogo"
 
-def adicionar_filme_especifico(titulo):
-    """Adiciona um filme específico ao catálogo"""
-    if not tmdb_service:
-        return False
+def executar_atualizacao_catalogo(progresso):
+    """Tarefa da atualização em segundo plano (ver AtualizacaoCatalogoService)"""
+    return atualizar_filmes_tmdb(manter_estoque=True, progresso=progresso)
 
-    try:
-        resultado = tmdb_service.buscar_filme(titulo)
-
-        if not resultado or not resultado.get('results'):
-            print(f"❌ Filme '{titulo}' não encontrado")
-            return False
-
-        filme_tmdb = resultado['results'][0]
-        filme_formatado = tmdb_service.formatar_para_sistema(filme_tmdb)
-
-        if not filme_formatado:
-            return False
-
-        filmes = carregar_filmes()
-        filmes[filme_tmdb['title']] = filme_formatado
-        salvar_filmes(filmes)
+def adicionar_filmes_tmdb(entradas, progresso=None):
+    """
+    Adiciona filmes do TMDB por título ou ID ("tmdb:603") com uma única
+    escrita no catálogo, ignorando os que já estão nele (mesmo tmdb_id)
 
-        print(f"✅ Filme '{filme_tmdb['title']}' adicionado com sucesso")
-        return True
+    Returns:
+        Tupla (sucesso, mensagem, relatorio) de CatalogoService.importar_tmdb
+    """
+    if not tmdb_service or not catalogo_service:
+        return False, "API do TMDB não está configurada!", None
 
+    try:
+        sucesso, mensagem, relatorio = catalogo_service.importar_tmdb(entradas, progresso=progresso)
     except Exception as e:
-        print(f"❌ Erro ao adicionar filme: {e}")
-        return False
+        print(f"❌ Erro ao adicionar filmes: {e}")
+        return False, "❌ Erro ao adicionar filmes", None
+
+    print(mensagem)
+    return sucesso, mensagem, relatorio
 
 
 # ================== INICIALIZAÇÃO ==================
@@ -229,23 +565,95 @@ try:
 except Exception:
     os.makedirs('dados', exist_ok=True)
 
+# Operações em massa no catálogo (comandos de manutenção)
+catalogo_service = CatalogoService(estoque_service, tmdb_service) if CatalogoService and estoque_service else None
+
+# Receita por dia/semana e horários de pico, atualizados só com as vendas novas
+analise_service = AnaliseVendasService(
+    repositorios.vendas,
+    Config.ARQUIVO_ANALISE_VENDAS,
+    intervalo_snapshot=Config.ANALISE_INTERVALO_SNAPSHOT,
+) if AnaliseVendasService and repositorios else None
+
+# Commit em grupo das compras: junta as compras simultâneas numa só escrita
+commit_compras = CommitEmGrupo(
+    processar_compras,
+    max_itens=Config.COMMIT_GRUPO_MAX_ITENS,
+    espera_maxima=Config.COMMIT_GRUPO_ESPERA_MS / 1000,
+    nome='commit-compras',
+) if CommitEmGrupo and estoque_service and Config.COMMIT_GRUPO_ATIVO else None
+
+# Sessões com assentos marcados (mapas em memória, um arquivo por sessão)
+sessao_service = SessaoService(
+    Config.DIRETORIO_SESSOES,
+    tempo_reserva=Config.TEMPO_RESERVA_ASSENTOS,
+    max_assentos=Config.MAX_ASSENTOS_RESERVA,
+    max_por_fileira=Config.MAX_ASSENTOS_FILEIRA,
+) if SessaoService and Config else None
+
+# Checkout em duas etapas: reservas que vencem devolvem o estoque em segundo plano
+reserva_service = ReservaService(
+    estoque_service,
+    Config.ARQUIVO_RESERVAS,
+    tempo_reserva=Config.TEMPO_RESERVA_INGRESSOS,
+) if ReservaService and estoque_service and Config.TEMPO_RESERVA_INGRESSOS > 0 else None
+
+if reserva_service:
+    reserva_service.iniciar_varredura()
+
+# Atualização do catálogo fora das requisições (e periódica, se configurada)
+atualizacao_service = AtualizacaoCatalogoService(
+    executar_atualizacao_catalogo,
+    Config.ARQUIVO_ATUALIZACAO_CATALOGO,
+    timeout=Config.ATUALIZACAO_CATALOGO_TIMEOUT,
+) if AtualizacaoCatalogoService and tmdb_service else None
+
+if atualizacao_service:
+    atualizacao_service.agendar(Config.ATUALIZACAO_CATALOGO_INTERVALO)
+
+# ================== MÉTRICAS ==================
+
+if metricas and Config and Config.METRICAS_ATIVAS:
+    metricas.ativo = True
+
+    @app.before_request
+    def iniciar_metricas():
+        metricas.iniciar_requisicao()
+
+    @app.after_request
+    def registrar_metricas(response):
+        rota = request.url_rule.rule if request.url_rule else "nao_encontrada"
+        tempos = metricas.encerrar_requisicao(rota, request.method, response.status_code)
+        if Config.SERVER_TIMING and tempos:
+            response.headers["Server-Timing"] = server_timing(tempos)
+        return response
+
+    @before_render_template.connect_via(app)
+    def iniciar_template(sender, template, context, **extra):
+        g.inicio_template = time.perf_counter()
+
+    @template_rendered.connect_via(app)
+    def registrar_template(sender, template, context, **extra):
+        inicio = g.pop("inicio_template", None)
+        if inicio is not None:
+            metricas.registrar("template", template.name or "inline", time.perf_counter() - inicio)
+
+
+@app.route("/metrics")
+def exportar_metricas():
+    """Métricas no formato texto do Prometheus (por worker)"""
+    if not metricas or not metricas.ativo:
+        return "Métricas desativadas\n", 404, {"Content-Type": "text/plain; charset=utf-8"}
+    return metricas.exportar(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
 # ================== ROTAS ==================
 
 @app.route("/")
 def index():
     """Página inicial com lista de filmes"""
-    filmes = carregar_filmes()
-    historico = carregar_historico()
-    termo = request.args.get('busca', '').lower()
-    
-    if termo:
-        filtrados = {nome: dados for nome, dados in filmes.items() if termo in nome.lower()}
-    else:
-        filtrados = filmes
-    
-    vendas_por_filme = contar_vendas_por_filme(historico)
-    
-    return render_template("index.html", filmes=filtrados, vendas_por_filme=vendas_por_filme)
+    termo = request.args.get('busca', '')
+    return render_template("index.html", lista_filmes=renderizar_lista_filmes(termo))
 
 
 @app.route("/comprar/<filme>", methods=["GET", "POST"])
@@ -253,9 +661,8 @@ def index():
 def comprar(filme):
     """Página de compra de ingressos"""
     filmes = carregar_filmes()
-    historico = carregar_historico()
     
-    if filme not in filmes:
+    if not filme_a_venda(filmes, filme):
         flash("Filme não encontrado!", "error")
         return redirect(url_for("index"))
 
@@ -314,19 +721,40 @@ def comprar(filme):
             tipo = "Inteira"
             preco = preco_inteira
 
-        if filmes[filme]["estoque"] >= qtd:
-            filmes[filme]["estoque"] -= qtd
-            total = preco * qtd
-            historico.append({
+        if reserva_service:
+            # Checkout em duas etapas: segura os ingressos até o pagamento ser confirmado
+            reservado, mensagem, reserva = reserva_service.reservar(
+                filme, qtd, tipo, preco * qtd, current_user.id
+            )
+            if reservado:
+                return redirect(url_for("ver_reserva", reserva_id=reserva["id"]))
+            restante = estoque_service.consultar(filme)
+        elif estoque_service:
+            reservado, mensagem, restante = efetivar_compra({
                 "filme": filme,
                 "tipo": tipo,
                 "quantidade": qtd,
-                "total": total,
+                "total": preco * qtd,
                 "data": datetime.now().strftime("%d/%m/%Y %H:%M")
             })
+        elif filmes[filme]["estoque"] >= qtd:
+            filmes[filme]["estoque"] -= qtd
             salvar_filmes(filmes)
-            salvar_historico(historico)
-            
+            reservado, mensagem, restante = True, "", filmes[filme]["estoque"]
+            registrar_venda({
+                "filme": filme,
+                "tipo": tipo,
+                "quantidade": qtd,
+                "total": preco * qtd,
+                "data": datetime.now().strftime("%d/%m/%Y %H:%M")
+            })
+        else:
+            reservado = False
+            restante = filmes[filme]["estoque"]
+            mensagem = f"⚠️ Ingressos insuficientes. Disponível: {restante}, Solicitado: {qtd}"
+
+        if reservado:
+            total = preco * qtd
             flash(f"✅ Compra realizada com sucesso! Total: R$ {total:.2f}", "success")
             return redirect(
                 url_for("sucesso", filme=filme, total=f"{total:.2f}", tipo=tipo)
@@ -335,8 +763,8 @@ def comprar(filme):
             return render_template(
                 "compra.html",
                 filme=filme,
-                erro=f"⚠️ Ingressos insuficientes. Disponível: {filmes[filme]['estoque']}, Solicitado: {qtd}",
-                estoque=filmes[filme]["estoque"],
+                erro=mensagem,
+                estoque=restante if restante is not None else filmes[filme]["estoque"],
                 filmes=filmes,
             )
 
@@ -349,6 +777,180 @@ def comprar(filme):
     )
 
 
+# Tipos de ingresso aceitos na compra em lote e fração do preço cobrada
+TIPOS_INGRESSO = {"inteira": ("Inteira", 1.0), "meia": ("Meia", 0.5)}
+
+def ler_carrinho(dados, filmes):
+    """
+    Valida o carrinho da compra em lote
+
+    Args:
+        dados: JSON recebido {"itens": [{"filme", "tipo", "quantidade"}, ...]}
+        filmes: Catálogo atual
+
+    Returns:
+        Tupla (itens, erro) — itens normalizados [(filme, tipo, quantidade)]
+        ou a mensagem de erro
+    """
+    itens = dados.get("itens") if isinstance(dados, dict) else None
+    if not isinstance(itens, list) or not itens:
+        return None, "⚠️ Informe os itens da compra."
+    if len(itens) > Config.MAX_ITENS_COMPRA_LOTE:
+        return None, f"⚠️ Máximo de {Config.MAX_ITENS_COMPRA_LOTE} itens por compra."
+
+    carrinho = []
+    for item in itens:
+        if not isinstance(item, dict):
+            return None, "⚠️ Item inválido."
+
+        filme = item.get("filme")
+        if not filme_a_venda(filmes, filme):
+            return None, f"Filme não encontrado: {filme}"
+
+        tipo = str(item.get("tipo", "")).lower()
+        if tipo not in TIPOS_INGRESSO:
+            return None, f"⚠️ Tipo de ingresso inválido: {item.get('tipo')} (use Inteira ou Meia)."
+
+        try:
+            quantidade = int(item.get("quantidade"))
+        except (TypeError, ValueError):
+            return None, "⚠️ A quantidade deve ser um número válido."
+        if quantidade <= 0:
+            return None, "⚠️ A quantidade deve ser maior que zero."
+
+        carrinho.append((filme, tipo, quantidade))
+
+    return carrinho, None
+
+
+@app.route("/compras/lote", methods=["POST"])
+@login_required
+def comprar_lote():
+    """
+    Compra de vários filmes e tipos de ingresso de uma vez (grupos, escolas)
+
+    Todo o estoque é reservado numa única operação atômica e as vendas são
+    registradas com uma única escrita no histórico. Se algum item não puder
+    ser atendido, nada é vendido.
+
+    Não passa pelo checkout em duas etapas (TEMPO_RESERVA_INGRESSOS): a
+    reserva segura um único filme/tipo e seria confirmada item a item,
+    quebrando o "tudo ou nada" do carrinho. O lote é vendido na hora e, se
+    o histórico não puder ser gravado, o estoque de todos os itens volta.
+    """
+    filmes = carregar_filmes()
+    carrinho, erro = ler_carrinho(request.get_json(silent=True), filmes)
+    if erro:
+        return jsonify({"sucesso": False, "erro": erro}), 400
+
+    quantidades = {}
+    for filme, _, quantidade in carrinho:
+        quantidades[filme] = quantidades.get(filme, 0) + quantidade
+
+    if estoque_service:
+        reservado, mensagem, estoques = estoque_service.reservar_lote(quantidades)
+    else:
+        faltando = {f: filmes[f]["estoque"] for f, q in quantidades.items() if filmes[f]["estoque"] < q}
+        reservado = not faltando
+        if reservado:
+            for filme, quantidade in quantidades.items():
+                filmes[filme] = dict(filmes[filme], estoque=filmes[filme]["estoque"] - quantidade)
+            salvar_filmes(filmes)
+            mensagem, estoques = "", {f: filmes[f]["estoque"] for f in quantidades}
+        else:
+            mensagem, estoques = "⚠️ Ingressos insuficientes.", faltando
+
+    if not reservado:
+        return jsonify({"sucesso": False, "erro": mensagem, "estoque": estoques}), 409
+
+    data = datetime.now().strftime("%d/%m/%Y %H:%M")
+    vendas = []
+    for filme, tipo, quantidade in carrinho:
+        nome_tipo, fator = TIPOS_INGRESSO[tipo]
+        vendas.append({
+            "filme": filme,
+            "tipo": nome_tipo,
+            "quantidade": quantidade,
+            "total": filmes[filme]["preco"] * fator * quantidade,
+            "data": data,
+        })
+    try:
+        registrar_vendas(vendas)
+    except Exception as e:
+        print(f"❌ Erro ao registrar a compra em lote: {e}")
+        devolver_estoque(vendas)
+        return jsonify({
+            "sucesso": False,
+            "erro": "❌ Não foi possível registrar a compra. Os ingressos voltaram ao estoque.",
+        }), 500
+
+    total = sum(venda["total"] for venda in vendas)
+    return jsonify({
+        "sucesso": True,
+        "total": round(total, 2),
+        "vendas": vendas,
+        "estoque": estoques,
+    })
+
+
+@app.route("/reservas/<reserva_id>")
+@login_required
+def ver_reserva(reserva_id):
+    """Reserva aguardando confirmação do pagamento"""
+    reserva = reserva_service.obter(reserva_id, current_user.id) if reserva_service else None
+    if not reserva:
+        flash(RESERVA_INGRESSOS_NAO_ENCONTRADA or "Reserva não encontrada!", "error")
+        return redirect(url_for("index"))
+
+    return render_template(
+        "reserva.html",
+        reserva=reserva,
+        segundos_restantes=max(0, int(reserva["expira_em"] - datetime.now().timestamp())),
+    )
+
+
+@app.route("/reservas/<reserva_id>/confirmar", methods=["POST"])
+@login_required
+def confirmar_reserva(reserva_id):
+    """Confirma o pagamento: a reserva vira venda"""
+    if not reserva_service:
+        return redirect(url_for("index"))
+
+    confirmada, mensagem, reserva = reserva_service.confirmar(reserva_id, current_user.id)
+    if not confirmada:
+        flash(mensagem, "error")
+        return redirect(url_for("index"))
+
+    venda = {
+        "filme": reserva["filme"],
+        "tipo": reserva["tipo"],
+        "quantidade": reserva["quantidade"],
+        "total": reserva["total"],
+        "data": datetime.now().strftime("%d/%m/%Y %H:%M")
+    }
+    if not registrar_venda_confirmada(venda):
+        # A reserva já foi fechada: sem a venda, os ingressos voltam ao estoque
+        devolver_estoque([venda])
+        flash("❌ Não foi possível registrar a compra. Os ingressos foram liberados, tente novamente.", "error")
+        return redirect(url_for("index"))
+
+    total = reserva["total"]
+    flash(f"✅ Compra realizada com sucesso! Total: R$ {total:.2f}", "success")
+    return redirect(
+        url_for("sucesso", filme=reserva["filme"], total=f"{total:.2f}", tipo=reserva["tipo"])
+    )
+
+
+@app.route("/reservas/<reserva_id>/cancelar", methods=["POST"])
+@login_required
+def cancelar_reserva(reserva_id):
+    """Desiste da compra e devolve os ingressos ao estoque"""
+    if reserva_service:
+        cancelada, mensagem, _ = reserva_service.cancelar(reserva_id, current_user.id)
+        flash("Reserva cancelada." if cancelada else mensagem, "warning" if cancelada else "error")
+    return redirect(url_for("index"))
+
+
 @app.route("/sucesso")
 @login_required
 def sucesso():
@@ -359,14 +961,86 @@ def sucesso():
     return render_template("sucesso.html", filme=filme, total=total, tipo=tipo)
 
 
+def ler_filtros_vendas(args):
+    """
+    Lê os filtros de vendas (filme, tipo, de, ate) de um dicionário
+
+    Datas no formato AAAA-MM-DD; a data final é inclusiva.
+
+    Returns:
+        Dicionário com filme, tipo, inicio e fim (epoch) para listar()
+
+    Raises:
+        ValueError: Data inválida
+    """
+    filtros = {
+        "filme": (args.get("filme") or "").strip() or None,
+        "tipo": args.get("tipo") if args.get("tipo") in ("Meia", "Inteira") else None,
+        "inicio": None,
+        "fim": None,
+    }
+    if args.get("de"):
+        filtros["inicio"] = int(datetime.strptime(args["de"], "%Y-%m-%d").timestamp())
+    if args.get("ate"):
+        filtros["fim"] = int((datetime.strptime(args["ate"], "%Y-%m-%d") + timedelta(days=1)).timestamp())
+    return filtros
+
+
+def filtros_historico(args):
+    """Filtros do histórico da query string (data inválida é ignorada com aviso)"""
+    try:
+        return ler_filtros_vendas(args)
+    except ValueError:
+        flash("⚠️ Data inválida no filtro", "warning")
+        return ler_filtros_vendas({"filme": args.get("filme"), "tipo": args.get("tipo")})
+
+
 @app.route("/historico")
 @login_required
 def ver_historico():
-    """Página de histórico de vendas"""
-    historico = carregar_historico()
-    total_vendido = sum(item["total"] for item in historico)
-    return render_template(
-        "historico.html", historico=historico, total_vendido=total_vendido
+    """Página de histórico de vendas (paginada, com filtros)"""
+    filtros = filtros_historico(request.args)
+    cursor = request.args.get("cursor") or None
+    try:
+        por_pagina = min(max(int(request.args.get("por_pagina", HISTORICO_POR_PAGINA)), 1), 500)
+    except ValueError:
+        por_pagina = HISTORICO_POR_PAGINA
+
+    try:
+        if repositorios:
+            vendas, proximo_cursor = repositorios.vendas.listar(
+                cursor=cursor, limite=por_pagina, **filtros
+            )
+        else:
+            vendas, proximo_cursor = carregar_historico(), None
+    except ValueError:
+        flash("⚠️ Página inválida", "warning")
+        vendas, proximo_cursor = [], None
+
+    # Os agregados não separam tipo nem data: com esses filtros o total
+    # exibido é o de todo o período (somar a consulta filtrada relê o histórico)
+    resumo = resumo_vendas()
+    if filtros["filme"]:
+        total_vendido = resumo["por_filme"].get(filtros["filme"], {}).get("arrecadado", 0)
+    else:
+        total_vendido = resumo["total_arrecadado"]
+    total_sem_filtros = bool(filtros["tipo"] or filtros["inicio"] is not None or filtros["fim"] is not None)
+
+    # Parâmetros atuais (sem o cursor) para montar os links de paginação
+    parametros = {k: v for k, v in request.args.items() if k != "cursor" and v}
+
+    # Resposta em streaming: o HTML é enviado enquanto o template é renderizado
+    return stream_template(
+        "historico.html",
+        vendas=vendas,
+        total_vendido=total_vendido,
+        total_sem_filtros=total_sem_filtros,
+        total_vendas=resumo["total_vendas"],
+        proximo_cursor=proximo_cursor,
+        cursor=cursor,
+        parametros=parametros,
+        filtros=request.args,
+        filmes=sorted(set(carregar_filmes()) | set(resumo["por_filme"])),
     )
 
 
@@ -375,11 +1049,11 @@ def ver_historico():
 def admin():
     """Painel administrativo"""
     filmes = carregar_filmes()
-    historico = carregar_historico()
-    
-    total_vendas = len(historico)
-    total_arrecadado = sum(item["total"] for item in historico)
-    vendas_por_filme = contar_vendas_por_filme(historico)
+    resumo = resumo_vendas()
+
+    total_vendas = resumo["total_vendas"]
+    total_arrecadado = resumo["total_arrecadado"]
+    vendas_por_filme = vendas_por_filme_resumo(resumo)
 
     return render_template(
         "admin.html",
@@ -387,44 +1061,113 @@ def admin():
         total_vendas=total_vendas,
         total_arrecadado=total_arrecadado,
         vendas_por_filme=vendas_por_filme,
-        tmdb_disponivel=tmdb_service is not None
+        resumo_por_filme=resumo["por_filme"],
+        tmdb_disponivel=tmdb_service is not None,
+        atualizacao=atualizacao_service.status() if atualizacao_service else None,
+        receita_dias=analise_service.receita_por_dia(30) if analise_service else None,
+        pico=analise_service.horarios_pico() if analise_service else None,
     )
 
 
+@app.route("/admin/analise")
+@admin_required
+def analise_vendas():
+    """Séries de vendas para gráficos: ?dias=30&semanas=12&filme=Titulo"""
+    if not analise_service:
+        return jsonify({"erro": "Análise de vendas indisponível"}), 503
+
+    try:
+        dias = min(max(int(request.args.get("dias", 30)), 1), 3660)
+        semanas = min(max(int(request.args.get("semanas", 12)), 1), 520)
+    except ValueError:
+        return jsonify({"erro": "dias e semanas devem ser números"}), 400
+    filme = request.args.get("filme") or None
+
+    return jsonify({
+        "filme": filme,
+        "por_dia": analise_service.receita_por_dia(dias, filme=filme),
+        "por_semana": analise_service.receita_por_semana(semanas, filme=filme),
+        "por_tipo": analise_service.por_tipo(dias),
+        "horarios_pico": analise_service.horarios_pico(dias),
+    })
+
+
+@app.route("/admin/exportar-vendas")
+@admin_required
+def exportar_historico():
+    """
+    Histórico em CSV ou JSON Lines, gerado em streaming
+
+    Query string: formato=csv|jsonl, gzip=1, filme, tipo, de e ate
+    (AAAA-MM-DD, como no histórico).
+    """
+    if not exportar_vendas:
+        return jsonify({"erro": "Exportação indisponível"}), 503
+
+    formato = request.args.get("formato", "csv")
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({"erro": f"Formato deve ser um de: {', '.join(FORMATOS_EXPORTACAO)}"}), 400
+    try:
+        filtros = ler_filtros_vendas(request.args)
+    except ValueError:
+        return jsonify({"erro": "Datas no formato AAAA-MM-DD"}), 400
+    gzip = request.args.get("gzip") in ("1", "true", "sim")
+
+    sufixo = "-".join(v for v in (request.args.get("de"), request.args.get("ate")) if v)
+    pedacos = exportar_vendas(iterar_historico_filtrado(**filtros), formato, gzip=gzip)
+    return Response(
+        pedacos,
+        content_type="application/gzip" if gzip else FORMATOS_EXPORTACAO[formato],
+        headers={
+            "Content-Disposition": f'attachment; filename="{nome_arquivo(formato, gzip, sufixo)}"',
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+@app.route("/admin/cache")
+@admin_required
+def estatisticas_cache():
+    """Contadores de acerto/falha dos caches (monitoramento)"""
+    return jsonify({
+        "catalogo": cache_catalogo.estatisticas() if cache_catalogo else None,
+        "usuarios": auth_service.cache_usuarios.estatisticas() if auth_service else None,
+        "tmdb": tmdb_service.cache.estatisticas() if tmdb_service and tmdb_service.cache else None,
+        "fragmentos": cache_fragmentos.estatisticas() if cache_fragmentos is not None else None,
+        "commit_compras": commit_compras.estatisticas() if commit_compras else None,
+    })
+
+
 @app.route("/buscar")
 def buscar():
     """Busca de filmes"""
-    filmes = carregar_filmes()
-    historico = carregar_historico()
-    termo = request.args.get("q", "").lower()
-    
-    filmes_filtrados = {
-        nome: dados for nome, dados in filmes.items() if termo in nome.lower()
-    }
-
-    vendas_por_filme = contar_vendas_por_filme(historico)
-
-    return render_template("index.html", filmes=filmes_filtrados, vendas_por_filme=vendas_por_filme)
+    termo = request.args.get("q", "")
+    return render_template("index.html", lista_filmes=renderizar_lista_filmes(termo))
 
 
 @app.route("/admin/atualizar-catalogo", methods=["POST"])
 @admin_required
 def atualizar_catalogo():
-    """Rota para atualizar catálogo via TMDB API"""
-    if not tmdb_service:
+    """Rota para atualizar catálogo via TMDB API (executa em segundo plano)"""
+    if not tmdb_service or not atualizacao_service:
         flash("API do TMDB não está configurada!", "error")
         return redirect(url_for("admin"))
     
-    sucesso = atualizar_filmes_tmdb(manter_estoque=True)
-    
-    if sucesso:
-        flash("✅ Catálogo atualizado com sucesso!", "success")
-    else:
-        flash("❌ Erro ao atualizar catálogo", "error")
+    iniciada, mensagem, _ = atualizacao_service.enfileirar(origem="admin")
+    flash(mensagem, "success" if iniciada else "warning")
     
     return redirect(url_for("admin"))
 
 
+@app.route("/admin/atualizar-catalogo/status")
+@admin_required
+def status_atualizacao_catalogo():
+    """Estado e progresso da atualização do catálogo (JSON)"""
+    if not atualizacao_service:
+        return jsonify({"estado": "indisponivel", "em_andamento": False})
+    return jsonify(atualizacao_service.status())
+
+
 @app.route("/admin/adicionar-filme", methods=["POST"])
 @admin_required
 def adicionar_filme():
@@ -433,22 +1176,254 @@ def adicionar_filme():
         flash("API do TMDB não está configurada!", "error")
         return redirect(url_for("admin"))
     
-    titulo = request.form.get("titulo", "").strip()
-    
-    if not titulo:
+    # Um título (campo "titulo") ou vários, um por linha (campo "titulos")
+    entradas = [request.form.get("titulo", "")] + request.form.get("titulos", "").splitlines()
+    entradas = list(dict.fromkeys(e.strip() for e in entradas if e.strip()))
+
+    if not entradas:
         flash("⚠️ Digite o título do filme", "warning")
         return redirect(url_for("admin"))
-    
-    sucesso = adicionar_filme_especifico(titulo)
-    
-    if sucesso:
-        flash(f"✅ Filme adicionado com sucesso!", "success")
-    else:
-        flash(f"❌ Filme '{titulo}' não encontrado", "error")
+    if len(entradas) > Config.MAX_FILMES_IMPORTACAO:
+        flash(f"⚠️ Máximo de {Config.MAX_FILMES_IMPORTACAO} filmes por vez.", "warning")
+        return redirect(url_for("admin"))
+
+    sucesso, mensagem, relatorio = adicionar_filmes_tmdb(entradas)
+    flash(mensagem, "success" if sucesso else "error")
+    if relatorio and relatorio["nao_encontrados"]:
+        flash("Não encontrados: " + ", ".join(map(str, relatorio["nao_encontrados"][:20])), "warning")
     
     return redirect(url_for("admin"))
 
 
+# ================== API JSON ==================
+
+# Respostas serializadas guardadas por worker (chave inclui a versão do catálogo)
+cache_api = CacheLRU(max_itens=256, ttl=0) if CacheLRU else None
+
+def serializar_json(dados):
+    """JSON compacto (sem indentação nem espaços), em UTF-8"""
+    return json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def gerar_etag(*partes):
+    """ETag forte a partir de uma versão (ou do próprio conteúdo)"""
+    return hashlib.sha1(repr(partes).encode("utf-8")).hexdigest()[:20]
+
+def resposta_json(corpo, etag, ultima_modificacao=None, status=200):
+    """
+    Resposta JSON condicional: 304 Not Modified quando o cliente já tem a
+    versão (If-None-Match / If-Modified-Since)
+    """
+    resposta = app.response_class(corpo, status=status, mimetype="application/json")
+    resposta.set_etag(etag)
+    if ultima_modificacao:
+        resposta.last_modified = ultima_modificacao
+    # Pode guardar, mas deve revalidar a cada uso (a revalidação é barata)
+    resposta.cache_control.no_cache = True
+    if status != 200:
+        return resposta
+    return resposta.make_conditional(request)
+
+def api_catalogo(chave, montar):
+    """
+    Responde uma rota da API derivada do catálogo
+
+    A ETag vem da versão do catálogo (stat do arquivo / contador no banco):
+    se o cliente já tem essa versão, o 304 sai sem carregar nem serializar
+    nada. O corpo serializado fica em cache até a versão mudar.
+
+    Args:
+        chave: Identifica a rota e seus parâmetros
+        montar: Função montar(filmes) -> (dados, status)
+    """
+    versao = repositorios.filmes.versao() if repositorios else None
+    modificado_em = repositorios.filmes.modificado_em() if repositorios else None
+
+    if versao is not None:
+        etag = gerar_etag(chave, versao)
+        if request.if_none_match.contains(etag):
+            return resposta_json(b"", etag, modificado_em)
+
+        em_cache = cache_api.obter(etag) if cache_api else None
+        if em_cache:
+            corpo, status = em_cache
+            return resposta_json(corpo, etag, modificado_em, status)
+
+    dados, status = montar(carregar_filmes())
+    corpo = serializar_json(dados)
+    if versao is None:
+        etag = gerar_etag(chave, corpo)
+    elif cache_api:
+        cache_api.definir(etag, (corpo, status))
+    return resposta_json(corpo, etag, modificado_em, status)
+
+
+@app.route("/api/filmes")
+def api_filmes():
+    """Catálogo em JSON (filmes em cartaz; os retirados seguem em /api/filmes/<nome>)"""
+    def montar(filmes):
+        filmes = filmes_em_cartaz(filmes)
+        return {"total": len(filmes), "filmes": filmes}, 200
+
+    return api_catalogo(("filmes",), montar)
+
+
+@app.route("/api/filmes/<nome>")
+def api_filme(nome):
+    """Dados de um filme em JSON"""
+    def montar(filmes):
+        if nome not in filmes:
+            return {"erro": "Filme não encontrado!"}, 404
+        return {"titulo": nome, **filmes[nome]}, 200
+
+    return api_catalogo(("filme", nome), montar)
+
+
+@app.route("/api/vendas/resumo")
+def api_resumo_vendas():
+    """Agregados de vendas em JSON (totais, por filme e ingressos por filme)"""
+    resumo = resumo_vendas()
+    dados = dict(resumo, vendas_por_filme=vendas_por_filme_resumo(resumo))
+    corpo = serializar_json(dados)
+    # Os agregados são pequenos: a ETag vem do próprio conteúdo
+    return resposta_json(corpo, gerar_etag("resumo", corpo))
+
+
+# ================== SESSÕES E ASSENTOS ==================
+
+def erro_json(mensagem, status=None):
+    """Erro das rotas de sessão: 404 para sessão/reserva inexistente, senão 409/400"""
+    if status is None:
+        status = 404 if mensagem in (SESSAO_NAO_ENCONTRADA, RESERVA_NAO_ENCONTRADA) else 409
+    return jsonify({"sucesso": False, "erro": mensagem}), status
+
+
+def erro_filme_da_sessao(sessao_id):
+    """Resposta de erro se a sessão não existe ou o filme dela foi retirado (senão None)"""
+    filme = sessao_service.filme(sessao_id)
+    if filme is None:
+        return erro_json(SESSAO_NAO_ENCONTRADA)
+    if not filme_a_venda(carregar_filmes(), filme):
+        return erro_json("⚠️ Filme fora de cartaz: a sessão não vende mais ingressos.", 409)
+    return None
+
+
+@app.route("/api/sessoes")
+def api_sessoes():
+    """Sessões (horários) disponíveis, opcionalmente de um filme (?filme=)"""
+    if not sessao_service:
+        return erro_json("Sessões indisponíveis", 503)
+    return jsonify({"sessoes": sessao_service.listar(request.args.get("filme") or None)})
+
+
+@app.route("/api/sessoes", methods=["POST"])
+@admin_required
+def api_criar_sessao():
+    """Cria uma sessão: {"filme", "inicio", "sala", "fileiras", "por_fileira", "preco"}"""
+    if not sessao_service:
+        return erro_json("Sessões indisponíveis", 503)
+
+    dados = request.get_json(silent=True) or {}
+    if not filme_a_venda(carregar_filmes(), dados.get("filme")):
+        return erro_json("Filme não encontrado!", 404)
+
+    sucesso, mensagem, sessao = sessao_service.criar_sessao(
+        dados["filme"], dados.get("inicio"), dados.get("sala"),
+        dados.get("fileiras"), dados.get("por_fileira"), dados.get("preco"),
+    )
+    if not sucesso:
+        return erro_json(mensagem, 400)
+    return jsonify({"sucesso": True, "sessao": sessao}), 201
+
+
+@app.route("/api/sessoes/<sessao_id>")
+def api_sessao(sessao_id):
+    """Sessão com o mapa de assentos (L livre, R reservado, V vendido)"""
+    sessao = sessao_service.obter(sessao_id) if sessao_service else None
+    if not sessao:
+        return erro_json(SESSAO_NAO_ENCONTRADA, 404)
+    return jsonify(sessao)
+
+
+@app.route("/api/sessoes/<sessao_id>/reservas", methods=["POST"])
+@login_required
+def api_reservar_assentos(sessao_id):
+    """
+    Reserva assentos por alguns minutos: {"assentos": ["C7", "C8"]} ou
+    {"quantidade": 3} para os melhores lugares juntos
+    """
+    if not sessao_service:
+        return erro_json("Sessões indisponíveis", 503)
+
+    erro = erro_filme_da_sessao(sessao_id)
+    if erro:
+        return erro
+
+    dados = request.get_json(silent=True) or {}
+    assentos = dados.get("assentos")
+    if assentos is not None and not isinstance(assentos, list):
+        return erro_json("⚠️ Informe os assentos em uma lista.", 400)
+
+    sucesso, mensagem, reserva = sessao_service.reservar(
+        sessao_id, current_user.id, assentos=assentos, quantidade=dados.get("quantidade")
+    )
+    if not sucesso:
+        return erro_json(mensagem)
+    return jsonify({"sucesso": True, "reserva": reserva}), 201
+
+
+@app.route("/api/sessoes/<sessao_id>/reservas/<reserva_id>", methods=["DELETE"])
+@login_required
+def api_cancelar_reserva(sessao_id, reserva_id):
+    """Desiste da reserva e libera os assentos"""
+    if not sessao_service:
+        return erro_json("Sessões indisponíveis", 503)
+    sucesso, mensagem, _ = sessao_service.cancelar_reserva(sessao_id, reserva_id, current_user.id)
+    if not sucesso:
+        return erro_json(mensagem)
+    return jsonify({"sucesso": True})
+
+
+@app.route("/api/sessoes/<sessao_id>/reservas/<reserva_id>/confirmar", methods=["POST"])
+@login_required
+def api_confirmar_reserva(sessao_id, reserva_id):
+    """Confirma a reserva (venda): {"tipo": "Inteira" | "Meia"}"""
+    if not sessao_service:
+        return erro_json("Sessões indisponíveis", 503)
+
+    dados = request.get_json(silent=True) or {}
+    tipo = str(dados.get("tipo", "inteira")).lower()
+    if tipo not in TIPOS_INGRESSO:
+        return erro_json(f"⚠️ Tipo de ingresso inválido: {dados.get('tipo')} (use Inteira ou Meia).", 400)
+
+    erro = erro_filme_da_sessao(sessao_id)
+    if erro:
+        return erro
+
+    sucesso, mensagem, reserva = sessao_service.confirmar(sessao_id, reserva_id, current_user.id)
+    if not sucesso:
+        return erro_json(mensagem)
+
+    nome_tipo, fator = TIPOS_INGRESSO[tipo]
+    preco = reserva["preco"]
+    if preco is None:
+        preco = carregar_filmes().get(reserva["filme"], {}).get("preco", Config.PRECO_PADRAO)
+    quantidade = len(reserva["assentos"])
+    venda = {
+        "filme": reserva["filme"],
+        "tipo": nome_tipo,
+        "quantidade": quantidade,
+        "total": preco * fator * quantidade,
+        "data": datetime.now().strftime("%d/%m/%Y %H:%M"),
+        "sessao": reserva["sessao"],
+        "assentos": reserva["assentos"],
+    }
+    if not registrar_venda_confirmada(venda):
+        # Os assentos já estão vendidos: sem a venda no histórico, voltam a ficar livres
+        sessao_service.estornar(sessao_id, reserva["assentos"])
+        return erro_json("❌ Não foi possível registrar a compra. Os assentos foram liberados.", 500)
+    return jsonify({"sucesso": True, "venda": venda})
+
+
 # ================== ROTAS DE AUTENTICAÇÃO ==================
 
 @app.route("/login", methods=["GET", "POST"])
@@ -534,6 +1509,167 @@ def perfil():
     return render_template("perfil.html")
 
 
+# ================== COMANDOS (flask --app app ...) ==================
+
+@app.cli.command("exportar-vendas")
+@click.option("--formato", type=click.Choice(["csv", "jsonl"]), default="csv", show_default=True)
+@click.option("--de", help="Data inicial (AAAA-MM-DD)")
+@click.option("--ate", help="Data final, inclusiva (AAAA-MM-DD)")
+@click.option("--filme", help="Título exato do filme")
+@click.option("--tipo", type=click.Choice(["Meia", "Inteira"]))
+@click.option("--gzip", is_flag=True, help="Comprime a saída em gzip")
+@click.option("--saida", type=click.Path(dir_okay=False, writable=True), help="Arquivo de saída (padrão: stdout)")
+def comando_exportar_vendas(formato, de, ate, filme, tipo, gzip, saida):
+    """Exporta o histórico de vendas em CSV ou JSON Lines"""
+    try:
+        filtros = ler_filtros_vendas({"de": de, "ate": ate, "filme": filme, "tipo": tipo})
+    except ValueError:
+        raise click.BadParameter("use o formato AAAA-MM-DD", param_hint="--de/--ate")
+
+    pedacos = exportar_vendas(iterar_historico_filtrado(**filtros), formato, gzip=gzip)
+    destino = open(saida, "wb") if saida else click.get_binary_stream("stdout")
+    try:
+        for pedaco in pedacos:
+            destino.write(pedaco)
+    finally:
+        if saida:
+            destino.close()
+            click.echo(f"✅ Vendas exportadas para {saida}", err=True)
+
+
+manutencao = AppGroup("manutencao", help="Operações em massa no catálogo e no histórico (aplicação parada)")
+app.cli.add_command(manutencao)
+
+
+def _falhar(mensagem):
+    click.echo(mensagem, err=True)
+    raise SystemExit(1)
+
+
+def _tempo(inicio):
+    return f"⏱️  {time.perf_counter() - inicio:.2f}s"
+
+
+@manutencao.command("importar-filmes")
+@click.argument("arquivo", type=click.Path(exists=True, dir_okay=False))
+@click.option("--somente-novos", is_flag=True, help="Não altera os filmes que já existem")
+@click.option("--simular", is_flag=True, help="Só valida o arquivo, sem gravar")
+def comando_importar_filmes(arquivo, somente_novos, simular):
+    """
+    Importa filmes de um CSV (coluna titulo + estoque, preco, ano, genero,
+    imagem, sinopse, nota, tmdb_id) ou de um JSON no formato do filmes.json
+    """
+    inicio = time.perf_counter()
+    try:
+        registros, erros = ler_arquivo_filmes(arquivo)
+    except (OSError, ValueError) as e:
+        _falhar(f"❌ Não foi possível ler {arquivo}: {e}")
+    for erro in erros:
+        click.echo(f"   ⚠️ {erro}", err=True)
+    if erros:
+        _falhar(f"❌ {len(erros)} erros no arquivo. Nada foi importado.")
+    if simular:
+        click.echo(f"✅ {len(registros)} filmes válidos (simulação, nada gravado). {_tempo(inicio)}")
+        return
+
+    sucesso, mensagem, _ = catalogo_service.importar(registros, sobrescrever=not somente_novos)
+    if not sucesso:
+        _falhar(mensagem)
+    click.echo(f"{mensagem}. {_tempo(inicio)}")
+
+
+@manutencao.command("importar-tmdb")
+@click.argument("entradas", nargs=-1)
+@click.option("--arquivo", type=click.File("r", encoding="utf-8"),
+              help="Arquivo texto com um título ou ID (tmdb:603) por linha")
+def comando_importar_tmdb(entradas, arquivo):
+    """Adiciona filmes do TMDB por título ou ID, sem duplicar (tmdb_id)"""
+    entradas = list(entradas)
+    if arquivo:
+        entradas += [linha.strip() for linha in arquivo if linha.strip() and not linha.startswith("#")]
+    if not entradas:
+        _falhar("❌ Informe os títulos ou --arquivo.")
+
+    inicio = time.perf_counter()
+
+    def progresso(feitos, total):
+        if feitos == total or feitos % 25 == 0:
+            click.echo(f"   🔎 detalhes {feitos}/{total}", err=True)
+
+    sucesso, mensagem, relatorio = catalogo_service.importar_tmdb(list(dict.fromkeys(entradas)), progresso=progresso)
+    if relatorio:
+        for entrada, titulo in relatorio["existentes"].items():
+            click.echo(f"   = {entrada} (já no catálogo como '{titulo}')")
+        for entrada in relatorio["nao_encontrados"]:
+            click.echo(f"   ? {entrada} (não encontrado)")
+    if relatorio is None:
+        _falhar(mensagem)
+    click.echo(f"{mensagem}. {_tempo(inicio)}")
+
+
+@manutencao.command("definir-estoque")
+@click.argument("titulos", nargs=-1)
+@click.option("--arquivo", type=click.Path(exists=True, dir_okay=False),
+              help="CSV com as colunas titulo e estoque, preco e/ou somar")
+@click.option("--todos", is_flag=True, help="Aplica a todos os filmes do catálogo")
+@click.option("--estoque", type=click.IntRange(min=0), help="Novo estoque")
+@click.option("--somar", type=int, help="Ingressos a somar (ou retirar, se negativo) ao estoque atual")
+@click.option("--preco", type=click.FloatRange(min=0, min_open=True), help="Novo preço")
+def comando_definir_estoque(titulos, arquivo, todos, estoque, somar, preco):
+    """Define estoque e/ou preço de vários filmes com uma única escrita"""
+    inicio = time.perf_counter()
+    campos = {nome: valor for nome, valor in (("estoque", estoque), ("somar", somar), ("preco", preco))
+              if valor is not None}
+
+    ajustes = {}
+    if arquivo:
+        registros, erros = ler_arquivo_filmes(arquivo, {"estoque": int, "preco": float, "somar": int})
+        for erro in erros:
+            click.echo(f"   ⚠️ {erro}", err=True)
+        if erros:
+            _falhar(f"❌ {len(erros)} erros no arquivo. Nada foi alterado.")
+        ajustes = {r.pop("titulo"): r for r in registros}
+    if titulos or todos:
+        if not campos:
+            _falhar("❌ Informe --estoque, --somar e/ou --preco.")
+        ajustes.update({titulo: campos for titulo in titulos})
+    if not ajustes and not todos:
+        _falhar("❌ Informe os títulos, --todos ou --arquivo.")
+
+    sucesso, mensagem, alterados = catalogo_service.ajustar(ajustes, todos=campos if todos else None)
+    if not sucesso:
+        _falhar(mensagem)
+    click.echo(f"{mensagem}. {_tempo(inicio)}")
+
+
+@manutencao.command("arquivar-historico")
+@click.option("--ate", required=True, help="Arquiva as vendas anteriores a esta data (AAAA-MM-DD)")
+@click.option("--diretorio", default=lambda: Config.DIRETORIO_ARQUIVO_VENDAS, show_default="dados/arquivo",
+              help="Onde gravar os segmentos .jsonl.gz")
+def comando_arquivar_historico(ate, diretorio):
+    """Move as vendas antigas para arquivos mensais comprimidos"""
+    try:
+        corte = int(datetime.strptime(ate, "%Y-%m-%d").timestamp())
+    except ValueError:
+        raise click.BadParameter("use o formato AAAA-MM-DD", param_hint="--ate")
+
+    inicio = time.perf_counter()
+    sucesso, mensagem, relatorio = ArquivoVendasService(repositorios.vendas, diretorio).arquivar(corte)
+    for mes, quantidade in relatorio["segmentos"].items():
+        click.echo(f"   📦 {mes}: {quantidade} vendas")
+    if relatorio["mantidas"] is not None:
+        mensagem += f" ({relatorio['mantidas']} vendas continuam no histórico)"
+    click.echo(f"{mensagem}. {_tempo(inicio)}")
+
+
+@manutencao.command("compactar-historico")
+def comando_compactar_historico():
+    """Reorganiza o histórico (descarta linhas corrompidas do diário / VACUUM no SQLite)"""
+    inicio = time.perf_counter()
+    mantidas = repositorios.vendas.compactar()
+    click.echo(f"✅ Histórico compactado: {mantidas} vendas. {_tempo(inicio)}")
+
+
 # ================== EXECUÇÃO ==================
 if __name__ == "__main__":
     print("\n" + "="*60)
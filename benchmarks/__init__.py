@@ -0,0 +1,6 @@
+"""
+Benchmarks de carga do Sistema de Cinema
+
+Uso:
+    python -m benchmarks --help
+"""
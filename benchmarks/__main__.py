@@ -0,0 +1,226 @@
+"""
+Benchmarks das rotas de compra e navegação
+
+Para cada escala (número de vendas no histórico) cria um diretório
+temporário com dados sintéticos, mede as rotas com o test client do Flask
+e, opcionalmente, com o gunicorn em vários processos. O resultado (p50/p95/
+p99 e requisições por segundo por rota) vai para um JSON que pode ser
+comparado com o de outro commit.
+
+Uso:
+    python -m benchmarks
+    python -m benchmarks --escalas 100,10000,1000000 --backend sqlite
+    python -m benchmarks --gunicorn --workers 4
+    python -m benchmarks --comparar benchmarks/resultados/anterior.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.sementes import semear
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ambiente(backend):
+    """Variáveis de ambiente dos processos medidos"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = RAIZ + os.pathsep + env.get('PYTHONPATH', '')
+    env['BACKEND_ARMAZENAMENTO'] = backend
+    # Mede a compra direta (estoque + venda na mesma requisição)
+    env['TEMPO_RESERVA_INGRESSOS'] = '0'
+    env['ATUALIZACAO_CATALOGO_INTERVALO'] = '0'
+    env.pop('ARQUIVO_SQLITE', None)
+    return env
+
+
+def rodar_carga(diretorio, env, args, modo, url=None):
+    """Roda benchmarks.carga num processo separado e lê o JSON produzido"""
+    saida = os.path.join(diretorio, f'resultado_{modo}.json')
+    comando = [
+        sys.executable, '-m', 'benchmarks.carga',
+        '--modo', modo,
+        '--requisicoes', str(args.requisicoes),
+        '--threads', str(args.threads),
+        '--saida', saida,
+    ]
+    if url:
+        comando += ['--url', url]
+    if args.rotas:
+        comando += ['--rotas', args.rotas]
+
+    subprocess.run(comando, cwd=diretorio, env=env, check=True,
+                   stdout=subprocess.DEVNULL if not args.verboso else None)
+    with open(saida, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def aguardar_servidor(url, processo, limite=120):
+    import requests
+    prazo = time.monotonic() + limite
+    while time.monotonic() < prazo:
+        if processo.poll() is not None:
+            raise RuntimeError("O gunicorn terminou antes de responder")
+        try:
+            requests.get(url + '/api/filmes', timeout=2)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError("O gunicorn não respondeu a tempo")
+
+
+def rodar_gunicorn(diretorio, env, args):
+    """Sobe o gunicorn com `args.workers` processos e mede via HTTP"""
+    porta = porta_livre()
+    url = f'http://127.0.0.1:{porta}'
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(args.workers),
+         '--threads', str(args.threads), '--bind', f'127.0.0.1:{porta}', 'app:app'],
+        cwd=diretorio, env=env,
+        stdout=subprocess.DEVNULL if not args.verboso else None,
+        stderr=subprocess.DEVNULL if not args.verboso else None,
+    )
+    try:
+        aguardar_servidor(url, processo)
+        return rodar_carga(diretorio, env, args, 'http', url=url)
+    finally:
+        processo.terminate()
+        processo.wait(timeout=30)
+
+
+def medir_escala(vendas, args):
+    diretorio = tempfile.mkdtemp(prefix=f'cinema-bench-{vendas}-')
+    try:
+        inicio = time.perf_counter()
+        tamanhos = semear(diretorio, vendas)
+        resultado = {'dados': tamanhos, 'preparo_s': round(time.perf_counter() - inicio, 2)}
+
+        env = ambiente(args.backend)
+        resultado['cliente'] = rodar_carga(diretorio, env, args, 'cliente')
+        if args.gunicorn:
+            resultado['gunicorn'] = rodar_gunicorn(diretorio, env, args)
+        return resultado
+    finally:
+        if args.manter:
+            print(f"   dados mantidos em {diretorio}")
+        else:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+
+# ================== RELATÓRIO ==================
+
+def imprimir(resultados):
+    for escala, dados in resultados['escalas'].items():
+        print(f"\n📊 {escala} vendas ({dados['dados']['filmes']} filmes, "
+              f"{dados['dados']['usuarios']} usuários, preparo {dados['preparo_s']}s)")
+        for modo in ('cliente', 'gunicorn'):
+            if modo not in dados:
+                continue
+            print(f"   [{modo}]  {'rota':<12}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>7}")
+            for rota, r in dados[modo].items():
+                print(f"   {'':<10}{rota:<12}{r['rps']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+                      f"{r['p99_ms']:>10}{r['erros']:>7}")
+
+
+def variacao(atual, anterior):
+    if not anterior:
+        return '    -'
+    return f"{(atual - anterior) / anterior * 100:+6.1f}%"
+
+
+def comparar(resultados, arquivo):
+    """Variação de p50/p95 e rps em relação a um resultado anterior"""
+    with open(arquivo, encoding='utf-8') as f:
+        anterior = json.load(f)
+
+    print(f"\n🔁 Comparação com {anterior.get('commit') or arquivo} (negativo = mais rápido em p50/p95)")
+    for escala, dados in resultados['escalas'].items():
+        base = anterior.get('escalas', {}).get(escala)
+        if not base:
+            continue
+        for modo in ('cliente', 'gunicorn'):
+            for rota, r in dados.get(modo, {}).items():
+                antes = base.get(modo, {}).get(rota)
+                if not antes:
+                    continue
+                print(f"   {escala:>8} {modo:<9}{rota:<12}"
+                      f" p50 {variacao(r['p50_ms'], antes['p50_ms'])}"
+                      f"  p95 {variacao(r['p95_ms'], antes['p95_ms'])}"
+                      f"  rps {variacao(r['rps'], antes['rps'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks das rotas do Sistema de Cinema")
+    parser.add_argument('--escalas', default='100,10000',
+                        help="Vendas no histórico, separadas por vírgula (ex: 100,10000,1000000)")
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--rotas', help="Rotas a medir (index,buscar,api_filmes,comprar,historico,admin,login)")
+    parser.add_argument('--requisicoes', type=int, default=200, help="Requisições por rota")
+    parser.add_argument('--threads', type=int, default=4, help="Requisições simultâneas")
+    parser.add_argument('--gunicorn', action='store_true', help="Mede também com o gunicorn (HTTP)")
+    parser.add_argument('--workers', type=int, default=4, help="Workers do gunicorn")
+    parser.add_argument('--saida', help="Arquivo JSON do resultado (padrão: benchmarks/resultados/)")
+    parser.add_argument('--comparar', help="Resultado anterior para comparação")
+    parser.add_argument('--manter', action='store_true', help="Não apaga os diretórios de dados")
+    parser.add_argument('--verboso', action='store_true', help="Mostra a saída da aplicação")
+    args = parser.parse_args()
+
+    escalas = [int(e) for e in args.escalas.split(',') if e.strip()]
+    resultados = {
+        'commit': commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'backend': args.backend,
+        'requisicoes': args.requisicoes,
+        'threads': args.threads,
+        'workers': args.workers if args.gunicorn else None,
+        'escalas': {},
+    }
+
+    for vendas in escalas:
+        print(f"⏱️  Medindo escala de {vendas} vendas ({args.backend})...")
+        resultados['escalas'][str(vendas)] = medir_escala(vendas, args)
+
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS,
+        f"{datetime.now():%Y%m%d-%H%M%S}-{resultados['commit'] or 'local'}-{args.backend}.json",
+    )
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+    imprimir(resultados)
+    if args.comparar:
+        comparar(resultados, args.comparar)
+    print(f"\n💾 Resultado salvo em {saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
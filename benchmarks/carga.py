@@ -0,0 +1,228 @@
+"""
+Execução da carga de um benchmark (roda dentro do diretório de trabalho)
+
+Modo "cliente": importa a aplicação e usa o test client do Flask, sem rede.
+Modo "http": dispara requisições HTTP contra um servidor já no ar (ex: o
+gunicorn com vários workers iniciado por `python -m benchmarks --gunicorn`).
+
+Uso (normalmente chamado por `python -m benchmarks`):
+    python -m benchmarks.carga --modo cliente --saida resultado.json
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+
+from benchmarks.sementes import SENHA_USUARIOS
+from utils.helpers import carregar_json
+
+# Requisições de aquecimento por rota (caches, índices, resumo de vendas)
+AQUECIMENTO = 5
+
+
+class Cenario:
+    """Uma rota a medir: método, sessão necessária e status esperados"""
+
+    __slots__ = ('nome', 'metodo', 'sessao', 'montar', 'esperados')
+
+    def __init__(self, nome, metodo, sessao, montar, esperados=(200,)):
+        """
+        Args:
+            nome: Nome da rota no relatório
+            metodo: GET ou POST
+            sessao: 'anonimo', 'usuario', 'admin' ou 'nova' (sem cookies, uma por requisição)
+            montar: Função (contexto, sorteio) -> (caminho, dados do formulário)
+            esperados: Status HTTP considerados sucesso
+        """
+        self.nome = nome
+        self.metodo = metodo
+        self.sessao = sessao
+        self.montar = montar
+        self.esperados = esperados
+
+
+CENARIOS = [
+    Cenario('index', 'GET', 'anonimo', lambda ctx, s: ('/', None)),
+    Cenario('buscar', 'GET', 'anonimo', lambda ctx, s: (f"/buscar?q={s.choice(ctx['termos'])}", None)),
+    Cenario('api_filmes', 'GET', 'anonimo', lambda ctx, s: ('/api/filmes', None)),
+    Cenario('comprar', 'POST', 'usuario', lambda ctx, s: (
+        f"/comprar/{s.choice(ctx['titulos'])}",
+        {'idade': str(s.randint(10, 70)), 'estudante': s.choice(['sim', 'nao']), 'quantidade': '1'},
+    ), esperados=(302,)),
+    Cenario('historico', 'GET', 'admin', lambda ctx, s: ('/historico', None)),
+    Cenario('admin', 'GET', 'admin', lambda ctx, s: ('/admin', None)),
+    Cenario('login', 'POST', 'nova', lambda ctx, s: (
+        '/login', {'username': s.choice(ctx['logins']), 'password': SENHA_USUARIOS},
+    ), esperados=(302,)),
+]
+
+
+# ================== CLIENTES ==================
+
+class ClienteFlask:
+    """Test client do Flask (sem rede, um processo)"""
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+
+    def requisitar(self, metodo, caminho, dados=None):
+        return self.cliente.open(caminho, method=metodo, data=dados).status_code
+
+
+class ClienteHTTP:
+    """Sessão HTTP contra um servidor no ar (cookies mantidos entre requisições)"""
+
+    def __init__(self, url):
+        import requests
+        self.sessao = requests.Session()
+        self.url = url.rstrip('/')
+
+    def requisitar(self, metodo, caminho, dados=None):
+        resposta = self.sessao.request(metodo, self.url + caminho, data=dados, allow_redirects=False)
+        return resposta.status_code
+
+
+def criar_cliente(fabrica, sessao, contexto):
+    """Cliente já autenticado conforme o tipo de sessão do cenário"""
+    cliente = fabrica()
+    if sessao in ('usuario', 'admin'):
+        login = 'admin' if sessao == 'admin' else contexto['logins'][-1]
+        status = cliente.requisitar('POST', '/login', {'username': login, 'password': SENHA_USUARIOS})
+        if status != 302:
+            raise RuntimeError(f"Login de {login} falhou (status {status})")
+    return cliente
+
+
+# ================== MEDIÇÃO ==================
+
+def percentil(ordenados, p):
+    """Percentil p (0-100) pelo método do posto mais próximo"""
+    if not ordenados:
+        return None
+    posto = max(1, math.ceil(p / 100 * len(ordenados)))
+    return ordenados[posto - 1]
+
+
+def resumir(latencias, erros, duracao):
+    """Percentis em milissegundos e vazão (requisições por segundo)"""
+    ordenados = sorted(latencias)
+    em_ms = lambda valor: round(valor * 1000, 3) if valor is not None else None
+    return {
+        'requisicoes': len(ordenados),
+        'erros': erros,
+        'rps': round(len(ordenados) / duracao, 1) if duracao > 0 else None,
+        'p50_ms': em_ms(percentil(ordenados, 50)),
+        'p95_ms': em_ms(percentil(ordenados, 95)),
+        'p99_ms': em_ms(percentil(ordenados, 99)),
+        'max_ms': em_ms(ordenados[-1] if ordenados else None),
+        'media_ms': em_ms(sum(ordenados) / len(ordenados) if ordenados else None),
+    }
+
+
+def medir_cenario(cenario, fabrica, contexto, requisicoes, threads, semente):
+    """
+    Executa `requisicoes` requisições do cenário divididas entre `threads`
+
+    Returns:
+        Dicionário de resumir()
+    """
+    threads = max(1, min(threads, requisicoes))
+    clientes = [criar_cliente(fabrica, cenario.sessao, contexto) for _ in range(threads)]
+
+    # Aquecimento fora da medição
+    sorteio = random.Random(semente)
+    for _ in range(AQUECIMENTO):
+        cliente = fabrica() if cenario.sessao == 'nova' else clientes[0]
+        caminho, dados = cenario.montar(contexto, sorteio)
+        cliente.requisitar(cenario.metodo, caminho, dados)
+
+    latencias = []
+    erros = [0]
+    lock = threading.Lock()
+    largada = threading.Barrier(threads + 1)
+
+    def trabalhador(indice, quantidade):
+        sorteio_local = random.Random(semente * 1000 + indice)
+        cliente = clientes[indice]
+        medidas, falhas = [], 0
+        largada.wait()
+        for _ in range(quantidade):
+            if cenario.sessao == 'nova':
+                cliente = fabrica()
+            caminho, dados = cenario.montar(contexto, sorteio_local)
+            inicio = time.perf_counter()
+            status = cliente.requisitar(cenario.metodo, caminho, dados)
+            medidas.append(time.perf_counter() - inicio)
+            if status not in cenario.esperados:
+                falhas += 1
+        with lock:
+            latencias.extend(medidas)
+            erros[0] += falhas
+
+    cotas = [requisicoes // threads + (1 if i < requisicoes % threads else 0) for i in range(threads)]
+    trabalhadores = [threading.Thread(target=trabalhador, args=(i, cota)) for i, cota in enumerate(cotas)]
+    for t in trabalhadores:
+        t.start()
+    largada.wait()
+    inicio = time.perf_counter()
+    for t in trabalhadores:
+        t.join()
+    return resumir(latencias, erros[0], time.perf_counter() - inicio)
+
+
+def montar_contexto():
+    """Títulos, termos de busca e logins a partir dos dados do diretório atual"""
+    filmes = carregar_json('dados/filmes.json', {})
+    usuarios = carregar_json('dados/usuarios.json', {})
+    titulos = sorted(filmes)
+    termos = sorted({palavra.lower() for titulo in titulos for palavra in titulo.split()[:2]})
+    return {
+        'titulos': titulos,
+        'termos': termos,
+        'logins': [u['username'] for u in usuarios.values()],
+    }
+
+
+def executar(modo, rotas, requisicoes, threads, url=None, semente=42):
+    """
+    Mede cada rota pedida e retorna {rota: resumo}
+
+    Args:
+        modo: 'cliente' (test client) ou 'http' (servidor em `url`)
+        rotas: Nomes das rotas (ver CENARIOS) ou None para todas
+    """
+    contexto = montar_contexto()
+    if modo == 'cliente':
+        from app import app
+        fabrica = lambda: ClienteFlask(app)
+    else:
+        fabrica = lambda: ClienteHTTP(url)
+
+    resultados = {}
+    for cenario in CENARIOS:
+        if rotas and cenario.nome not in rotas:
+            continue
+        resultados[cenario.nome] = medir_cenario(cenario, fabrica, contexto, requisicoes, threads, semente)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga de um benchmark (diretório atual = dados)")
+    parser.add_argument('--modo', choices=['cliente', 'http'], default='cliente')
+    parser.add_argument('--url', help="URL do servidor no modo http")
+    parser.add_argument('--rotas', help="Rotas separadas por vírgula (padrão: todas)")
+    parser.add_argument('--requisicoes', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--saida', required=True, help="Arquivo JSON com o resultado")
+    args = parser.parse_args()
+
+    rotas = args.rotas.split(',') if args.rotas else None
+    resultados = executar(args.modo, rotas, args.requisicoes, args.threads, url=args.url)
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
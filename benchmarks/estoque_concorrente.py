@@ -0,0 +1,122 @@
+"""
+Teste de estresse da reserva de estoque entre processos (zero overselling)
+
+Sobe N processos que disparam ao mesmo tempo pedidos de EstoqueService.reservar
+contra um filme com estoque S, nos backends JSON e SQLite, e confere:
+- ingressos vendidos == min(S, demanda) (com pedidos de 1 ingresso);
+- estoque final == S - vendidos, nunca negativo.
+
+Sai com código 1 se alguma verificação falhar.
+
+Uso:
+    python -m benchmarks.estoque_concorrente
+    python -m benchmarks.estoque_concorrente --processos 32 --pedidos 50 --estoque 1000
+    python -m benchmarks.estoque_concorrente --backend sqlite --quantidade 3
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from repositorios import BancoSQLite, RepositorioFilmesJSON, RepositorioFilmesSQLite
+from services.estoque_service import EstoqueService
+
+FILME = 'Filme Estresse'
+
+
+def criar_repositorio(backend, diretorio):
+    """Repositório de filmes do backend num diretório de teste"""
+    if backend == 'json':
+        return RepositorioFilmesJSON(os.path.join(diretorio, 'filmes.json'))
+    return RepositorioFilmesSQLite(BancoSQLite(os.path.join(diretorio, 'cinema.db')))
+
+
+def comprador(backend, diretorio, pedidos, quantidade, largada, vendidos):
+    """Processo comprador: espera a largada e tenta `pedidos` reservas"""
+    estoque_service = EstoqueService(criar_repositorio(backend, diretorio))
+    largada.wait()
+    total = 0
+    for _ in range(pedidos):
+        sucesso, _, restante = estoque_service.reservar(FILME, quantidade)
+        if sucesso:
+            total += quantidade
+            if restante < 0:
+                raise SystemExit(f"estoque negativo após reserva: {restante}")
+    vendidos.put(total)
+
+
+def executar(backend, processos, pedidos, estoque, quantidade):
+    """
+    Roda um cenário de estresse
+
+    Returns:
+        Tupla (ok, relatorio) — relatorio com vendidos, esperado, estoque final e tempo
+    """
+    diretorio = tempfile.mkdtemp(prefix=f'estresse_{backend}_')
+    try:
+        criar_repositorio(backend, diretorio).salvar(
+            {FILME: {'estoque': estoque, 'preco': 20.0, 'ano': 2025, 'genero': 'N/A', 'imagem': ''}}
+        )
+
+        contexto = multiprocessing.get_context('spawn')
+        largada = contexto.Event()
+        vendidos = contexto.Queue()
+        filhos = [
+            contexto.Process(target=comprador, args=(backend, diretorio, pedidos, quantidade, largada, vendidos))
+            for _ in range(processos)
+        ]
+        for filho in filhos:
+            filho.start()
+        # Os filhos importam a aplicação antes de esperar a largada
+        time.sleep(1.0)
+        inicio = time.perf_counter()
+        largada.set()
+
+        total = sum(vendidos.get(timeout=300) for _ in filhos)
+        for filho in filhos:
+            filho.join()
+        tempo = time.perf_counter() - inicio
+
+        final = criar_repositorio(backend, diretorio).obter(FILME)['estoque']
+        demanda = processos * pedidos
+        esperado = quantidade * min(estoque // quantidade, demanda)
+        relatorio = {
+            'backend': backend,
+            'demanda': demanda * quantidade,
+            'vendidos': total,
+            'esperado': esperado,
+            'estoque_final': final,
+            'tempo': round(tempo, 2),
+        }
+        ok = (all(filho.exitcode == 0 for filho in filhos)
+              and total == esperado and final == estoque - total and final >= 0)
+        return ok, relatorio
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=('json', 'sqlite', 'todos'), default='todos')
+    parser.add_argument('--processos', type=int, default=16, help='Processos compradores')
+    parser.add_argument('--pedidos', type=int, default=40, help='Pedidos por processo')
+    parser.add_argument('--estoque', type=int, default=300, help='Estoque inicial do filme')
+    parser.add_argument('--quantidade', type=int, default=1, help='Ingressos por pedido')
+    args = parser.parse_args()
+
+    backends = ('json', 'sqlite') if args.backend == 'todos' else (args.backend,)
+    falhou = False
+    for backend in backends:
+        ok, relatorio = executar(backend, args.processos, args.pedidos, args.estoque, args.quantidade)
+        falhou |= not ok
+        print(f"{'✅' if ok else '❌'} {backend}: vendidos {relatorio['vendidos']} "
+              f"(esperado {relatorio['esperado']}, demanda {relatorio['demanda']}), "
+              f"estoque final {relatorio['estoque_final']}, {relatorio['tempo']}s")
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Dados sintéticos para os benchmarks
+
+Gera dados/filmes.json, dados/usuarios.json e dados/historico.jsonl num
+diretório de trabalho, no mesmo formato usado pela aplicação. Com o backend
+SQLite, a própria aplicação importa esses arquivos na primeira execução.
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from utils.helpers import salvar_json
+
+# Senha de todos os usuários sintéticos (o hash é gerado uma vez só)
+SENHA_USUARIOS = 'senha123'
+
+GENEROS = ['Ação', 'Drama', 'Comédia', 'Terror', 'Ficção', 'Romance', 'Animação', 'Crime']
+PALAVRAS = ['noite', 'cidade', 'último', 'sombra', 'herói', 'viagem', 'estrela', 'segredo',
+            'rio', 'guerra', 'amor', 'chefão', 'origem', 'pele', 'tempo', 'fogo']
+
+
+def dimensionar(vendas):
+    """
+    Tamanho do catálogo e da base de usuários para uma escala de vendas
+
+    Returns:
+        Tupla (filmes, usuarios)
+    """
+    filmes = min(5000, max(20, vendas // 200))
+    usuarios = min(2000, max(10, vendas // 500))
+    return filmes, usuarios
+
+
+def titulo_filme(numero, sorteio):
+    palavras = sorteio.sample(PALAVRAS, 2)
+    return f"{palavras[0].capitalize()} {palavras[1]} {numero}"
+
+
+def gerar_filmes(quantidade, sorteio):
+    """Catálogo {titulo: dados} com estoque alto (as compras nunca esgotam)"""
+    filmes = {}
+    for numero in range(1, quantidade + 1):
+        titulo = titulo_filme(numero, sorteio)
+        filmes[titulo] = {
+            'estoque': 10 ** 9,
+            'preco': float(sorteio.choice([18, 20, 22, 25, 30])),
+            'imagem': '',
+            'ano': sorteio.randint(1970, 2026),
+            'genero': '/'.join(sorteio.sample(GENEROS, 2)),
+            'sinopse': ' '.join(sorteio.choices(PALAVRAS, k=12)),
+        }
+    return filmes
+
+
+def gerar_usuarios(quantidade):
+    """Usuários {id: dados}; o id 1 é o admin (mesma senha dos demais)"""
+    password_hash = generate_password_hash(SENHA_USUARIOS)
+    criado_em = datetime.now().strftime("%d/%m/%Y %H:%M")
+    usuarios = {}
+    for numero in range(1, quantidade + 1):
+        usuarios[str(numero)] = {
+            'id': str(numero),
+            'username': 'admin' if numero == 1 else f'usuario{numero}',
+            'email': f'usuario{numero}@cinema.com',
+            'password_hash': password_hash,
+            'role': 'admin' if numero == 1 else 'user',
+            'created_at': criado_em,
+        }
+    return usuarios
+
+
+def gravar_vendas(arquivo, quantidade, titulos, precos, sorteio):
+    """
+    Escreve `quantidade` vendas no diário JSON Lines, em ordem cronológica
+
+    As vendas se espalham pelo último ano, como num histórico real (o
+    diário é ordenado por data; a listagem faz busca binária por ela).
+    """
+    fim = datetime.now()
+    inicio = fim - timedelta(days=365)
+    passo = (fim - inicio) / max(quantidade, 1)
+
+    with open(arquivo, 'w', encoding='utf-8') as f:
+        linhas = []
+        for numero in range(quantidade):
+            titulo = sorteio.choice(titulos)
+            tipo, fator = ('Meia', 0.5) if sorteio.random() < 0.4 else ('Inteira', 1.0)
+            qtd = sorteio.randint(1, 4)
+            linhas.append(json.dumps({
+                'filme': titulo,
+                'tipo': tipo,
+                'quantidade': qtd,
+                'total': precos[titulo] * fator * qtd,
+                'data': (inicio + passo * numero).strftime("%d/%m/%Y %H:%M"),
+            }, ensure_ascii=False, separators=(',', ':')))
+            if len(linhas) >= 10000:
+                f.write('\n'.join(linhas) + '\n')
+                linhas = []
+        if linhas:
+            f.write('\n'.join(linhas) + '\n')
+
+
+def semear(diretorio, vendas, semente=42):
+    """
+    Cria o diretório dados/ com catálogo, usuários e histórico sintéticos
+
+    Args:
+        diretorio: Diretório de trabalho (os arquivos vão para diretorio/dados)
+        vendas: Número de vendas no histórico
+        semente: Semente do gerador aleatório (dados reproduzíveis)
+
+    Returns:
+        Dicionário com o tamanho de cada conjunto gerado
+    """
+    sorteio = random.Random(semente)
+    qtd_filmes, qtd_usuarios = dimensionar(vendas)
+    pasta = os.path.join(diretorio, 'dados')
+    os.makedirs(pasta, exist_ok=True)
+
+    filmes = gerar_filmes(qtd_filmes, sorteio)
+    salvar_json(os.path.join(pasta, 'filmes.json'), filmes)
+    salvar_json(os.path.join(pasta, 'usuarios.json'), gerar_usuarios(qtd_usuarios))
+
+    titulos = list(filmes)
+    precos = {titulo: dados['preco'] for titulo, dados in filmes.items()}
+    gravar_vendas(os.path.join(pasta, 'historico.jsonl'), vendas, titulos, precos, sorteio)
+
+    return {'filmes': qtd_filmes, 'usuarios': qtd_usuarios, 'vendas': vendas}
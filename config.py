@@ -44,7 +44,29 @@ class Config:
     # URL base para imagens do TMDB
     # w500 = largura de 500 pixels (existem outros tamanhos: w200, w300, original)
     TMDB_IMAGE_BASE_URL = 'https://image.tmdb.org/t/p/w500'
-    
+
+    # Requisições simultâneas ao TMDB (tamanho do pool de conexões e de threads)
+    TMDB_MAX_WORKERS = int(os.getenv('TMDB_MAX_WORKERS', 8))
+
+    # Tempo limite (s) de cada requisição e novas tentativas em falhas temporárias
+    TMDB_TIMEOUT = float(os.getenv('TMDB_TIMEOUT', 10))
+    TMDB_TENTATIVAS = int(os.getenv('TMDB_TENTATIVAS', 3))
+
+    # Cache em disco das respostas do TMDB (compartilhado entre workers)
+    TMDB_CACHE_ATIVO = os.getenv('TMDB_CACHE_ATIVO', 'True') == 'True'
+    ARQUIVO_CACHE_TMDB = 'dados/cache_tmdb.db'
+    TMDB_CACHE_MAX_MB = int(os.getenv('TMDB_CACHE_MAX_MB', 50))
+
+    # Validade (s) das respostas por endpoint; vale o primeiro prefixo que casar
+    # Depois de vencida, a resposta é revalidada com If-None-Match / If-Modified-Since
+    TMDB_CACHE_TTL = {
+        'movie/now_playing': 60 * 60,       # lista muda ao longo do dia
+        'movie/popular': 60 * 60,
+        'search/movie': 6 * 60 * 60,
+        'movie/': 7 * 24 * 60 * 60,         # detalhes de um filme quase não mudam
+    }
+    TMDB_CACHE_TTL_PADRAO = 60 * 60
+
     
     # ==================== CONFIGURAÇÕES DO SISTEMA ====================
     
@@ -54,8 +76,42 @@ class Config:
     # Preço padrão dos ingressos (em reais)
     PRECO_PADRAO = 20.0
     
+    # Itens aceitos em uma compra em lote (/compras/lote)
+    MAX_ITENS_COMPRA_LOTE = 50
+
+    # Títulos aceitos de uma vez na importação em massa do TMDB (admin)
+    MAX_FILMES_IMPORTACAO = int(os.getenv('MAX_FILMES_IMPORTACAO', 500))
+
+    # Commit em grupo: compras simultâneas esperam até N ms para serem
+    # gravadas juntas (um débito de estoque e um fsync por lote). Só ajuda
+    # com workers que atendem várias requisições ao mesmo tempo (gunicorn
+    # --threads N ou -k gevent); com os workers síncronos padrão cada lote
+    # teria uma compra só, pagando a espera e um fsync forçado
+    COMMIT_GRUPO_ATIVO = os.getenv('COMMIT_GRUPO_ATIVO', 'False') == 'True'
+    COMMIT_GRUPO_ESPERA_MS = float(os.getenv('COMMIT_GRUPO_ESPERA_MS', 2))
+    COMMIT_GRUPO_MAX_ITENS = int(os.getenv('COMMIT_GRUPO_MAX_ITENS', 64))
+
+    # Checkout em duas etapas: ingressos ficam reservados por N segundos
+    # aguardando a confirmação do pagamento (0 = compra direta, sem reserva)
+    ARQUIVO_RESERVAS = 'dados/reservas.json'
+    TEMPO_RESERVA_INGRESSOS = int(os.getenv('TEMPO_RESERVA_INGRESSOS', 300))
+
+    # Sessões com assentos marcados: validade (s) da reserva de assentos
+    # antes da confirmação, máximo de assentos por reserva e por fileira da sala
+    DIRETORIO_SESSOES = 'dados/sessoes'
+    TEMPO_RESERVA_ASSENTOS = int(os.getenv('TEMPO_RESERVA_ASSENTOS', 600))
+    MAX_ASSENTOS_RESERVA = 10
+    MAX_ASSENTOS_FILEIRA = int(os.getenv('MAX_ASSENTOS_FILEIRA', 50))
+
     # Quantidade de filmes a buscar ao atualizar catálogo
     QUANTIDADE_FILMES_CATALOGO = 8
+
+    # Atualização do catálogo em segundo plano: estado compartilhado entre workers,
+    # intervalo (s) da atualização automática (0 = desligada) e tempo sem sinal
+    # de vida (s) para considerar uma execução perdida
+    ARQUIVO_ATUALIZACAO_CATALOGO = 'dados/atualizacao_catalogo.json'
+    ATUALIZACAO_CATALOGO_INTERVALO = int(os.getenv('ATUALIZACAO_CATALOGO_INTERVALO', 0))
+    ATUALIZACAO_CATALOGO_TIMEOUT = int(os.getenv('ATUALIZACAO_CATALOGO_TIMEOUT', 300))
     
     
     # ==================== CAMINHOS DE ARQUIVOS ====================
@@ -63,9 +119,56 @@ class Config:
     # Arquivo JSON com dados dos filmes
     ARQUIVO_FILMES = 'dados/filmes.json'
     
-    # Arquivo JSON com histórico de vendas
+    # Arquivo JSON com histórico de vendas (formato antigo, migrado para o diário)
     ARQUIVO_HISTORICO = 'dados/historico.json'
-    
+
+    # Diário de vendas em JSON Lines (uma venda por linha, somente acréscimo)
+    ARQUIVO_DIARIO_VENDAS = 'dados/historico.jsonl'
+
+    # fsync do diário a cada N vendas ou a cada X segundos (o que vier primeiro)
+    DIARIO_FSYNC_LOTE = int(os.getenv('DIARIO_FSYNC_LOTE', 10))
+    DIARIO_FSYNC_INTERVALO = float(os.getenv('DIARIO_FSYNC_INTERVALO', 1.0))
+
+    # Agregados de vendas (por filme e totais), atualizados a cada compra
+    ARQUIVO_RESUMO_VENDAS = 'dados/resumo_vendas.json'
+
+    # Snapshot das séries de vendas por hora/dia (gráficos do admin)
+    ARQUIVO_ANALISE_VENDAS = 'dados/analise_vendas.json'
+    ANALISE_INTERVALO_SNAPSHOT = int(os.getenv('ANALISE_INTERVALO_SNAPSHOT', 300))
+
+    # Vendas antigas arquivadas pelo comando `flask manutencao arquivar-historico`
+    # (um arquivo .jsonl.gz por mês)
+    DIRETORIO_ARQUIVO_VENDAS = 'dados/arquivo'
+
+    # Arquivo JSON com usuários
+    ARQUIVO_USUARIOS = 'dados/usuarios.json'
+
+
+    # ==================== ARMAZENAMENTO ====================
+
+    # Backend de dados: 'json' (arquivos em dados/) ou 'sqlite' (banco indexado)
+    # Na primeira execução com 'sqlite' os arquivos JSON são importados
+    BACKEND_ARMAZENAMENTO = os.getenv('BACKEND_ARMAZENAMENTO', 'json')
+
+    # Arquivo do banco SQLite
+    ARQUIVO_SQLITE = os.getenv('ARQUIVO_SQLITE', 'dados/cinema.db')
+
+    # Cache de usuários do load_user (itens por worker e validade em segundos)
+    CACHE_USUARIOS_TAMANHO = int(os.getenv('CACHE_USUARIOS_TAMANHO', 1024))
+    CACHE_USUARIOS_TTL = float(os.getenv('CACHE_USUARIOS_TTL', 30))
+
+    # Grades de filmes renderizadas guardadas por worker (página inicial e buscas)
+    CACHE_FRAGMENTOS_ITENS = int(os.getenv('CACHE_FRAGMENTOS_ITENS', 256))
+
+
+    # ==================== MÉTRICAS ====================
+
+    # Histogramas de latência (rotas, armazenamento, templates, TMDB, senhas) em /metrics
+    METRICAS_ATIVAS = os.getenv('METRICAS_ATIVAS', 'True') == 'True'
+
+    # Cabeçalho Server-Timing com o tempo de cada etapa em todas as respostas
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+
     
     # ==================== OUTRAS CONFIGURAÇÕES ====================
     
@@ -0,0 +1,121 @@
+"""
+Camada de armazenamento do Sistema de Cinema Flask
+
+Dois backends com a mesma interface:
+- 'json':   arquivos em dados/ (filmes.json, historico.jsonl, usuarios.json)
+- 'sqlite': banco indexado em modo WAL (dados/cinema.db)
+"""
+
+from utils.travas import trava_arquivo
+
+from .base import RepositorioFilmes, RepositorioVendas, RepositorioUsuarios
+from .json_repo import RepositorioFilmesJSON, RepositorioVendasJSON, RepositorioUsuariosJSON
+from .sqlite_repo import (BancoSQLite, RepositorioFilmesSQLite, RepositorioVendasSQLite,
+                          RepositorioUsuariosSQLite)
+
+
+class Repositorios:
+    """Conjunto de repositórios de um backend"""
+
+    def __init__(self, filmes, vendas, usuarios, backend):
+        self.filmes = filmes
+        self.vendas = vendas
+        self.usuarios = usuarios
+        self.backend = backend
+
+
+def criar_repositorios_json(config, catalogo_padrao=None):
+    """Repositórios sobre os arquivos JSON configurados em `config`"""
+    return Repositorios(
+        filmes=RepositorioFilmesJSON(config.ARQUIVO_FILMES, catalogo_padrao=catalogo_padrao),
+        vendas=RepositorioVendasJSON(
+            config.ARQUIVO_DIARIO_VENDAS,
+            arquivo_legado=config.ARQUIVO_HISTORICO,
+            fsync_lote=config.DIARIO_FSYNC_LOTE,
+            fsync_intervalo=config.DIARIO_FSYNC_INTERVALO,
+            arquivo_resumo=config.ARQUIVO_RESUMO_VENDAS,
+        ),
+        usuarios=RepositorioUsuariosJSON(config.ARQUIVO_USUARIOS),
+        backend='json',
+    )
+
+
+def criar_repositorios(config, catalogo_padrao=None):
+    """
+    Cria os repositórios do backend escolhido em `config.BACKEND_ARMAZENAMENTO`
+
+    Na primeira execução com SQLite, os dados existentes em dados/*.json são
+    importados automaticamente.
+
+    Args:
+        config: Classe de configuração (ver config.py)
+        catalogo_padrao: Catálogo inicial quando ainda não há filmes
+
+    Returns:
+        Repositorios
+    """
+    backend = (config.BACKEND_ARMAZENAMENTO or 'json').lower()
+
+    if backend == 'json':
+        return criar_repositorios_json(config, catalogo_padrao)
+
+    if backend != 'sqlite':
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+
+    banco = BancoSQLite(config.ARQUIVO_SQLITE)
+    repositorios = Repositorios(
+        filmes=RepositorioFilmesSQLite(banco),
+        vendas=RepositorioVendasSQLite(banco),
+        usuarios=RepositorioUsuariosSQLite(banco),
+        backend='sqlite',
+    )
+
+    # Trava evita que vários workers importem ao mesmo tempo no primeiro start
+    with trava_arquivo(f"{config.ARQUIVO_SQLITE}.lock"):
+        if banco.vazio():
+            importar_dados(criar_repositorios_json(config, catalogo_padrao), repositorios)
+
+    return repositorios
+
+
+def importar_dados(origem, destino, lote=10000):
+    """
+    Copia filmes, vendas e usuários de um conjunto de repositórios para outro
+
+    Args:
+        origem: Repositorios de onde ler (ex: JSON)
+        destino: Repositorios onde gravar (ex: SQLite)
+        lote: Quantidade de vendas gravadas por transação
+
+    Returns:
+        Dicionário com a quantidade importada de cada tipo
+    """
+    filmes = origem.filmes.carregar()
+    destino.filmes.salvar(filmes)
+
+    total_vendas = 0
+    pendentes = []
+    for venda in origem.vendas.iterar():
+        pendentes.append(venda)
+        if len(pendentes) >= lote:
+            destino.vendas.registrar_varias(pendentes)
+            total_vendas += len(pendentes)
+            pendentes = []
+    destino.vendas.registrar_varias(pendentes)
+    total_vendas += len(pendentes)
+
+    usuarios = origem.usuarios.listar()
+    for usuario in usuarios:
+        destino.usuarios.salvar_usuario(usuario)
+
+    resumo = {'filmes': len(filmes), 'vendas': total_vendas, 'usuarios': len(usuarios)}
+    print(f"✅ Dados importados para {destino.backend}: {resumo}")
+    return resumo
+
+
+__all__ = [
+    'Repositorios', 'criar_repositorios', 'criar_repositorios_json', 'importar_dados',
+    'RepositorioFilmes', 'RepositorioVendas', 'RepositorioUsuarios',
+    'RepositorioFilmesJSON', 'RepositorioVendasJSON', 'RepositorioUsuariosJSON',
+    'BancoSQLite', 'RepositorioFilmesSQLite', 'RepositorioVendasSQLite', 'RepositorioUsuariosSQLite',
+]
@@ -0,0 +1,31 @@
+"""
+Importa os arquivos dados/*.json para o banco SQLite
+
+Uso:
+    python -m repositorios
+"""
+import sys
+
+from config import Config
+from repositorios import BancoSQLite, Repositorios, RepositorioFilmesSQLite, RepositorioVendasSQLite, \
+    RepositorioUsuariosSQLite, criar_repositorios_json, importar_dados
+
+
+def main():
+    banco = BancoSQLite(Config.ARQUIVO_SQLITE)
+    if not banco.vazio():
+        print(f"❌ {Config.ARQUIVO_SQLITE} já contém dados. Remova o arquivo para reimportar.")
+        return 1
+
+    destino = Repositorios(
+        filmes=RepositorioFilmesSQLite(banco),
+        vendas=RepositorioVendasSQLite(banco),
+        usuarios=RepositorioUsuariosSQLite(banco),
+        backend='sqlite',
+    )
+    importar_dados(criar_repositorios_json(Config), destino)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
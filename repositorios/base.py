@@ -0,0 +1,305 @@
+""" Interfaces dos repositórios de dados (filmes, vendas e usuários) """
+from utils.helpers import venda_atende_filtros
+
+
+def resumo_vazio():
+    """Estrutura dos agregados de vendas"""
+    return {
+        'total_vendas': 0,
+        'total_ingressos': 0,
+        'total_arrecadado': 0.0,
+        'por_filme': {},
+    }
+
+
+def acumular_venda(resumo, venda):
+    """Soma uma venda aos agregados (in-place)"""
+    filme = venda.get('filme')
+    quantidade = venda.get('quantidade', 0)
+    total = venda.get('total', 0)
+
+    resumo['total_vendas'] += 1
+    resumo['total_ingressos'] += quantidade
+    resumo['total_arrecadado'] += total
+
+    dados = resumo['por_filme'].setdefault(
+        filme, {'vendas': 0, 'ingressos': 0, 'arrecadado': 0.0, 'meia': 0, 'inteira': 0}
+    )
+    dados['vendas'] += 1
+    dados['ingressos'] += quantidade
+    dados['arrecadado'] += total
+    if venda.get('tipo') == 'Meia':
+        dados['meia'] += quantidade
+    else:
+        dados['inteira'] += quantidade
+    return resumo
+
+
+def indexar_tmdb(filmes):
+    """{tmdb_id: titulo} de um catálogo {titulo: dados}"""
+    return {dados['tmdb_id']: titulo for titulo, dados in filmes.items() if dados.get('tmdb_id') is not None}
+
+
+class RepositorioFilmes:
+    """Catálogo de filmes no formato {titulo: dados}"""
+
+    def carregar(self):
+        """Retorna o catálogo completo"""
+        raise NotImplementedError
+
+    def salvar(self, filmes):
+        """Substitui o catálogo completo"""
+        raise NotImplementedError
+
+    def obter(self, titulo):
+        """Retorna os dados de um filme ou None"""
+        return self.carregar().get(titulo)
+
+    def indice_tmdb(self):
+        """Dicionário {tmdb_id: titulo} dos filmes vindos do TMDB (deduplicação)"""
+        return indexar_tmdb(self.carregar())
+
+    def versao(self):
+        """
+        Identificador barato da versão atual do catálogo (muda a cada escrita)
+
+        Usado para invalidar caches; None desativa o cache.
+        """
+        return None
+
+    def modificado_em(self):
+        """Data/hora (datetime UTC) da última escrita no catálogo, se conhecida"""
+        return None
+
+    def reservar(self, titulo, quantidade):
+        """
+        Debita `quantidade` do estoque de forma atômica, se houver saldo
+
+        Returns:
+            Tupla (sucesso, estoque) — estoque restante em caso de sucesso,
+            estoque disponível em caso de saldo insuficiente ou None se o
+            filme não existir
+        """
+        raise NotImplementedError
+
+    def devolver(self, titulo, quantidade):
+        """
+        Devolve `quantidade` ao estoque (reserva cancelada ou vencida)
+
+        Returns:
+            Estoque resultante ou None se o filme não existir mais
+        """
+        raise NotImplementedError
+
+    def reservar_varios(self, pedidos):
+        """
+        Processa vários pedidos independentes com uma única escrita
+
+        Cada pedido é atendido ou recusado sozinho, na ordem da lista (o
+        estoque debitado por um pedido vale para os seguintes). Usado pelo
+        commit em grupo das compras.
+
+        Args:
+            pedidos: Lista de (titulo, quantidade)
+
+        Returns:
+            Lista de (sucesso, estoque), como em reservar(), na mesma ordem
+        """
+        return [self.reservar(titulo, quantidade) for titulo, quantidade in pedidos]
+
+    def reservar_lote(self, itens):
+        """
+        Debita o estoque de vários filmes de uma vez: ou todos, ou nenhum
+
+        Args:
+            itens: Dicionário {titulo: quantidade}
+
+        Returns:
+            Tupla (sucesso, estoques) — em caso de sucesso, o estoque restante
+            de cada filme; senão, só os filmes que impediram a reserva, com o
+            estoque disponível (ou None se o filme não existir)
+        """
+        raise NotImplementedError
+
+    def alterar(self, alteracao):
+        """
+        Aplica `alteracao(catalogo) -> novo_catalogo` de forma atômica
+
+        Returns:
+            Catálogo salvo
+        """
+        raise NotImplementedError
+
+
+class RepositorioVendas:
+    """Histórico de vendas (somente acréscimo)"""
+
+    def registrar(self, venda):
+        """Registra uma venda"""
+        self.registrar_varias([venda])
+
+    def registrar_varias(self, vendas, duravel=False):
+        """
+        Registra várias vendas em uma única escrita
+
+        Args:
+            vendas: Lista de vendas
+            duravel: Só retorna depois que as vendas estiverem no disco (fsync),
+                ignorando a política de fsync em lotes do backend
+        """
+        raise NotImplementedError
+
+    def versao(self):
+        """
+        Identificador barato da versão atual do histórico (muda a cada venda)
+
+        Usado para invalidar caches; None desativa o cache.
+        """
+        return None
+
+    def geracao(self):
+        """
+        Identificador que só muda quando o histórico é reescrito (substituir,
+        compactação); acréscimos não mudam. Cursores de iterar_desde() só
+        valem dentro da mesma geração.
+        """
+        return None
+
+    def iterar(self):
+        """Gera as vendas em ordem de registro"""
+        raise NotImplementedError
+
+    def iterar_desde(self, cursor=None):
+        """
+        Gera (venda, cursor) das vendas registradas depois de `cursor`
+
+        O cursor da última venda lida retoma a leitura depois, sem reler o
+        histórico (agregados incrementais). None = desde o início.
+        """
+        for posicao, venda in enumerate(self.iterar(), start=1):
+            if cursor is None or posicao > cursor:
+                yield venda, posicao
+
+    def carregar(self):
+        """Retorna todas as vendas em uma lista"""
+        return list(self.iterar())
+
+    def substituir(self, vendas):
+        """Substitui o histórico inteiro (manutenção; aceita um gerador)"""
+        raise NotImplementedError
+
+    def compactar(self):
+        """
+        Reorganiza o armazenamento do histórico (manutenção)
+
+        Returns:
+            Quantidade de vendas mantidas
+        """
+        return sum(1 for _ in self.iterar())
+
+    def listar(self, filme=None, tipo=None, inicio=None, fim=None, cursor=None, limite=50):
+        """
+        Uma página do histórico, em ordem de registro, com filtros
+
+        Args:
+            filme: Título exato do filme
+            tipo: 'Meia' ou 'Inteira'
+            inicio: Epoch inicial (inclusivo)
+            fim: Epoch final (exclusivo)
+            cursor: Valor opaco retornado pela página anterior (None = início)
+            limite: Tamanho máximo da página
+
+        Returns:
+            Tupla (vendas, proximo_cursor) — proximo_cursor é None na última página
+        """
+        pular = int(cursor) if cursor else 0
+        if pular < 0:
+            raise ValueError(f"Cursor inválido: {cursor}")
+        vendas = []
+        vistos = 0
+        for venda in self.iterar():
+            if not venda_atende_filtros(venda, filme, tipo, inicio, fim):
+                continue
+            vistos += 1
+            if vistos <= pular:
+                continue
+            vendas.append(venda)
+            if len(vendas) == limite:
+                return vendas, str(vistos)
+        return vendas, None
+
+    def iterar_filtrado(self, filme=None, tipo=None, inicio=None, fim=None, pagina=1000):
+        """
+        Gera as vendas que passam nos filtros (mesmos de listar), em ordem
+
+        Percorre as páginas de listar() pelo cursor: só uma página fica em
+        memória e cada backend usa os próprios atalhos (busca pela data no
+        diário, índices no SQLite). Usado pela exportação.
+        """
+        cursor = None
+        while True:
+            vendas, cursor = self.listar(filme, tipo, inicio, fim, cursor=cursor, limite=pagina)
+            yield from vendas
+            if cursor is None:
+                return
+
+    def resumo(self):
+        """
+        Agregados de vendas: totais gerais e, por filme, vendas, ingressos,
+        valor arrecadado e divisão meia/inteira (ver resumo_vazio)
+        """
+        resumo = resumo_vazio()
+        for venda in self.iterar():
+            acumular_venda(resumo, venda)
+        return resumo
+
+    def reconstruir_resumo(self):
+        """Recalcula os agregados a partir do histórico completo"""
+        return self.resumo()
+
+
+class RepositorioUsuarios:
+    """Usuários no formato {id: dados}"""
+
+    def carregar(self):
+        """Retorna todos os usuários"""
+        raise NotImplementedError
+
+    def obter(self, user_id):
+        """Busca usuário pelo ID"""
+        return self.carregar().get(str(user_id))
+
+    def obter_por_login(self, login):
+        """Busca usuário pelo nome de usuário ou email (sem diferenciar maiúsculas)"""
+        login = login.lower()
+        for dados in self.carregar().values():
+            if dados['username'].lower() == login or dados['email'].lower() == login:
+                return dados
+        return None
+
+    def existe_username(self, username):
+        username = username.lower()
+        return any(u['username'].lower() == username for u in self.carregar().values())
+
+    def existe_email(self, email):
+        email = email.lower()
+        return any(u['email'].lower() == email for u in self.carregar().values())
+
+    def tem_admin(self):
+        return any(u.get('role') == 'admin' for u in self.carregar().values())
+
+    def listar(self):
+        return list(self.carregar().values())
+
+    def inserir(self, dados):
+        """
+        Insere um novo usuário gerando o ID
+
+        Returns:
+            ID gerado ou None se username/email já existirem
+        """
+        raise NotImplementedError
+
+    def salvar_usuario(self, dados):
+        """Insere ou atualiza um usuário mantendo o ID de `dados`"""
+        raise NotImplementedError
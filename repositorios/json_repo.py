@@ -0,0 +1,314 @@
+""" Repositórios sobre os arquivos JSON em dados/ """
+import copy
+import os
+import time
+from datetime import datetime, timezone
+
+from repositorios.base import (RepositorioFilmes, RepositorioVendas, RepositorioUsuarios,
+                               resumo_vazio, acumular_venda)
+from utils.cache import CacheVersionado
+from utils.diario import DiarioVendas
+from utils.helpers import carregar_json, salvar_json, timestamp_venda, venda_atende_filtros
+from utils.travas import trava_arquivo
+
+
+class RepositorioFilmesJSON(RepositorioFilmes):
+    """Catálogo em dados/filmes.json, com escrita sob trava entre processos"""
+
+    def __init__(self, arquivo='dados/filmes.json', catalogo_padrao=None):
+        self.arquivo = arquivo
+        self.arquivo_trava = f"{arquivo}.lock"
+        self.catalogo_padrao = catalogo_padrao or {}
+
+    def carregar(self):
+        if not os.path.exists(self.arquivo):
+            return copy.deepcopy(self.catalogo_padrao)
+        return carregar_json(self.arquivo, {})
+
+    def versao(self):
+        # salvar_json troca o arquivo com os.replace: o inode muda a cada escrita
+        try:
+            info = os.stat(self.arquivo)
+        except FileNotFoundError:
+            return 'padrao'
+        return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+    def modificado_em(self):
+        try:
+            return datetime.fromtimestamp(os.stat(self.arquivo).st_mtime, timezone.utc)
+        except FileNotFoundError:
+            return None
+
+    def salvar(self, filmes):
+        self.alterar(lambda _: filmes)
+
+    def reservar(self, titulo, quantidade):
+        with trava_arquivo(self.arquivo_trava):
+            filmes = self.carregar()
+            if titulo not in filmes:
+                return False, None
+
+            disponivel = filmes[titulo]["estoque"]
+            if disponivel < quantidade:
+                return False, disponivel
+
+            filmes[titulo]["estoque"] = disponivel - quantidade
+            salvar_json(self.arquivo, filmes)
+
+        return True, disponivel - quantidade
+
+    def devolver(self, titulo, quantidade):
+        with trava_arquivo(self.arquivo_trava):
+            filmes = self.carregar()
+            if titulo not in filmes:
+                return None
+            filmes[titulo]["estoque"] += quantidade
+            salvar_json(self.arquivo, filmes)
+        return filmes[titulo]["estoque"]
+
+    def reservar_varios(self, pedidos):
+        resultados = []
+        with trava_arquivo(self.arquivo_trava):
+            filmes = self.carregar()
+            for titulo, quantidade in pedidos:
+                if titulo not in filmes:
+                    resultados.append((False, None))
+                    continue
+                disponivel = filmes[titulo]["estoque"]
+                if disponivel < quantidade:
+                    resultados.append((False, disponivel))
+                    continue
+                filmes[titulo]["estoque"] = disponivel - quantidade
+                resultados.append((True, disponivel - quantidade))
+
+            if any(sucesso for sucesso, _ in resultados):
+                salvar_json(self.arquivo, filmes)
+        return resultados
+
+    def reservar_lote(self, itens):
+        with trava_arquivo(self.arquivo_trava):
+            filmes = self.carregar()
+            faltando = {
+                titulo: filmes[titulo]["estoque"] if titulo in filmes else None
+                for titulo, quantidade in itens.items()
+                if titulo not in filmes or filmes[titulo]["estoque"] < quantidade
+            }
+            if faltando:
+                return False, faltando
+
+            for titulo, quantidade in itens.items():
+                filmes[titulo]["estoque"] -= quantidade
+            salvar_json(self.arquivo, filmes)
+
+        return True, {titulo: filmes[titulo]["estoque"] for titulo in itens}
+
+    def alterar(self, alteracao):
+        with trava_arquivo(self.arquivo_trava):
+            filmes = alteracao(self.carregar())
+            salvar_json(self.arquivo, filmes)
+        return filmes
+
+
+class RepositorioVendasJSON(RepositorioVendas):
+    """
+    Histórico no diário JSON Lines (dados/historico.jsonl)
+
+    Os agregados ficam em um arquivo à parte junto com a posição (byte) do
+    diário até onde já foram somados; cada atualização só lê as vendas
+    anexadas depois dessa posição.
+    """
+
+    def __init__(self, arquivo='dados/historico.jsonl', arquivo_legado=None,
+                 fsync_lote=1, fsync_intervalo=0.0, arquivo_resumo=None):
+        self.diario = DiarioVendas(arquivo, arquivo_legado=arquivo_legado,
+                                   fsync_lote=fsync_lote, fsync_intervalo=fsync_intervalo)
+        self.arquivo_resumo = arquivo_resumo or f"{os.path.splitext(arquivo)[0]}_resumo.json"
+        self.arquivo_trava = f"{self.arquivo_resumo}.lock"
+
+    def registrar_varias(self, vendas, duravel=False):
+        # Grava o instante (epoch) junto da data: análises por hora não reinterpretam a string
+        vendas = [venda if venda.get('timestamp') is not None
+                  else dict(venda, timestamp=timestamp_venda(venda) or int(time.time()))
+                  for venda in vendas]
+        self.diario.anexar_varias(vendas, sincronizar=duravel)
+        self._atualizar_resumo()
+
+    def versao(self):
+        # Acréscimos mudam o tamanho; reescritas (os.replace) mudam o inode
+        return self.diario.identidade()
+
+    def geracao(self):
+        # Reescritas trocam o arquivo (os.replace): o inode muda
+        return self.diario.identidade()[0]
+
+    def iterar(self):
+        return self.diario.iterar()
+
+    def iterar_desde(self, cursor=None):
+        return self.diario.iterar_desde(cursor or 0)
+
+    def substituir(self, vendas):
+        self.diario.reescrever(vendas)
+        self.reconstruir_resumo()
+
+    def compactar(self):
+        # Descarta linhas corrompidas (append interrompido)
+        mantidas = self.diario.compactar()
+        self.reconstruir_resumo()
+        return mantidas
+
+    def listar(self, filme=None, tipo=None, inicio=None, fim=None, cursor=None, limite=50):
+        # O cursor é a posição (byte) no diário: cada página custa O(página)
+        posicao = int(cursor) if cursor else 0
+        if not 0 <= posicao <= self.diario.identidade()[1]:
+            raise ValueError(f"Cursor fora do histórico: {cursor}")
+        if not cursor and inicio is not None:
+            # Vendas são anexadas em ordem cronológica: busca binária pela data
+            posicao = self.diario.buscar_posicao(timestamp_venda, inicio)
+
+        vendas = []
+        for venda, final in self.diario.iterar_desde(posicao):
+            instante = timestamp_venda(venda) if fim is not None else None
+            if instante is not None and instante >= fim:
+                break
+            if not venda_atende_filtros(venda, filme, tipo, inicio, fim):
+                continue
+            vendas.append(venda)
+            if len(vendas) == limite:
+                return vendas, str(final)
+        return vendas, None
+
+    def resumo(self):
+        inode, tamanho = self.diario.identidade()
+        dados = carregar_json(self.arquivo_resumo, None)
+        if dados and dados.get('inode') == inode and dados.get('posicao') == tamanho:
+            return dados['resumo']
+        return self._atualizar_resumo()
+
+    def reconstruir_resumo(self):
+        with trava_arquivo(self.arquivo_trava):
+            if os.path.exists(self.arquivo_resumo):
+                os.remove(self.arquivo_resumo)
+        return self._atualizar_resumo()
+
+    def _atualizar_resumo(self):
+        """Soma ao resumo salvo as vendas anexadas desde a última atualização"""
+        with trava_arquivo(self.arquivo_trava):
+            inode, tamanho = self.diario.identidade()
+            dados = carregar_json(self.arquivo_resumo, None)
+
+            # Diário reescrito (ou resumo inexistente): recomeça do início
+            if not dados or dados.get('inode') != inode or dados.get('posicao', 0) > tamanho:
+                dados = {'inode': inode, 'posicao': 0, 'resumo': resumo_vazio()}
+
+            posicao = dados['posicao']
+            if posicao == tamanho:
+                return dados['resumo']
+
+            for venda, posicao in self.diario.iterar_desde(posicao):
+                acumular_venda(dados['resumo'], venda)
+
+            dados['posicao'] = posicao
+            salvar_json(self.arquivo_resumo, dados)
+            return dados['resumo']
+
+
+class RepositorioUsuariosJSON(RepositorioUsuarios):
+    """
+    Usuários em dados/usuarios.json
+
+    Mantém em memória um índice por id, username e email (minúsculos),
+    recarregado apenas quando o arquivo muda e atualizado no lugar a cada
+    escrita deste processo. Login, registro e o load_user do Flask-Login
+    viram consultas O(1) em dicionários.
+    """
+
+    def __init__(self, arquivo='dados/usuarios.json'):
+        self.arquivo = arquivo
+        self.arquivo_trava = f"{arquivo}.lock"
+        if not os.path.exists(arquivo):
+            salvar_json(arquivo, {})
+        self._cache = CacheVersionado(self._montar_indice, self._versao)
+
+    def _versao(self):
+        try:
+            info = os.stat(self.arquivo)
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+    def _montar_indice(self):
+        usuarios = carregar_json(self.arquivo, {})
+        ids = [int(uid) for uid in usuarios if uid.isdigit()]
+        return {
+            'usuarios': usuarios,
+            'por_username': {u['username'].lower(): u for u in usuarios.values()},
+            'por_email': {u['email'].lower(): u for u in usuarios.values()},
+            'maior_id': max(ids) if ids else 0,
+        }
+
+    def _indice(self):
+        return self._cache.obter()
+
+    def carregar(self):
+        return dict(self._indice()['usuarios'])
+
+    def obter(self, user_id):
+        return self._indice()['usuarios'].get(str(user_id))
+
+    def obter_por_login(self, login):
+        indice = self._indice()
+        login = login.lower()
+        return indice['por_username'].get(login) or indice['por_email'].get(login)
+
+    def existe_username(self, username):
+        return username.lower() in self._indice()['por_username']
+
+    def existe_email(self, email):
+        return email.lower() in self._indice()['por_email']
+
+    def tem_admin(self):
+        return any(u.get('role') == 'admin' for u in self._indice()['usuarios'].values())
+
+    def listar(self):
+        return list(self._indice()['usuarios'].values())
+
+    def inserir(self, dados):
+        with trava_arquivo(self.arquivo_trava):
+            indice = self._indice()
+            if (dados['username'].lower() in indice['por_username']
+                    or dados['email'].lower() in indice['por_email']):
+                return None
+
+            novo_id = str(indice['maior_id'] + 1)
+            self._gravar(indice, dict(dados, id=novo_id))
+        return novo_id
+
+    def salvar_usuario(self, dados):
+        with trava_arquivo(self.arquivo_trava):
+            self._gravar(self._indice(), dados)
+
+    def _gravar(self, indice, dados):
+        """Grava o arquivo e atualiza o índice (chamar com a trava adquirida)"""
+        user_id = str(dados['id'])
+        anterior = indice['usuarios'].get(user_id)
+
+        usuarios = dict(indice['usuarios'])
+        usuarios[user_id] = dados
+        salvar_json(self.arquivo, usuarios)
+
+        por_username = dict(indice['por_username'])
+        por_email = dict(indice['por_email'])
+        if anterior:
+            por_username.pop(anterior['username'].lower(), None)
+            por_email.pop(anterior['email'].lower(), None)
+        por_username[dados['username'].lower()] = dados
+        por_email[dados['email'].lower()] = dados
+
+        maior_id = max(indice['maior_id'], int(user_id)) if user_id.isdigit() else indice['maior_id']
+        self._cache.atualizar({
+            'usuarios': usuarios,
+            'por_username': por_username,
+            'por_email': por_email,
+            'maior_id': maior_id,
+        }, self._versao())
@@ -0,0 +1,495 @@
+""" Repositórios sobre um banco SQLite indexado (modo WAL) """
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from repositorios.base import RepositorioFilmes, RepositorioVendas, RepositorioUsuarios, resumo_vazio
+from utils.helpers import timestamp_venda
+from utils.metricas import metricas
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS filmes (
+    titulo  TEXT PRIMARY KEY,
+    estoque INTEGER NOT NULL,
+    preco   REAL NOT NULL,
+    tmdb_id INTEGER,
+    dados   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_filmes_tmdb_id ON filmes (tmdb_id);
+
+-- Contadores de versão, incrementados por gatilhos a cada escrita
+CREATE TABLE IF NOT EXISTS versoes (
+    nome  TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO versoes (nome, valor) VALUES ('filmes', 0);
+INSERT OR IGNORE INTO versoes (nome, valor) VALUES ('vendas', 0);
+INSERT OR IGNORE INTO versoes (nome, valor) VALUES ('vendas_geracao', 0);
+CREATE TRIGGER IF NOT EXISTS trg_filmes_insert AFTER INSERT ON filmes
+BEGIN UPDATE versoes SET valor = valor + 1 WHERE nome = 'filmes'; END;
+CREATE TRIGGER IF NOT EXISTS trg_filmes_update AFTER UPDATE ON filmes
+BEGIN UPDATE versoes SET valor = valor + 1 WHERE nome = 'filmes'; END;
+CREATE TRIGGER IF NOT EXISTS trg_filmes_delete AFTER DELETE ON filmes
+BEGIN UPDATE versoes SET valor = valor + 1 WHERE nome = 'filmes'; END;
+
+CREATE TABLE IF NOT EXISTS vendas (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    filme      TEXT NOT NULL,
+    tipo       TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    total      REAL NOT NULL,
+    data       TEXT NOT NULL,
+    extras     TEXT,
+    timestamp  INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_vendas_filme ON vendas (filme);
+
+-- Agregados por filme, mantidos pelo gatilho a cada venda inserida
+CREATE TABLE IF NOT EXISTS resumo_filmes (
+    filme      TEXT PRIMARY KEY,
+    vendas     INTEGER NOT NULL DEFAULT 0,
+    ingressos  INTEGER NOT NULL DEFAULT 0,
+    arrecadado REAL NOT NULL DEFAULT 0,
+    meia       INTEGER NOT NULL DEFAULT 0,
+    inteira    INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS trg_vendas_resumo AFTER INSERT ON vendas
+BEGIN
+    INSERT INTO resumo_filmes (filme, vendas, ingressos, arrecadado, meia, inteira)
+    VALUES (NEW.filme, 1, NEW.quantidade, NEW.total,
+            CASE WHEN NEW.tipo = 'Meia' THEN NEW.quantidade ELSE 0 END,
+            CASE WHEN NEW.tipo = 'Meia' THEN 0 ELSE NEW.quantidade END)
+    ON CONFLICT (filme) DO UPDATE SET
+        vendas = vendas + 1,
+        ingressos = ingressos + excluded.ingressos,
+        arrecadado = arrecadado + excluded.arrecadado,
+        meia = meia + excluded.meia,
+        inteira = inteira + excluded.inteira;
+END;
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id            TEXT PRIMARY KEY,
+    username      TEXT NOT NULL,
+    email         TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    role          TEXT NOT NULL DEFAULT 'user',
+    created_at    TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_usuarios_username ON usuarios (lower(username));
+CREATE UNIQUE INDEX IF NOT EXISTS idx_usuarios_email ON usuarios (lower(email));
+"""
+
+CAMPOS_VENDA = ('filme', 'tipo', 'quantidade', 'total', 'data')
+
+SQL_INSERIR_VENDA = (
+    "INSERT INTO vendas (filme, tipo, quantidade, total, data, extras, timestamp) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Versão das vendas: incrementada uma vez por escrita (não por linha, como um gatilho faria)
+SQL_VERSAO_VENDAS = "UPDATE versoes SET valor = valor + 1 WHERE nome = 'vendas'"
+
+# Criados depois da migração de colunas (bancos antigos não têm `timestamp`)
+INDICES_VENDAS = """
+CREATE INDEX IF NOT EXISTS idx_vendas_timestamp ON vendas (timestamp);
+CREATE INDEX IF NOT EXISTS idx_vendas_filme_timestamp ON vendas (filme, timestamp);
+"""
+
+
+class BancoSQLite:
+    """Conexões SQLite (uma por thread) compartilhadas pelos repositórios"""
+
+    def __init__(self, arquivo='dados/cinema.db'):
+        self.arquivo = arquivo
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(arquivo) or '.', exist_ok=True)
+        con = self.conexao()
+        con.executescript(ESQUEMA)
+        self._migrar(con)
+        con.executescript(INDICES_VENDAS)
+
+    @staticmethod
+    def _colunas(con, tabela):
+        return {linha["name"] for linha in con.execute(f"PRAGMA table_info({tabela})")}
+
+    def _migrar(self, con):
+        """
+        Adiciona colunas novas em bancos criados por versões anteriores
+
+        Vários workers do gunicorn podem iniciar juntos: a migração roda numa
+        transação BEGIN IMMEDIATE e confere o esquema de novo sob a trava,
+        então só o primeiro altera a tabela.
+        """
+        if "timestamp" in self._colunas(con, "vendas"):
+            return
+        with self.transacao() as con:
+            if "timestamp" in self._colunas(con, "vendas"):
+                return
+            con.execute("ALTER TABLE vendas ADD COLUMN timestamp INTEGER")
+            linhas = con.execute("SELECT id, data FROM vendas").fetchall()
+            con.executemany(
+                "UPDATE vendas SET timestamp = ? WHERE id = ?",
+                [(timestamp_venda({"data": linha["data"]}), linha["id"]) for linha in linhas],
+            )
+
+    def vazio(self):
+        """True se o banco ainda não tem filmes, vendas nem usuários"""
+        con = self.conexao()
+        return not any(
+            con.execute(f"SELECT 1 FROM {tabela} LIMIT 1").fetchone()
+            for tabela in ('filmes', 'vendas', 'usuarios')
+        )
+
+    def conexao(self):
+        """Conexão da thread atual (criada sob demanda)"""
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            # isolation_level=None: transações controladas explicitamente
+            con = sqlite3.connect(self.arquivo, timeout=30, isolation_level=None)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def versao(self, nome):
+        """Valor atual do contador de versão `nome` (tabela versoes)"""
+        linha = self.conexao().execute("SELECT valor FROM versoes WHERE nome = ?", (nome,)).fetchone()
+        return linha[0] if linha else None
+
+    @contextmanager
+    def transacao(self):
+        """
+        Transação de escrita (BEGIN IMMEDIATE)
+
+        Adquire a trava de escrita do banco logo no início, então duas
+        compras concorrentes nunca leem o mesmo estoque para depois debitar.
+        """
+        con = self.conexao()
+        with metricas.medir('armazenamento', 'transacao_sqlite'):
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+
+
+class RepositorioFilmesSQLite(RepositorioFilmes):
+    """Catálogo na tabela `filmes`"""
+
+    def __init__(self, banco):
+        self.banco = banco
+
+    @staticmethod
+    def _para_dict(linha):
+        filme = {"estoque": linha["estoque"], "preco": linha["preco"]}
+        filme.update(json.loads(linha["dados"]))
+        return filme
+
+    @staticmethod
+    def _para_linha(titulo, dados):
+        extras = {k: v for k, v in dados.items() if k not in ("estoque", "preco")}
+        return (titulo, dados["estoque"], dados["preco"], dados.get("tmdb_id"),
+                json.dumps(extras, ensure_ascii=False))
+
+    def _carregar(self, con):
+        linhas = con.execute("SELECT titulo, estoque, preco, dados FROM filmes ORDER BY rowid")
+        return {linha["titulo"]: self._para_dict(linha) for linha in linhas}
+
+    def carregar(self):
+        return self._carregar(self.banco.conexao())
+
+    def indice_tmdb(self):
+        # Só a coluna indexada: não desserializa os dados de cada filme
+        linhas = self.banco.conexao().execute(
+            "SELECT tmdb_id, titulo FROM filmes WHERE tmdb_id IS NOT NULL"
+        )
+        return {linha["tmdb_id"]: linha["titulo"] for linha in linhas}
+
+    def versao(self):
+        return self.banco.versao('filmes')
+
+    def obter(self, titulo):
+        linha = self.banco.conexao().execute(
+            "SELECT titulo, estoque, preco, dados FROM filmes WHERE titulo = ?", (titulo,)
+        ).fetchone()
+        return self._para_dict(linha) if linha else None
+
+    def salvar(self, filmes):
+        self.alterar(lambda _: filmes)
+
+    def _gravar(self, con, atuais, filmes):
+        """Grava apenas os filmes alterados e remove os que saíram do catálogo"""
+        removidos = [(titulo,) for titulo in atuais if titulo not in filmes]
+        alterados = [self._para_linha(titulo, dados) for titulo, dados in filmes.items()
+                     if atuais.get(titulo) != dados]
+        con.executemany("DELETE FROM filmes WHERE titulo = ?", removidos)
+        con.executemany(
+            "INSERT INTO filmes (titulo, estoque, preco, tmdb_id, dados) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (titulo) DO UPDATE SET estoque = excluded.estoque, preco = excluded.preco, "
+            "tmdb_id = excluded.tmdb_id, dados = excluded.dados",
+            alterados,
+        )
+
+    def reservar(self, titulo, quantidade):
+        with self.banco.transacao() as con:
+            linha = con.execute("SELECT estoque FROM filmes WHERE titulo = ?", (titulo,)).fetchone()
+            if linha is None:
+                return False, None
+            if linha["estoque"] < quantidade:
+                return False, linha["estoque"]
+            con.execute("UPDATE filmes SET estoque = estoque - ? WHERE titulo = ?", (quantidade, titulo))
+        return True, linha["estoque"] - quantidade
+
+    def devolver(self, titulo, quantidade):
+        with self.banco.transacao() as con:
+            con.execute("UPDATE filmes SET estoque = estoque + ? WHERE titulo = ?", (quantidade, titulo))
+            linha = con.execute("SELECT estoque FROM filmes WHERE titulo = ?", (titulo,)).fetchone()
+        return linha["estoque"] if linha else None
+
+    def reservar_varios(self, pedidos):
+        resultados = []
+        with self.banco.transacao() as con:
+            for titulo, quantidade in pedidos:
+                linha = con.execute("SELECT estoque FROM filmes WHERE titulo = ?", (titulo,)).fetchone()
+                if linha is None:
+                    resultados.append((False, None))
+                elif linha["estoque"] < quantidade:
+                    resultados.append((False, linha["estoque"]))
+                else:
+                    con.execute("UPDATE filmes SET estoque = estoque - ? WHERE titulo = ?", (quantidade, titulo))
+                    resultados.append((True, linha["estoque"] - quantidade))
+        return resultados
+
+    def reservar_lote(self, itens):
+        with self.banco.transacao() as con:
+            estoques = {}
+            for titulo in itens:
+                linha = con.execute("SELECT estoque FROM filmes WHERE titulo = ?", (titulo,)).fetchone()
+                estoques[titulo] = linha["estoque"] if linha else None
+
+            faltando = {
+                titulo: estoque for titulo, estoque in estoques.items()
+                if estoque is None or estoque < itens[titulo]
+            }
+            if faltando:
+                return False, faltando
+
+            con.executemany(
+                "UPDATE filmes SET estoque = estoque - ? WHERE titulo = ?",
+                [(quantidade, titulo) for titulo, quantidade in itens.items()],
+            )
+        return True, {titulo: estoques[titulo] - itens[titulo] for titulo in itens}
+
+    def alterar(self, alteracao):
+        with self.banco.transacao() as con:
+            atuais = self._carregar(con)
+            # alteracao() pode modificar o dicionário recebido; compara com uma cópia
+            filmes = alteracao(json.loads(json.dumps(atuais)))
+            self._gravar(con, atuais, filmes)
+        return filmes
+
+
+class RepositorioVendasSQLite(RepositorioVendas):
+    """Histórico na tabela `vendas`"""
+
+    def __init__(self, banco):
+        self.banco = banco
+        # Bancos criados antes da tabela de resumo: calcula uma vez
+        con = banco.conexao()
+        if (con.execute("SELECT 1 FROM vendas LIMIT 1").fetchone()
+                and not con.execute("SELECT 1 FROM resumo_filmes LIMIT 1").fetchone()):
+            self.reconstruir_resumo()
+
+    @staticmethod
+    def _para_linha(venda):
+        extras = {k: v for k, v in venda.items() if k not in CAMPOS_VENDA and k != 'timestamp'}
+        return tuple(venda.get(campo) for campo in CAMPOS_VENDA) + (
+            json.dumps(extras, ensure_ascii=False) if extras else None,
+            timestamp_venda(venda),
+        )
+
+    @staticmethod
+    def _para_dict(linha):
+        venda = {campo: linha[campo] for campo in CAMPOS_VENDA}
+        if linha["extras"]:
+            venda.update(json.loads(linha["extras"]))
+        return venda
+
+    def registrar_varias(self, vendas, duravel=False):
+        # O commit da transação já é durável
+        if not vendas:
+            return
+        with self.banco.transacao() as con:
+            con.executemany(
+                SQL_INSERIR_VENDA,
+                [self._para_linha(venda) for venda in vendas],
+            )
+            con.execute(SQL_VERSAO_VENDAS)
+
+    def versao(self):
+        return self.banco.versao('vendas')
+
+    def geracao(self):
+        return self.banco.versao('vendas_geracao')
+
+    def iterar(self):
+        cursor = self.banco.conexao().execute(
+            "SELECT filme, tipo, quantidade, total, data, extras FROM vendas ORDER BY id"
+        )
+        for linha in cursor:
+            yield self._para_dict(linha)
+
+    def iterar_desde(self, cursor=None):
+        # O id é AUTOINCREMENT: nunca reaproveitado, serve de cursor
+        linhas = self.banco.conexao().execute(
+            "SELECT id, filme, tipo, quantidade, total, data, extras, timestamp FROM vendas "
+            "WHERE id > ? ORDER BY id",
+            (cursor or 0,),
+        )
+        for linha in linhas:
+            venda = self._para_dict(linha)
+            if linha["timestamp"] is not None:
+                venda["timestamp"] = linha["timestamp"]
+            yield venda, linha["id"]
+
+    def substituir(self, vendas):
+        # Converte antes do DELETE: `vendas` pode ser um gerador lendo esta tabela
+        linhas = [self._para_linha(venda) for venda in vendas]
+        with self.banco.transacao() as con:
+            con.execute("DELETE FROM vendas")
+            con.execute("DELETE FROM resumo_filmes")
+            con.execute("UPDATE versoes SET valor = valor + 1 WHERE nome = 'vendas_geracao'")
+            con.executemany(SQL_INSERIR_VENDA, linhas)
+            con.execute(SQL_VERSAO_VENDAS)
+
+    def compactar(self):
+        # Devolve ao sistema as páginas livres (ex: depois de arquivar vendas)
+        con = self.banco.conexao()
+        con.execute("VACUUM")
+        return con.execute("SELECT COUNT(*) FROM vendas").fetchone()[0]
+
+    def listar(self, filme=None, tipo=None, inicio=None, fim=None, cursor=None, limite=50):
+        # Paginação por chave (id > cursor) usando os índices de filme e timestamp
+        condicoes = ["id > ?"]
+        parametros = [int(cursor) if cursor else 0]
+        if parametros[0] < 0:
+            raise ValueError(f"Cursor inválido: {cursor}")
+        if filme:
+            condicoes.append("filme = ?")
+            parametros.append(filme)
+        if tipo:
+            condicoes.append("tipo = ?")
+            parametros.append(tipo)
+        if inicio is not None:
+            condicoes.append("timestamp >= ?")
+            parametros.append(inicio)
+        if fim is not None:
+            condicoes.append("timestamp < ?")
+            parametros.append(fim)
+
+        linhas = self.banco.conexao().execute(
+            "SELECT id, filme, tipo, quantidade, total, data, extras, timestamp FROM vendas "
+            f"WHERE {' AND '.join(condicoes)} ORDER BY id LIMIT ?",
+            parametros + [limite],
+        ).fetchall()
+
+        vendas = []
+        for linha in linhas:
+            venda = self._para_dict(linha)
+            if linha["timestamp"] is not None:
+                venda["timestamp"] = linha["timestamp"]
+            vendas.append(venda)
+        proximo = str(linhas[-1]["id"]) if len(linhas) == limite else None
+        return vendas, proximo
+
+    def resumo(self):
+        resumo = resumo_vazio()
+        linhas = self.banco.conexao().execute(
+            "SELECT filme, vendas, ingressos, arrecadado, meia, inteira FROM resumo_filmes"
+        )
+        for linha in linhas:
+            dados = dict(linha)
+            filme = dados.pop('filme')
+            resumo['por_filme'][filme] = dados
+            resumo['total_vendas'] += dados['vendas']
+            resumo['total_ingressos'] += dados['ingressos']
+            resumo['total_arrecadado'] += dados['arrecadado']
+        return resumo
+
+    def reconstruir_resumo(self):
+        with self.banco.transacao() as con:
+            con.execute("DELETE FROM resumo_filmes")
+            con.execute(
+                "INSERT INTO resumo_filmes (filme, vendas, ingressos, arrecadado, meia, inteira) "
+                "SELECT filme, COUNT(*), SUM(quantidade), SUM(total), "
+                "SUM(CASE WHEN tipo = 'Meia' THEN quantidade ELSE 0 END), "
+                "SUM(CASE WHEN tipo = 'Meia' THEN 0 ELSE quantidade END) "
+                "FROM vendas GROUP BY filme"
+            )
+        return self.resumo()
+
+
+class RepositorioUsuariosSQLite(RepositorioUsuarios):
+    """Usuários na tabela `usuarios` (índices únicos em username/email)"""
+
+    def __init__(self, banco):
+        self.banco = banco
+
+    def _consultar_um(self, sql, parametros):
+        linha = self.banco.conexao().execute(sql, parametros).fetchone()
+        return dict(linha) if linha else None
+
+    def carregar(self):
+        linhas = self.banco.conexao().execute("SELECT * FROM usuarios ORDER BY rowid")
+        return {linha["id"]: dict(linha) for linha in linhas}
+
+    def obter(self, user_id):
+        return self._consultar_um("SELECT * FROM usuarios WHERE id = ?", (str(user_id),))
+
+    def obter_por_login(self, login):
+        return self._consultar_um(
+            "SELECT * FROM usuarios WHERE lower(username) = lower(?) OR lower(email) = lower(?)",
+            (login, login),
+        )
+
+    def existe_username(self, username):
+        return self._consultar_um(
+            "SELECT id FROM usuarios WHERE lower(username) = lower(?)", (username,)) is not None
+
+    def existe_email(self, email):
+        return self._consultar_um(
+            "SELECT id FROM usuarios WHERE lower(email) = lower(?)", (email,)) is not None
+
+    def tem_admin(self):
+        return self._consultar_um("SELECT id FROM usuarios WHERE role = 'admin' LIMIT 1", ()) is not None
+
+    def inserir(self, dados):
+        try:
+            with self.banco.transacao() as con:
+                ids = con.execute(
+                    "SELECT MAX(CAST(id AS INTEGER)) FROM usuarios WHERE id GLOB '[0-9]*'"
+                ).fetchone()[0]
+                novo_id = str((ids or 0) + 1)
+                self._gravar(con, dict(dados, id=novo_id))
+        except sqlite3.IntegrityError:
+            return None
+        return novo_id
+
+    def salvar_usuario(self, dados):
+        with self.banco.transacao() as con:
+            self._gravar(con, dados)
+
+    def _gravar(self, con, dados):
+        con.execute(
+            "INSERT INTO usuarios (id, username, email, password_hash, role, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET username = excluded.username, email = excluded.email, "
+            "password_hash = excluded.password_hash, role = excluded.role, created_at = excluded.created_at",
+            (str(dados['id']), dados['username'], dados['email'], dados['password_hash'],
+             dados.get('role') or 'user', dados.get('created_at')),
+        )
@@ -4,5 +4,13 @@ Pacote de serviços do Sistema de Cinema Flask
 
 from .tmdb_service import TMDBService
 from .auth_service import AuthService, User
+from .estoque_service import EstoqueService
+from .atualizacao_service import AtualizacaoCatalogoService
+from .sessao_service import SessaoService
+from .reserva_service import ReservaService
+from .analise_service import AnaliseVendasService
+from .catalogo_service import CatalogoService
+from .arquivo_service import ArquivoVendasService
 
-__all__ = ['TMDBService', 'AuthService', 'User']
\ No newline at end of file
+__all__ = ['TMDBService', 'AuthService', 'User', 'EstoqueService', 'AtualizacaoCatalogoService', 'SessaoService',
+           'ReservaService', 'AnaliseVendasService', 'CatalogoService', 'ArquivoVendasService']
\ No newline at end of file
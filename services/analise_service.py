@@ -0,0 +1,328 @@
+"""
+Serviço de Análise de Vendas - Sistema de Cinema
+Receita por dia/semana e horários de pico sem reler o histórico
+"""
+
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from utils.helpers import carregar_json, salvar_json, timestamp_venda
+from utils.series_temporais import SerieTemporal
+from utils.travas import trava_arquivo
+
+# Colunas da série global por hora e das séries diárias de cada filme
+COLUNAS_HORA = {'vendas': 'q', 'inteira': 'q', 'meia': 'q', 'receita_inteira': 'd', 'receita_meia': 'd'}
+COLUNAS_DIA_FILME = {'vendas': 'q', 'inteira': 'q', 'meia': 'q', 'receita': 'd'}
+
+DIAS_SEMANA = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
+
+# Vendas fora desta janela (data corrompida, relógio errado) ficam fora da
+# análise: as colunas são densas, então uma venda em 1970 ou em 2999 estenderia
+# as séries até o balde dela (milhões de posições zeradas)
+INSTANTE_MINIMO = int(datetime(2000, 1, 1).timestamp())
+MARGEM_FUTURO = 86400
+
+# Versão do formato do arquivo de snapshot (muda se as colunas mudarem)
+VERSAO_SNAPSHOT = 1
+
+
+class AnaliseVendasService:
+    """
+    Agregados de vendas por tempo, mantidos de forma incremental
+
+    Duas estruturas em colunas (utils.series_temporais):
+    - uma série global por hora (epoch // 3600) com vendas, ingressos e
+      receita de inteira e meia;
+    - uma série por dia (data local) para cada filme.
+    Semanas e horários de pico são derivados delas na consulta.
+
+    `sincronizar` lê só as vendas registradas depois do último cursor do
+    repositório; se o histórico foi reescrito (outra geração), recomeça do
+    zero. Um snapshot em arquivo evita reler milhões de vendas ao iniciar
+    um worker.
+    """
+
+    def __init__(self, repositorio, arquivo='dados/analise_vendas.json', intervalo_snapshot=300):
+        """
+        Args:
+            repositorio: RepositorioVendas
+            arquivo: Snapshot dos agregados (None = só em memória)
+            intervalo_snapshot: Tempo mínimo (s) entre duas gravações do snapshot
+        """
+        self.repositorio = repositorio
+        self.arquivo = arquivo
+        self.intervalo_snapshot = intervalo_snapshot
+        self._lock = threading.Lock()
+        self._ultimo_snapshot = 0.0
+        self._carregado = False
+        self._zerar(None)
+
+    def _zerar(self, geracao):
+        self._geracao = geracao
+        self._cursor = None
+        self._versao = None
+        self._total = 0
+        self._descartadas = 0
+        self._pendentes = 0
+        self._horas = SerieTemporal(COLUNAS_HORA)
+        self._filmes = {}
+
+    # ================== SINCRONIZAÇÃO ==================
+
+    def sincronizar(self):
+        """
+        Soma as vendas registradas desde a última chamada
+
+        Returns:
+            Quantidade de vendas lidas
+        """
+        versao = self.repositorio.versao()
+        if versao is not None and versao == self._versao:
+            return 0
+
+        with self._lock:
+            if versao is not None and versao == self._versao:
+                return 0
+
+            geracao = self.repositorio.geracao()
+            if not self._carregado:
+                self._carregado = True
+                self._carregar_snapshot(geracao)
+            if geracao != self._geracao:
+                self._zerar(geracao)
+
+            lidas = 0
+            descartadas = self._descartadas
+            cursor = self._cursor
+            for venda, cursor in self.repositorio.iterar_desde(self._cursor):
+                self._acumular(venda)
+                lidas += 1
+            if self._descartadas > descartadas:
+                print(f"⚠️ {self._descartadas - descartadas} vendas fora do período da análise "
+                      f"ignoradas (data antes de 2000 ou no futuro)")
+            self._cursor = cursor
+            self._versao = versao
+            self._total += lidas
+            self._pendentes += lidas
+
+            if self._pendentes and time.monotonic() - self._ultimo_snapshot >= self.intervalo_snapshot:
+                self._salvar_snapshot()
+            return lidas
+
+    def _acumular(self, venda):
+        instante = timestamp_venda(venda)
+        if instante is None:
+            return
+        if not INSTANTE_MINIMO <= instante <= time.time() + MARGEM_FUTURO:
+            # Só conta: sincronizar() mostra um resumo por leitura
+            self._descartadas += 1
+            return
+
+        quantidade = venda.get('quantidade', 0)
+        total = venda.get('total', 0)
+        meia = venda.get('tipo') == 'Meia'
+
+        if meia:
+            self._horas.somar(instante // 3600, vendas=1, meia=quantidade, receita_meia=total)
+        else:
+            self._horas.somar(instante // 3600, vendas=1, inteira=quantidade, receita_inteira=total)
+
+        serie = self._filmes.get(venda.get('filme'))
+        if serie is None:
+            serie = self._filmes[venda.get('filme')] = SerieTemporal(COLUNAS_DIA_FILME)
+        dia = date.fromtimestamp(instante).toordinal()
+        if meia:
+            serie.somar(dia, vendas=1, meia=quantidade, receita=total)
+        else:
+            serie.somar(dia, vendas=1, inteira=quantidade, receita=total)
+
+    # ================== SNAPSHOT ==================
+
+    def _carregar_snapshot(self, geracao):
+        if not self.arquivo or not os.path.exists(self.arquivo):
+            return
+        dados = carregar_json(self.arquivo, {})
+        if dados.get('versao') != VERSAO_SNAPSHOT or dados.get('geracao') != geracao:
+            return
+        try:
+            horas = SerieTemporal.importar(COLUNAS_HORA, dados['horas'])
+            filmes = {filme: SerieTemporal.importar(COLUNAS_DIA_FILME, serie)
+                      for filme, serie in dados['filmes'].items()}
+        except (KeyError, TypeError, ValueError):
+            print(f"Snapshot de análise inválido em {self.arquivo}. Recalculando.")
+            return
+        self._geracao = geracao
+        self._cursor = dados['cursor']
+        self._total = dados['total']
+        self._descartadas = dados.get('descartadas', 0)
+        self._horas = horas
+        self._filmes = filmes
+
+    def _salvar_snapshot(self):
+        """Grava os agregados e o cursor (chamar com o lock adquirido)"""
+        self._ultimo_snapshot = time.monotonic()
+        self._pendentes = 0
+        if not self.arquivo:
+            return
+        dados = {
+            'versao': VERSAO_SNAPSHOT,
+            'geracao': self._geracao,
+            'cursor': self._cursor,
+            'total': self._total,
+            'descartadas': self._descartadas,
+            'horas': self._horas.exportar(),
+            'filmes': {filme: serie.exportar() for filme, serie in self._filmes.items()},
+        }
+        with trava_arquivo(self.arquivo + '.lock'):
+            # Outro worker pode ter gravado um snapshot mais adiantado
+            atual = carregar_json(self.arquivo, {}) if os.path.exists(self.arquivo) else {}
+            if atual.get('geracao') == self._geracao and (atual.get('total') or 0) > self._total:
+                return
+            salvar_json(self.arquivo, dados)
+
+    # ================== CONSULTAS ==================
+
+    def _dias(self, dias, hoje):
+        hoje = hoje or date.today()
+        return hoje.toordinal() - dias + 1, hoje.toordinal()
+
+    def receita_por_dia(self, dias=30, filme=None, hoje=None):
+        """
+        Vendas, ingressos e receita de cada um dos últimos `dias` dias
+
+        Args:
+            dias: Tamanho da janela (termina hoje)
+            filme: Título para filtrar (None = todos)
+            hoje: Último dia da janela (padrão: hoje)
+
+        Returns:
+            Lista de dicionários {data, vendas, ingressos, receita}, do mais antigo ao mais novo
+        """
+        self.sincronizar()
+        primeiro, ultimo = self._dias(dias, hoje)
+
+        with self._lock:
+            if filme is not None:
+                serie = self._filmes.get(filme)
+                colunas = (serie.intervalo(primeiro, ultimo) if serie
+                           else SerieTemporal(COLUNAS_DIA_FILME).intervalo(primeiro, ultimo))
+                receitas = colunas['receita']
+            else:
+                colunas = self._intervalo_diario_global(primeiro, ultimo)
+                receitas = [a + b for a, b in zip(colunas['receita_inteira'], colunas['receita_meia'])]
+
+        return [
+            {
+                'data': date.fromordinal(primeiro + i).strftime('%d/%m/%Y'),
+                'vendas': colunas['vendas'][i],
+                'ingressos': colunas['inteira'][i] + colunas['meia'][i],
+                'receita': round(receitas[i], 2),
+            }
+            for i in range(ultimo - primeiro + 1)
+        ]
+
+    @staticmethod
+    def _hora_meia_noite(dia):
+        """Balde de hora (epoch // 3600) da meia-noite local do dia (ordinal)"""
+        return int(datetime.combine(date.fromordinal(dia), datetime.min.time()).timestamp()) // 3600
+
+    def _intervalo_diario_global(self, primeiro, ultimo):
+        """Soma os baldes de hora de cada dia local (dias de 23/25 h no horário de verão)"""
+        limites = [self._hora_meia_noite(dia) for dia in range(primeiro, ultimo + 2)]
+        base = limites[0]
+        horas = self._horas.intervalo(base, limites[-1] - 1)
+        return {
+            nome: [sum(valores[de - base:ate - base]) for de, ate in zip(limites, limites[1:])]
+            for nome, valores in horas.items()
+        }
+
+    def _janela_horas(self, dias):
+        """Colunas por hora dos últimos `dias` dias (None = tudo); retorna (primeiro balde, colunas)"""
+        ultimo = max(int(time.time()) // 3600, self._horas.fim or 0)
+        if dias:
+            primeiro = int(time.time()) // 3600 - dias * 24
+        else:
+            primeiro = self._horas.inicio if self._horas.inicio is not None else ultimo
+        return primeiro, self._horas.intervalo(primeiro, ultimo)
+
+    def receita_por_semana(self, semanas=12, filme=None, hoje=None):
+        """
+        Mesmos totais de receita_por_dia agrupados por semana (segunda a domingo)
+
+        Returns:
+            Lista de dicionários {semana (data da segunda-feira), vendas, ingressos, receita}
+        """
+        hoje = hoje or date.today()
+        domingo = hoje + timedelta(days=6 - hoje.weekday())
+        dias = self.receita_por_dia(semanas * 7, filme=filme, hoje=domingo)
+
+        resultado = []
+        for i in range(0, len(dias), 7):
+            semana = dias[i:i + 7]
+            resultado.append({
+                'semana': semana[0]['data'],
+                'vendas': sum(d['vendas'] for d in semana),
+                'ingressos': sum(d['ingressos'] for d in semana),
+                'receita': round(sum(d['receita'] for d in semana), 2),
+            })
+        return resultado
+
+    def horarios_pico(self, dias=None):
+        """
+        Ingressos por hora do dia e por dia da semana (hora local)
+
+        Args:
+            dias: Considera só os últimos N dias (None = todo o histórico)
+
+        Returns:
+            Dicionário com 'por_hora' (24 valores), 'matriz' (7 x 24, segunda
+            primeiro), 'dias_semana' e 'pico' {dia_semana, hora, ingressos}
+        """
+        self.sincronizar()
+        with self._lock:
+            inicio, colunas = self._janela_horas(dias)
+
+        matriz = [[0] * 24 for _ in range(7)]
+        for posicao, (inteira, meia) in enumerate(zip(colunas['inteira'], colunas['meia'])):
+            if inteira or meia:
+                local = time.localtime((inicio + posicao) * 3600)
+                matriz[local.tm_wday][local.tm_hour] += inteira + meia
+
+        por_hora = [sum(matriz[d][h] for d in range(7)) for h in range(24)]
+        pico = max(((d, h) for d in range(7) for h in range(24)), key=lambda p: matriz[p[0]][p[1]])
+        return {
+            'por_hora': por_hora,
+            'matriz': matriz,
+            'dias_semana': DIAS_SEMANA,
+            'pico': {
+                'dia_semana': DIAS_SEMANA[pico[0]],
+                'hora': pico[1],
+                'ingressos': matriz[pico[0]][pico[1]],
+            },
+        }
+
+    def por_tipo(self, dias=None):
+        """Ingressos e receita de inteira e meia (últimos N dias ou tudo)"""
+        self.sincronizar()
+        with self._lock:
+            _, colunas = self._janela_horas(dias)
+
+        totais = {nome: sum(valores) for nome, valores in colunas.items()}
+        return {
+            'inteira': {'ingressos': totais['inteira'], 'receita': round(totais['receita_inteira'], 2)},
+            'meia': {'ingressos': totais['meia'], 'receita': round(totais['receita_meia'], 2)},
+        }
+
+    def estatisticas(self):
+        """Tamanho das estruturas (monitoramento)"""
+        self.sincronizar()
+        with self._lock:
+            return {
+                'vendas': self._total,
+                'descartadas': self._descartadas,
+                'horas': len(self._horas),
+                'filmes': len(self._filmes),
+                'dias_filmes': sum(len(serie) for serie in self._filmes.values()),
+            }
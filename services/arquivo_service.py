@@ -0,0 +1,146 @@
+"""
+Serviço de Arquivo de Vendas - Sistema de Cinema
+Move vendas antigas do histórico para arquivos mensais comprimidos
+"""
+
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime
+
+from utils.helpers import timestamp_venda
+
+# Nome dos segmentos: um arquivo por mês da venda
+PREFIXO_SEGMENTO = 'vendas-'
+SUFIXO_SEGMENTO = '.jsonl.gz'
+
+
+class ArquivoVendasService:
+    """
+    Arquivamento do histórico de vendas em segmentos .jsonl.gz por mês
+
+    As vendas anteriores à data de corte são gravadas nos segmentos (cada
+    execução acrescenta um membro gzip ao segmento do mês, que continua
+    legível com `gzip.open` / `zcat`) e só depois o histórico é reescrito
+    sem elas. Se algo falhar no meio, o pior caso é uma venda repetida no
+    arquivo, nunca uma venda perdida.
+
+    Deve rodar com a aplicação parada (manutenção): a reescrita do
+    histórico não vê vendas registradas por outros processos durante a
+    operação.
+    """
+
+    def __init__(self, repositorio, diretorio='dados/arquivo'):
+        """
+        Args:
+            repositorio: RepositorioVendas
+            diretorio: Onde ficam os segmentos
+        """
+        self.repositorio = repositorio
+        self.diretorio = diretorio
+
+    def _caminho(self, mes):
+        return os.path.join(self.diretorio, f"{PREFIXO_SEGMENTO}{mes}{SUFIXO_SEGMENTO}")
+
+    def arquivar(self, ate):
+        """
+        Arquiva as vendas anteriores a `ate`
+
+        Args:
+            ate: Epoch de corte (exclusivo); vendas sem data válida ficam no histórico
+
+        Returns:
+            Tupla (sucesso, mensagem, relatorio) — relatorio com 'arquivadas',
+            'mantidas' e 'segmentos' {mes: vendas}
+        """
+        os.makedirs(self.diretorio, exist_ok=True)
+        segmentos = {}
+        escritores = {}
+        try:
+            # 1ª passada: grava as vendas antigas em temporários, mês a mês
+            for venda in self.repositorio.iterar():
+                instante = timestamp_venda(venda)
+                if instante is None or instante >= ate:
+                    continue
+                mes = datetime.fromtimestamp(instante).strftime('%Y-%m')
+                if mes not in escritores:
+                    escritores[mes] = self._abrir_temporario(mes)
+                escritores[mes][1].write(json.dumps(venda, ensure_ascii=False, separators=(',', ':')) + '\n')
+                segmentos[mes] = segmentos.get(mes, 0) + 1
+        except BaseException:
+            for mes, (bruto, texto) in escritores.items():
+                texto.close()
+                bruto.close()
+                os.remove(self._caminho(mes) + '.tmp')
+            raise
+
+        if not segmentos:
+            return True, "Nenhuma venda anterior à data de corte", \
+                {'arquivadas': 0, 'mantidas': None, 'segmentos': {}}
+
+        # Segmentos duráveis antes de tirar as vendas do histórico
+        for mes, (bruto, texto) in escritores.items():
+            texto.close()  # fecha o membro gzip; o arquivo bruto continua aberto
+            bruto.flush()
+            os.fsync(bruto.fileno())
+            bruto.close()
+            os.replace(self._caminho(mes) + '.tmp', self._caminho(mes))
+
+        # 2ª passada: reescreve o histórico só com as vendas mantidas
+        mantidas = 0
+
+        def restantes():
+            nonlocal mantidas
+            for venda in self.repositorio.iterar():
+                instante = timestamp_venda(venda)
+                if instante is None or instante >= ate:
+                    mantidas += 1
+                    yield venda
+
+        self.repositorio.substituir(restantes())
+        arquivadas = sum(segmentos.values())
+        return True, f"✅ {arquivadas} vendas arquivadas em {len(segmentos)} segmentos", {
+            'arquivadas': arquivadas,
+            'mantidas': mantidas,
+            'segmentos': dict(sorted(segmentos.items())),
+        }
+
+    def _abrir_temporario(self, mes):
+        """
+        Cópia do segmento do mês (se existir) + novo membro gzip para esta execução
+
+        Membros gzip concatenados formam um arquivo gzip válido: as vendas
+        de execuções anteriores não precisam ser descomprimidas.
+
+        Returns:
+            Tupla (arquivo bruto, escrita de texto comprimida)
+        """
+        temporario = self._caminho(mes) + '.tmp'
+        bruto = open(temporario, 'wb')
+        if os.path.exists(self._caminho(mes)):
+            with open(self._caminho(mes), 'rb') as atual:
+                shutil.copyfileobj(atual, bruto)
+        return bruto, gzip.open(bruto, 'wt', encoding='utf-8')
+
+    def segmentos(self):
+        """Segmentos existentes: lista de (mes, caminho, bytes), do mais antigo ao mais novo"""
+        if not os.path.isdir(self.diretorio):
+            return []
+        resultado = []
+        for nome in sorted(os.listdir(self.diretorio)):
+            if nome.startswith(PREFIXO_SEGMENTO) and nome.endswith(SUFIXO_SEGMENTO):
+                caminho = os.path.join(self.diretorio, nome)
+                mes = nome[len(PREFIXO_SEGMENTO):-len(SUFIXO_SEGMENTO)]
+                resultado.append((mes, caminho, os.path.getsize(caminho)))
+        return resultado
+
+    def iterar_segmento(self, mes):
+        """Gera as vendas arquivadas de um mês (AAAA-MM)"""
+        caminho = self._caminho(mes)
+        if not os.path.exists(caminho):
+            return
+        with gzip.open(caminho, 'rt', encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
@@ -0,0 +1,183 @@
+"""
+Serviço de Atualização do Catálogo - Sistema de Cinema
+Atualização via TMDB em segundo plano, fora da requisição HTTP
+"""
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from utils.helpers import carregar_json, salvar_json
+from utils.travas import trava_arquivo
+
+# Estados possíveis de uma atualização
+OCIOSO = 'ocioso'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+
+
+def estado_inicial():
+    """Estado de quando nenhuma atualização foi executada ainda"""
+    return {
+        'estado': OCIOSO,
+        'id': None,
+        'origem': None,
+        'pid': None,
+        'iniciado_em': None,
+        'iniciado_ts': None,
+        'concluido_em': None,
+        'sinal_vida': None,
+        'feitos': 0,
+        'total': 0,
+        'mensagem': '',
+    }
+
+
+class AtualizacaoCatalogoService:
+    """
+    Executa a atualização do catálogo numa thread em segundo plano
+
+    O estado da atualização fica num arquivo JSON compartilhado (sob trava de
+    arquivo), então todos os workers do gunicorn enxergam o mesmo progresso e
+    um pedido feito enquanto outra atualização está em andamento, em qualquer
+    worker, é descartado. Uma atualização sem sinal de vida há mais de
+    `timeout` segundos (worker morto) deixa de bloquear novos pedidos.
+    """
+
+    def __init__(self, executar, arquivo_estado, timeout=300):
+        """
+        Args:
+            executar: Função executar(progresso) -> (sucesso, mensagem);
+                      progresso(feitos, total) informa o andamento
+            arquivo_estado: Arquivo JSON com o estado da atualização
+            timeout: Segundos sem sinal de vida para considerar a execução perdida
+        """
+        self.executar = executar
+        self.arquivo_estado = arquivo_estado
+        self.arquivo_trava = arquivo_estado + '.lock'
+        self.timeout = timeout
+        self._agendador = None
+
+    # ================== ESTADO ==================
+
+    def _ler(self):
+        estado = estado_inicial()
+        estado.update(carregar_json(self.arquivo_estado, {}))
+        return estado
+
+    def _em_andamento(self, estado):
+        if estado['estado'] != EXECUTANDO:
+            return False
+        return time.time() - (estado['sinal_vida'] or 0) < self.timeout
+
+    def _atualizar(self, id_execucao, **campos):
+        """Grava campos no estado, se a execução ainda for a atual"""
+        with trava_arquivo(self.arquivo_trava):
+            estado = self._ler()
+            if estado['id'] != id_execucao:
+                return
+            estado.update(campos, sinal_vida=time.time())
+            salvar_json(self.arquivo_estado, estado)
+
+    def status(self):
+        """
+        Estado atual da atualização (para o painel admin)
+
+        Returns:
+            Dicionário com estado, progresso (feitos/total/percentual) e mensagem
+        """
+        estado = self._ler()
+        if estado['estado'] == EXECUTANDO and not self._em_andamento(estado):
+            estado['estado'] = ERRO
+            estado['mensagem'] = 'Atualização interrompida (sem sinal de vida)'
+
+        total = estado['total']
+        estado['percentual'] = round(100 * estado['feitos'] / total) if total else 0
+        estado['em_andamento'] = estado['estado'] == EXECUTANDO
+        return estado
+
+    # ================== EXECUÇÃO ==================
+
+    def enfileirar(self, origem='admin', intervalo_minimo=None):
+        """
+        Inicia uma atualização em segundo plano, se nenhuma estiver em andamento
+
+        Args:
+            origem: Quem pediu ('admin', 'agendada', ...)
+            intervalo_minimo: Se informado, só inicia se a última atualização
+                              tiver começado há pelo menos esses segundos
+
+        Returns:
+            Tupla (iniciada, mensagem, estado)
+        """
+        with trava_arquivo(self.arquivo_trava):
+            estado = self._ler()
+            if self._em_andamento(estado):
+                return False, "ℹ️ Já existe uma atualização do catálogo em andamento.", estado
+
+            agora = time.time()
+            if intervalo_minimo and agora - (estado['iniciado_ts'] or 0) < intervalo_minimo:
+                return False, "ℹ️ O catálogo foi atualizado recentemente.", estado
+
+            estado = estado_inicial()
+            estado.update(
+                estado=EXECUTANDO,
+                id=uuid.uuid4().hex,
+                origem=origem,
+                pid=os.getpid(),
+                iniciado_em=datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+                iniciado_ts=agora,
+                sinal_vida=agora,
+                mensagem='Buscando filmes no TMDB...',
+            )
+            salvar_json(self.arquivo_estado, estado)
+
+        thread = threading.Thread(
+            target=self._rodar, args=(estado['id'],), name='atualizacao-catalogo', daemon=True
+        )
+        thread.start()
+        return True, "🔄 Atualização do catálogo iniciada em segundo plano.", estado
+
+    def _rodar(self, id_execucao):
+        def progresso(feitos, total):
+            self._atualizar(id_execucao, feitos=feitos, total=total,
+                            mensagem=f'Processando filmes ({feitos}/{total})...')
+
+        try:
+            sucesso, mensagem = self.executar(progresso)
+        except Exception as e:
+            sucesso, mensagem = False, f"Erro ao atualizar catálogo: {e}"
+
+        self._atualizar(
+            id_execucao,
+            estado=CONCLUIDO if sucesso else ERRO,
+            mensagem=mensagem,
+            concluido_em=datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        )
+
+    # ================== AGENDAMENTO ==================
+
+    def agendar(self, intervalo):
+        """
+        Dispara atualizações periódicas a cada `intervalo` segundos
+
+        Pode ser chamado em todos os workers: o intervalo é contado a partir da
+        última atualização registrada no arquivo de estado (conferido sob a
+        trava), então só um deles dispara cada rodada.
+        """
+        if intervalo <= 0 or self._agendador is not None:
+            return
+
+        def laco():
+            while True:
+                time.sleep(min(intervalo, 60))
+                try:
+                    self.enfileirar(origem='agendada', intervalo_minimo=intervalo)
+                except Exception as e:
+                    print(f"❌ Erro no agendamento da atualização do catálogo: {e}")
+
+        self._agendador = threading.Thread(target=laco, name='agendador-catalogo', daemon=True)
+        self._agendador.start()
@@ -4,15 +4,37 @@ Autor: Cauã Costa
 Data: 28/10/2025
 """
 
-import json
-import os
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_login import UserMixin
 
+from repositorios.json_repo import RepositorioUsuariosJSON
+from utils.cache import CacheLRU
+from utils.metricas import metricas
 
-class User(UserMixin):
-    """Classe de usuário para Flask-Login"""
+
+def gerar_hash_senha(senha):
+    """generate_password_hash medido (o hash é caro de propósito)"""
+    with metricas.medir('senha', 'gerar_hash'):
+        return generate_password_hash(senha)
+
+
+def verificar_senha(password_hash, senha):
+    """check_password_hash medido"""
+    with metricas.medir('senha', 'verificar'):
+        return check_password_hash(password_hash, senha)
+
+
+class User:
+    """
+    Classe de usuário para Flask-Login
+
+    Define direto os membros do UserMixin (is_authenticated, is_active,
+    is_anonymous, get_id): o UserMixin não tem __slots__ e daria um
+    __dict__ a cada instância. Assim os objetos em cache ficam só com os
+    campos abaixo.
+    """
+    
+    __slots__ = ('id', 'username', 'email', 'password_hash', 'role', 'created_at')
     
     def __init__(self, id, username, email, password_hash, role='user', created_at=None):
         self.id = id
@@ -22,9 +44,32 @@ class User(UserMixin):
         self.role = role
         self.created_at = created_at or datetime.now().strftime("%d/%m/%Y %H:%M")
     
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_active(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def get_id(self):
+        return str(self.id)
+
+    def __eq__(self, other):
+        if isinstance(other, User):
+            return self.get_id() == other.get_id()
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.get_id())
+
     def check_password(self, password):
         """Verifica se a senha está correta"""
-        return check_password_hash(self.password_hash, password)
+        return verificar_senha(self.password_hash, password)
     
     def is_admin(self):
         """Verifica se o usuário é administrador"""
@@ -45,60 +90,38 @@ class User(UserMixin):
 class AuthService:
     """Serviço de gerenciamento de autenticação"""
     
-    def __init__(self, arquivo_usuarios='dados/usuarios.json'):
+    def __init__(self, arquivo_usuarios='dados/usuarios.json', repositorio=None,
+                 cache_tamanho=1024, cache_ttl=30):
         self.arquivo_usuarios = arquivo_usuarios
-        self._garantir_arquivo_existe()
+        self.repositorio = repositorio or RepositorioUsuariosJSON(arquivo_usuarios)
+        # Usuários já montados para o load_user de cada requisição autenticada.
+        # TTL curto: mudanças feitas por outros workers aparecem em até cache_ttl segundos
+        self.cache_usuarios = CacheLRU(max_itens=cache_tamanho, ttl=cache_ttl)
         self._criar_admin_padrao()
     
-    def _garantir_arquivo_existe(self):
-        """Garante que o arquivo de usuários existe"""
-        os.makedirs('dados', exist_ok=True)
-        if not os.path.exists(self.arquivo_usuarios):
-            with open(self.arquivo_usuarios, 'w', encoding='utf-8') as f:
-                json.dump({}, f, indent=2, ensure_ascii=False)
-    
     def _criar_admin_padrao(self):
         """Cria usuário admin padrão se não existir"""
-        usuarios = self._carregar_usuarios()
-        tem_admin = any(u.get('role') == 'admin' for u in usuarios.values())
-        
-        if not tem_admin:
+        if not self.repositorio.tem_admin():
             admin = {
                 'id': '1',
                 'username': 'admin',
                 'email': 'admin@cinema.com',
-                'password_hash': generate_password_hash('admin123'),
+                'password_hash': gerar_hash_senha('admin123'),
                 'role': 'admin',
                 'created_at': datetime.now().strftime("%d/%m/%Y %H:%M")
             }
-            usuarios['1'] = admin
-            self._salvar_usuarios(usuarios)
+            self.repositorio.salvar_usuario(admin)
             print("✅ Usuário admin padrão criado (username: admin, senha: admin123)")
     
-    def _carregar_usuarios(self):
-        """Carrega usuários do arquivo JSON"""
-        try:
-            with open(self.arquivo_usuarios, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-    
-    def _salvar_usuarios(self, usuarios):
-        """Salva usuários no arquivo JSON"""
-        with open(self.arquivo_usuarios, 'w', encoding='utf-8') as f:
-            json.dump(usuarios, f, indent=2, ensure_ascii=False)
-    
-    def _gerar_novo_id(self, usuarios):
-        """Gera um novo ID único para usuário"""
-        if not usuarios:
-            return '1'
-        ids = [int(uid) for uid in usuarios.keys() if uid.isdigit()]
-        return str(max(ids) + 1) if ids else '1'
+    @staticmethod
+    def _criar_user(usuario_data):
+        """Monta um User a partir do dicionário armazenado"""
+        return User(id=usuario_data['id'], username=usuario_data['username'], email=usuario_data['email'],
+                   password_hash=usuario_data['password_hash'], role=usuario_data['role'],
+                   created_at=usuario_data.get('created_at'))
     
     def registrar_usuario(self, username, email, password, role='user'):
         """Registra um novo usuário"""
-        usuarios = self._carregar_usuarios()
-        
         if len(username) < 3:
             return False, "Nome de usuário deve ter pelo menos 3 caracteres", None
         if len(password) < 6:
@@ -106,52 +129,45 @@ class AuthService:
         if '@' not in email or '.' not in email:
             return False, "Email inválido", None
         
-        for user_data in usuarios.values():
-            if user_data['username'].lower() == username.lower():
-                return False, "Nome de usuário já existe", None
-            if user_data['email'].lower() == email.lower():
-                return False, "Email já cadastrado", None
+        if self.repositorio.existe_username(username):
+            return False, "Nome de usuário já existe", None
+        if self.repositorio.existe_email(email):
+            return False, "Email já cadastrado", None
         
-        novo_id = self._gerar_novo_id(usuarios)
-        password_hash = generate_password_hash(password)
-        novo_usuario = User(id=novo_id, username=username, email=email, password_hash=password_hash, role=role)
-        usuarios[novo_id] = novo_usuario.to_dict()
-        self._salvar_usuarios(usuarios)
+        password_hash = gerar_hash_senha(password)
+        novo_usuario = User(id=None, username=username, email=email, password_hash=password_hash, role=role)
+        novo_id = self.repositorio.inserir(novo_usuario.to_dict())
+        if novo_id is None:
+            return False, "Nome de usuário ou email já cadastrado", None
+        novo_usuario.id = novo_id
         
         return True, "Usuário registrado com sucesso!", novo_usuario
     
     def autenticar_usuario(self, username, password):
         """Autentica um usuário"""
-        usuarios = self._carregar_usuarios()
-        usuario_data = None
-        
-        for user_data in usuarios.values():
-            if (user_data['username'].lower() == username.lower() or user_data['email'].lower() == username.lower()):
-                usuario_data = user_data
-                break
+        usuario_data = self.repositorio.obter_por_login(username)
         
         if not usuario_data:
             return False, "Usuário não encontrado", None
-        if not check_password_hash(usuario_data['password_hash'], password):
+        if not verificar_senha(usuario_data['password_hash'], password):
             return False, "Senha incorreta", None
         
-        user = User(id=usuario_data['id'], username=usuario_data['username'], email=usuario_data['email'],
-                   password_hash=usuario_data['password_hash'], role=usuario_data['role'],
-                   created_at=usuario_data.get('created_at'))
-        return True, "Login realizado com sucesso!", user
+        return True, "Login realizado com sucesso!", self._criar_user(usuario_data)
     
     def buscar_usuario_por_id(self, user_id):
-        """Busca usuário por ID"""
-        usuarios = self._carregar_usuarios()
-        usuario_data = usuarios.get(str(user_id))
+        """Busca usuário por ID (com cache LRU/TTL)"""
+        user_id = str(user_id)
+        user = self.cache_usuarios.obter(user_id)
+        if user is not None:
+            return user
+        
+        usuario_data = self.repositorio.obter(user_id)
         if not usuario_data:
             return None
-        return User(id=usuario_data['id'], username=usuario_data['username'], email=usuario_data['email'],
-                   password_hash=usuario_data['password_hash'], role=usuario_data['role'],
-                   created_at=usuario_data.get('created_at'))
+        user = self._criar_user(usuario_data)
+        self.cache_usuarios.definir(user_id, user)
+        return user
     
     def listar_usuarios(self):
         """Lista todos os usuários"""
-        usuarios = self._carregar_usuarios()
-        return [User(id=u['id'], username=u['username'], email=u['email'], password_hash=u['password_hash'],
-                    role=u['role'], created_at=u.get('created_at')) for u in usuarios.values()]
\ No newline at end of file
+        return [self._criar_user(u) for u in self.repositorio.listar()]
@@ -0,0 +1,308 @@
+"""
+Serviço de Catálogo - Sistema de Cinema
+Operações em massa no catálogo (importação, estoque e preços) com uma única escrita
+"""
+
+import csv
+import json
+import os
+
+from config import Config
+from repositorios.base import indexar_tmdb
+
+# Campos aceitos na importação e a conversão de cada um (CSV chega como texto)
+CAMPOS_FILME = {
+    'estoque': int,
+    'preco': float,
+    'ano': int,
+    'genero': str,
+    'imagem': str,
+    'sinopse': str,
+    'nota': float,
+    'tmdb_id': int,
+}
+
+# Problemas listados na mensagem de um ajuste recusado
+MAX_PROBLEMAS = 10
+
+
+class _AlteracaoCancelada(Exception):
+    """Interrompe alterar_catalogo sem gravar nada"""
+
+
+class CatalogoService:
+    """
+    Alterações em massa no catálogo
+
+    Cada operação valida tudo antes e aplica as mudanças numa única chamada
+    de `estoque_service.alterar_catalogo` (uma escrita do filmes.json ou uma
+    transação no SQLite), sob a mesma trava das compras. Se algum item for
+    inválido, nada é gravado.
+    """
+
+    def __init__(self, estoque_service, tmdb_service=None):
+        self.estoque_service = estoque_service
+        self.tmdb_service = tmdb_service
+
+    # ================== IMPORTAÇÃO ==================
+
+    def importar(self, registros, sobrescrever=True):
+        """
+        Inclui ou atualiza vários filmes de uma vez
+
+        Args:
+            registros: Lista de dicionários com 'titulo' e os campos do filme
+                (ver ler_arquivo_filmes)
+            sobrescrever: Atualiza os campos informados dos filmes que já
+                existem; se False, filmes existentes são ignorados
+
+        Returns:
+            Tupla (sucesso, mensagem, relatorio) — relatorio com as listas
+            'adicionados', 'atualizados' e 'ignorados'
+        """
+        if not registros:
+            return False, "⚠️ Nenhum filme para importar.", None
+
+        relatorio = {'adicionados': [], 'atualizados': [], 'ignorados': []}
+
+        def aplicar(filmes):
+            for registro in registros:
+                titulo = registro['titulo']
+                campos = {k: v for k, v in registro.items() if k != 'titulo'}
+                if titulo not in filmes:
+                    filmes[titulo] = {**filme_padrao(), **campos}
+                    relatorio['adicionados'].append(titulo)
+                elif sobrescrever:
+                    filmes[titulo] = {**filmes[titulo], **campos}
+                    relatorio['atualizados'].append(titulo)
+                else:
+                    relatorio['ignorados'].append(titulo)
+            return filmes
+
+        self.estoque_service.alterar_catalogo(aplicar)
+        return True, (f"✅ {len(relatorio['adicionados'])} filmes adicionados, "
+                      f"{len(relatorio['atualizados'])} atualizados, "
+                      f"{len(relatorio['ignorados'])} ignorados"), relatorio
+
+    def importar_tmdb(self, entradas, progresso=None):
+        """
+        Adiciona vários filmes do TMDB por título ou ID, sem duplicar
+
+        1. Resolve os títulos em IDs do TMDB (buscas em paralelo);
+        2. descarta IDs já presentes no catálogo (índice por tmdb_id, não
+           pelo título exibido) ou repetidos na própria lista;
+        3. busca os detalhes só dos IDs novos (em paralelo);
+        4. grava todos de uma vez.
+
+        Args:
+            entradas: Títulos ou IDs (inteiros ou "tmdb:603")
+            progresso: Função opcional progresso(feitos, total) da etapa de detalhes
+
+        Returns:
+            Tupla (sucesso, mensagem, relatorio) — relatorio com 'adicionados'
+            (títulos), 'existentes' ({entrada: título no catálogo}),
+            'repetidos' e 'nao_encontrados' (entradas)
+        """
+        if not self.tmdb_service:
+            return False, "API do TMDB não está configurada!", None
+        entradas = [e for e in entradas if str(e).strip()]
+        if not entradas:
+            return False, "⚠️ Nenhum título informado.", None
+
+        relatorio = {'adicionados': [], 'existentes': {}, 'repetidos': [], 'nao_encontrados': []}
+        indice = self.estoque_service.repositorio.indice_tmdb()
+
+        novos = {}  # tmdb_id -> entrada
+        for entrada, tmdb_id in zip(entradas, self.tmdb_service.resolver_ids(entradas)):
+            if tmdb_id is None:
+                relatorio['nao_encontrados'].append(entrada)
+            elif tmdb_id in indice:
+                relatorio['existentes'][entrada] = indice[tmdb_id]
+            elif tmdb_id in novos:
+                relatorio['repetidos'].append(entrada)
+            else:
+                novos[tmdb_id] = entrada
+
+        filmes_tmdb = self.tmdb_service.filmes_por_id(list(novos), progresso=progresso) if novos else {}
+        relatorio['nao_encontrados'] += [entrada for tmdb_id, entrada in novos.items()
+                                         if tmdb_id not in filmes_tmdb]
+
+        def aplicar(filmes):
+            # Confere de novo sob a trava: outra importação pode ter gravado antes
+            atuais = indexar_tmdb(filmes)
+            for tmdb_id, (titulo, dados) in filmes_tmdb.items():
+                if tmdb_id in atuais:
+                    relatorio['existentes'][novos[tmdb_id]] = atuais[tmdb_id]
+                    continue
+                # Mesmo título de outro filme (remake): diferencia pelo ano
+                if titulo in filmes and dados.get('ano'):
+                    titulo = f"{titulo} ({dados['ano']})"
+                if titulo in filmes:
+                    relatorio['repetidos'].append(novos[tmdb_id])
+                    continue
+                filmes[titulo] = dados
+                atuais[tmdb_id] = titulo
+                relatorio['adicionados'].append(titulo)
+            return filmes
+
+        if filmes_tmdb:
+            self.estoque_service.alterar_catalogo(aplicar)
+
+        mensagem = (f"{len(relatorio['adicionados'])} filmes adicionados, "
+                    f"{len(relatorio['existentes'])} já estavam no catálogo, "
+                    f"{len(relatorio['nao_encontrados'])} não encontrados")
+        if relatorio['repetidos']:
+            mensagem += f", {len(relatorio['repetidos'])} repetidos"
+        sucesso = bool(relatorio['adicionados'])
+        return sucesso, ("✅ " if sucesso else "⚠️ ") + mensagem, relatorio
+
+    # ================== ESTOQUE E PREÇOS ==================
+
+    def ajustar(self, ajustes=None, todos=None):
+        """
+        Define estoque e/ou preço de vários filmes de uma vez
+
+        Args:
+            ajustes: Dicionário {titulo: {'estoque': n, 'preco': p, 'somar': n}}
+                — 'estoque' define o valor, 'somar' adiciona (ou retira, se
+                negativo) ingressos ao estoque atual
+            todos: Mesmo formato, aplicado a todos os filmes do catálogo
+
+        Returns:
+            Tupla (sucesso, mensagem, alterados) — alterados é {titulo: dados}
+            dos filmes modificados; se algum título não existir ou o estoque
+            ficar negativo, nada é gravado
+        """
+        ajustes = dict(ajustes or {})
+        if not ajustes and not todos:
+            return False, "⚠️ Nenhum ajuste informado.", None
+
+        for campos in list(ajustes.values()) + ([todos] if todos else []):
+            erro = validar_ajuste(campos)
+            if erro:
+                return False, f"⚠️ {erro}", None
+
+        alterados = {}
+        problemas = []
+
+        def aplicar(filmes):
+            ausentes = [titulo for titulo in ajustes if titulo not in filmes]
+            if ausentes:
+                problemas.append("Filmes não encontrados: " + ", ".join(sorted(ausentes)))
+                raise _AlteracaoCancelada()
+
+            for titulo, dados in filmes.items():
+                campos = ajustes.get(titulo, todos)
+                if not campos:
+                    continue
+                novo = dict(dados)
+                if 'estoque' in campos:
+                    novo['estoque'] = campos['estoque']
+                if campos.get('somar'):
+                    novo['estoque'] = novo.get('estoque', 0) + campos['somar']
+                if 'preco' in campos:
+                    novo['preco'] = campos['preco']
+                if novo['estoque'] < 0:
+                    problemas.append(f"{titulo}: estoque ficaria negativo ({novo['estoque']})")
+                if novo != dados:
+                    filmes[titulo] = alterados[titulo] = novo
+
+            if problemas:
+                raise _AlteracaoCancelada()
+            return filmes
+
+        try:
+            self.estoque_service.alterar_catalogo(aplicar)
+        except _AlteracaoCancelada:
+            resumo = "; ".join(problemas[:MAX_PROBLEMAS])
+            if len(problemas) > MAX_PROBLEMAS:
+                resumo += f" (e mais {len(problemas) - MAX_PROBLEMAS})"
+            return False, "⚠️ Nada foi alterado. " + resumo, None
+        return True, f"✅ {len(alterados)} filmes alterados", alterados
+
+
+# ================== ARQUIVOS ==================
+
+def filme_padrao():
+    """Dados de um filme novo quando o arquivo não informa todos os campos"""
+    return {
+        'estoque': Config.ESTOQUE_PADRAO,
+        'preco': Config.PRECO_PADRAO,
+        'imagem': '',
+        'ano': 0,
+        'genero': 'N/A',
+    }
+
+
+def validar_ajuste(campos):
+    """Mensagem de erro de um ajuste de estoque/preço (None se válido)"""
+    if 'estoque' in campos and campos['estoque'] < 0:
+        return "O estoque não pode ser negativo."
+    if 'preco' in campos and campos['preco'] <= 0:
+        return "O preço deve ser maior que zero."
+    return None
+
+
+def converter_campos(dados, campos=CAMPOS_FILME):
+    """
+    Converte os campos conhecidos (texto vazio = não informado)
+
+    Returns:
+        Tupla (campos convertidos, erro ou None)
+    """
+    convertidos = {}
+    for nome, valor in dados.items():
+        if nome not in campos or valor is None or (isinstance(valor, str) and not valor.strip()):
+            continue
+        try:
+            convertidos[nome] = campos[nome](valor.strip() if isinstance(valor, str) else valor)
+        except (TypeError, ValueError):
+            return None, f"valor inválido para '{nome}': {valor!r}"
+
+    if convertidos.get('estoque', 0) < 0:
+        return None, "estoque negativo"
+    if convertidos.get('preco', 1) <= 0:
+        return None, "preço deve ser maior que zero"
+    return convertidos, None
+
+
+def ler_arquivo_filmes(caminho, campos=CAMPOS_FILME):
+    """
+    Lê filmes de um CSV (coluna 'titulo' + campos) ou JSON (lista de objetos
+    com 'titulo' ou dicionário {titulo: dados}, como o filmes.json)
+
+    Returns:
+        Tupla (registros, erros) — registros com 'titulo' e os campos
+        convertidos; erros é uma lista de mensagens por linha/item
+    """
+    if os.path.splitext(caminho)[1].lower() == '.json':
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        if isinstance(dados, dict):
+            itens = [dict(valor, titulo=titulo) for titulo, valor in dados.items()]
+        else:
+            itens = dados
+        origem = 'item'
+    else:
+        with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+            itens = list(csv.DictReader(f))
+        origem = 'linha'
+
+    registros, erros, vistos = [], [], set()
+    # Linha 1 do CSV é o cabeçalho
+    inicio = 1 if origem == 'item' else 2
+    for numero, item in enumerate(itens, start=inicio):
+        titulo = str(item.get('titulo') or '').strip() if isinstance(item, dict) else ''
+        if not titulo:
+            erros.append(f"{origem} {numero}: sem título")
+            continue
+        if titulo in vistos:
+            erros.append(f"{origem} {numero}: '{titulo}' repetido")
+            continue
+        convertidos, erro = converter_campos(item, campos)
+        if erro:
+            erros.append(f"{origem} {numero} ('{titulo}'): {erro}")
+            continue
+        vistos.add(titulo)
+        registros.append({'titulo': titulo, **convertidos})
+    return registros, erros
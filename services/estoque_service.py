@@ -0,0 +1,131 @@
+"""
+Serviço de Estoque - Sistema de Cinema
+Reserva atômica de ingressos sobre o repositório de filmes
+"""
+
+
+class EstoqueService:
+    """
+    Controle de estoque do catálogo de filmes
+
+    A atomicidade fica a cargo do repositório: trava de arquivo entre
+    processos no backend JSON, transação BEGIN IMMEDIATE no SQLite. Assim
+    vários workers do gunicorn nunca vendem o mesmo ingresso duas vezes.
+    """
+
+    def __init__(self, repositorio):
+        self.repositorio = repositorio
+
+    def reservar(self, filme, quantidade):
+        """
+        Debita `quantidade` ingressos do estoque de `filme`, se houver saldo
+
+        Args:
+            filme: Título do filme no catálogo
+            quantidade: Número de ingressos (> 0)
+
+        Returns:
+            Tupla (sucesso, mensagem, estoque_restante)
+        """
+        if quantidade <= 0:
+            return False, "⚠️ A quantidade deve ser maior que zero.", None
+
+        sucesso, estoque = self.repositorio.reservar(filme, quantidade)
+        return self._resultado(sucesso, estoque, quantidade)
+
+    def reservar_varios(self, pedidos):
+        """
+        Processa vários pedidos independentes com uma única escrita no estoque
+
+        Cada pedido é atendido ou recusado sozinho, na ordem da lista.
+
+        Args:
+            pedidos: Lista de (filme, quantidade)
+
+        Returns:
+            Lista de tuplas (sucesso, mensagem, estoque_restante), como em reservar()
+        """
+        resultados = [None] * len(pedidos)
+        validos = []
+        for posicao, (filme, quantidade) in enumerate(pedidos):
+            if quantidade <= 0:
+                resultados[posicao] = (False, "⚠️ A quantidade deve ser maior que zero.", None)
+            else:
+                validos.append(posicao)
+
+        if validos:
+            debitos = self.repositorio.reservar_varios([pedidos[p] for p in validos])
+            for posicao, (sucesso, estoque) in zip(validos, debitos):
+                resultados[posicao] = self._resultado(sucesso, estoque, pedidos[posicao][1])
+        return resultados
+
+    @staticmethod
+    def _resultado(sucesso, estoque, quantidade):
+        if sucesso:
+            return True, "Ingressos reservados", estoque
+        if estoque is None:
+            return False, "Filme não encontrado!", None
+        return (False,
+                f"⚠️ Ingressos insuficientes. Disponível: {estoque}, Solicitado: {quantidade}",
+                estoque)
+
+    def devolver(self, filme, quantidade):
+        """
+        Devolve ingressos ao estoque (reserva cancelada ou vencida)
+
+        Returns:
+            Estoque resultante ou None se o filme saiu do catálogo
+        """
+        if quantidade <= 0:
+            return self.consultar(filme)
+        return self.repositorio.devolver(filme, quantidade)
+
+    def reservar_lote(self, itens):
+        """
+        Reserva ingressos de vários filmes numa única operação atômica
+
+        Se algum filme não existir ou não tiver saldo, nada é debitado.
+
+        Args:
+            itens: Dicionário {titulo: quantidade}, quantidades > 0
+
+        Returns:
+            Tupla (sucesso, mensagem, estoques)
+        """
+        if not itens:
+            return False, "⚠️ Nenhum ingresso informado.", None
+        if any(quantidade <= 0 for quantidade in itens.values()):
+            return False, "⚠️ A quantidade deve ser maior que zero.", None
+
+        sucesso, estoques = self.repositorio.reservar_lote(itens)
+
+        if sucesso:
+            return True, "Ingressos reservados", estoques
+
+        problemas = []
+        for titulo, disponivel in estoques.items():
+            if disponivel is None:
+                problemas.append(f"{titulo}: filme não encontrado")
+            else:
+                problemas.append(f"{titulo}: disponível {disponivel}, solicitado {itens[titulo]}")
+        return False, "⚠️ Ingressos insuficientes. " + "; ".join(problemas), estoques
+
+    def consultar(self, filme):
+        """Retorna o estoque atual de um filme (ou None se não existir)"""
+        dados = self.repositorio.obter(filme)
+        return dados["estoque"] if dados else None
+
+    def alterar_catalogo(self, alteracao):
+        """
+        Aplica uma alteração ao catálogo sob a mesma trava das compras
+
+        Evita que uma atualização do admin sobrescreva um débito de estoque
+        feito por uma compra concorrente.
+
+        Args:
+            alteracao: Função que recebe o catálogo atual e retorna o novo
+
+        Returns:
+            Catálogo salvo
+        """
+        return self.repositorio.alterar(alteracao)
@@ -0,0 +1,201 @@
+"""
+Serviço de Reservas - Sistema de Cinema
+Checkout em duas etapas: reserva temporária de ingressos e confirmação
+"""
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from utils.expiracao import FilaExpiracao
+from utils.helpers import carregar_json, salvar_json
+from utils.travas import trava_arquivo
+
+RESERVA_NAO_ENCONTRADA = "Reserva não encontrada ou expirada!"
+
+
+class ReservaService:
+    """
+    Reservas temporárias de ingressos durante o pagamento
+
+    Reservar já debita o estoque (outros compradores não vendem o que está
+    reservado); confirmar só remove a reserva e devolve os dados para
+    registrar a venda; cancelar ou deixar vencer devolve o estoque.
+
+    As reservas em aberto ficam num arquivo JSON sob trava (qualquer worker
+    confirma uma reserva feita em outro). Em memória, cada worker mantém um
+    heap com os vencimentos, relido quando o arquivo muda, e uma thread de
+    varredura dorme até o próximo vencimento e devolve o estoque das
+    reservas abandonadas.
+    """
+
+    def __init__(self, estoque_service, arquivo='dados/reservas.json', tempo_reserva=300):
+        self.estoque_service = estoque_service
+        self.arquivo = arquivo
+        self.arquivo_trava = arquivo + '.lock'
+        self.tempo_reserva = tempo_reserva
+        self._reservas = {}
+        self._fila = FilaExpiracao()
+        self._versao = None
+        self._varredura = None
+        self._acordar = threading.Event()
+        self.expiradas = 0
+
+    # ================== ARMAZENAMENTO ==================
+
+    def _versao_arquivo(self):
+        try:
+            info = os.stat(self.arquivo)
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+    def _sincronizar(self):
+        """Relê as reservas se outro worker alterou o arquivo"""
+        versao = self._versao_arquivo()
+        if versao == self._versao:
+            return
+        reservas = carregar_json(self.arquivo, {}) if versao else {}
+        fila = FilaExpiracao()
+        for reserva_id, reserva in reservas.items():
+            fila.agendar(reserva_id, reserva['expira_em'])
+        self._reservas, self._fila, self._versao = reservas, fila, versao
+
+    def _salvar(self):
+        salvar_json(self.arquivo, self._reservas)
+        self._versao = self._versao_arquivo()
+
+    def _remover_vencidas(self, agora):
+        """Tira as reservas vencidas e devolve o estoque (chamar sob a trava)"""
+        vencidas = []
+        for reserva_id in self._fila.vencidos(agora):
+            reserva = self._reservas.pop(reserva_id, None)
+            if reserva:
+                vencidas.append(reserva)
+        for reserva in vencidas:
+            self.estoque_service.devolver(reserva['filme'], reserva['quantidade'])
+        self.expiradas += len(vencidas)
+        return len(vencidas)
+
+    # ================== RESERVAS ==================
+
+    def reservar(self, filme, quantidade, tipo, total, usuario):
+        """
+        Debita o estoque e guarda a reserva por `tempo_reserva` segundos
+
+        Returns:
+            Tupla (sucesso, mensagem, reserva)
+        """
+        sucesso, mensagem, _ = self.estoque_service.reservar(filme, quantidade)
+        if not sucesso:
+            return False, mensagem, None
+
+        agora = time.time()
+        reserva = {
+            'id': uuid.uuid4().hex[:16],
+            'filme': filme,
+            'quantidade': quantidade,
+            'tipo': tipo,
+            'total': total,
+            'usuario': usuario,
+            'criada_em': datetime.now().strftime("%d/%m/%Y %H:%M"),
+            'expira_em': agora + self.tempo_reserva,
+        }
+        try:
+            with trava_arquivo(self.arquivo_trava):
+                self._sincronizar()
+                self._reservas[reserva['id']] = reserva
+                self._fila.agendar(reserva['id'], reserva['expira_em'])
+                self._salvar()
+        except BaseException:
+            # Reserva não gravada: ninguém a confirmaria nem a deixaria vencer
+            self._reservas.pop(reserva['id'], None)
+            self._fila.cancelar(reserva['id'])
+            self.estoque_service.devolver(filme, quantidade)
+            raise
+
+        self._acordar.set()
+        return True, "Ingressos reservados", reserva
+
+    def obter(self, reserva_id, usuario):
+        """Reserva em aberto do usuário (ou None se não existir ou já venceu)"""
+        self._sincronizar()
+        reserva = self._reservas.get(reserva_id)
+        if not reserva or reserva['usuario'] != usuario or reserva['expira_em'] <= time.time():
+            return None
+        return reserva
+
+    def confirmar(self, reserva_id, usuario):
+        """
+        Fecha a reserva; o estoque já foi debitado, falta só registrar a venda
+
+        Returns:
+            Tupla (sucesso, mensagem, reserva)
+        """
+        return self._encerrar(reserva_id, usuario, devolver=False)
+
+    def cancelar(self, reserva_id, usuario):
+        """Desiste da reserva e devolve os ingressos ao estoque"""
+        return self._encerrar(reserva_id, usuario, devolver=True)
+
+    def _encerrar(self, reserva_id, usuario, devolver):
+        with trava_arquivo(self.arquivo_trava):
+            self._sincronizar()
+            alteradas = self._remover_vencidas(time.time())
+
+            reserva = self._reservas.get(reserva_id)
+            if not reserva or reserva['usuario'] != usuario:
+                if alteradas:
+                    self._salvar()
+                return False, RESERVA_NAO_ENCONTRADA, None
+
+            del self._reservas[reserva_id]
+            self._fila.cancelar(reserva_id)
+            self._salvar()
+
+        if devolver:
+            self.estoque_service.devolver(reserva['filme'], reserva['quantidade'])
+            return True, "Reserva cancelada", reserva
+        return True, "Reserva confirmada", reserva
+
+    # ================== VARREDURA ==================
+
+    def expirar(self):
+        """Devolve o estoque das reservas vencidas; retorna quantas eram"""
+        self._sincronizar()
+        proximo = self._fila.proximo_vencimento()
+        if proximo is None or proximo > time.time():
+            return 0
+
+        with trava_arquivo(self.arquivo_trava):
+            self._sincronizar()
+            vencidas = self._remover_vencidas(time.time())
+            if vencidas:
+                self._salvar()
+        return vencidas
+
+    def iniciar_varredura(self, intervalo_maximo=5.0):
+        """
+        Thread que libera reservas vencidas em segundo plano
+
+        Dorme até o próximo vencimento conhecido (no máximo
+        `intervalo_maximo` segundos, para enxergar reservas de outros workers).
+        """
+        if self._varredura is not None:
+            return
+
+        def laco():
+            while True:
+                try:
+                    self.expirar()
+                except Exception as e:
+                    print(f"❌ Erro ao expirar reservas: {e}")
+                proximo = self._fila.proximo_vencimento()
+                espera = intervalo_maximo if proximo is None else proximo - time.time()
+                self._acordar.wait(min(max(espera, 0.05), intervalo_maximo))
+                self._acordar.clear()
+
+        self._varredura = threading.Thread(target=laco, name='varredura-reservas', daemon=True)
+        self._varredura.start()
@@ -0,0 +1,382 @@
+"""
+Serviço de Sessões - Sistema de Cinema
+Sessões (horários) com mapa de assentos, reserva temporária e venda
+"""
+
+import base64
+import math
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from utils.assentos import MapaAssentos
+from utils.expiracao import FilaExpiracao
+from utils.helpers import carregar_json, salvar_json, FORMATO_DATA
+from utils.travas import trava_arquivo
+
+# Mensagens de "não encontrado" (as rotas respondem 404 para elas)
+SESSAO_NAO_ENCONTRADA = "Sessão não encontrada!"
+RESERVA_NAO_ENCONTRADA = "Reserva não encontrada ou expirada!"
+
+
+class Sessao:
+    """Estado de uma sessão em memória (mapa de assentos + reservas em aberto)"""
+
+    __slots__ = ('id', 'filme', 'inicio', 'sala', 'preco', 'mapa', 'reservas', 'fila', 'versao')
+
+    def __init__(self, dados, versao=None):
+        self.id = dados['id']
+        self.filme = dados['filme']
+        self.inicio = dados['inicio']
+        self.sala = dados.get('sala', '')
+        self.preco = dados.get('preco')
+        estados = base64.b64decode(dados['mapa']) if dados.get('mapa') else None
+        self.mapa = MapaAssentos(dados['fileiras'], dados['por_fileira'], estados)
+        self.reservas = dados.get('reservas', {})
+        self.fila = FilaExpiracao()
+        for reserva_id, reserva in self.reservas.items():
+            self.fila.agendar(reserva_id, reserva['expira_em'])
+        self.versao = versao
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filme': self.filme,
+            'inicio': self.inicio,
+            'sala': self.sala,
+            'preco': self.preco,
+            'fileiras': self.mapa.fileiras,
+            'por_fileira': self.mapa.por_fileira,
+            'mapa': base64.b64encode(bytes(self.mapa.estados)).decode('ascii'),
+            'reservas': self.reservas,
+        }
+
+    def resumo(self):
+        """Dados públicos da sessão (sem o mapa)"""
+        return {
+            'id': self.id,
+            'filme': self.filme,
+            'inicio': self.inicio,
+            'sala': self.sala,
+            'preco': self.preco,
+            'lugares': len(self.mapa),
+            'livres': self.mapa.contar(),
+        }
+
+
+class SessaoService:
+    """
+    Sessões de cada filme com assentos marcados
+
+    Cada sessão fica num arquivo (dados/sessoes/<id>.json) com o mapa de
+    assentos e as reservas temporárias em aberto. Cada worker mantém os
+    mapas em memória e só relê o arquivo quando ele muda (stat); toda
+    alteração acontece sob a trava do arquivo da sessão, então dois workers
+    nunca reservam ou vendem o mesmo assento.
+
+    Reservas vencem depois de `tempo_reserva` segundos: um heap por sessão
+    guarda os vencimentos e as vencidas são liberadas antes de qualquer
+    operação na sessão.
+    """
+
+    def __init__(self, diretorio='dados/sessoes', tempo_reserva=600, max_assentos=10, max_por_fileira=50):
+        self.diretorio = diretorio
+        self.tempo_reserva = tempo_reserva
+        self.max_assentos = max_assentos
+        self.max_por_fileira = max_por_fileira
+        self._sessoes = {}
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    # ================== ARMAZENAMENTO ==================
+
+    def _arquivo(self, sessao_id):
+        return os.path.join(self.diretorio, f"{sessao_id}.json")
+
+    @staticmethod
+    def _versao(arquivo):
+        try:
+            info = os.stat(arquivo)
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+    def _carregar(self, sessao_id):
+        """Sessão em memória, relida do disco só se o arquivo mudou"""
+        if not sessao_id or not all(c.isalnum() for c in sessao_id):
+            return None
+
+        arquivo = self._arquivo(sessao_id)
+        versao = self._versao(arquivo)
+        if versao is None:
+            self._sessoes.pop(sessao_id, None)
+            return None
+
+        sessao = self._sessoes.get(sessao_id)
+        if sessao is None or sessao.versao != versao:
+            dados = carregar_json(arquivo, None)
+            if not dados:
+                return None
+            sessao = Sessao(dados, versao)
+            with self._lock:
+                self._sessoes[sessao_id] = sessao
+        return sessao
+
+    def _salvar(self, sessao):
+        arquivo = self._arquivo(sessao.id)
+        salvar_json(arquivo, sessao.to_dict())
+        sessao.versao = self._versao(arquivo)
+
+    def _alterar(self, sessao_id, alteracao):
+        """
+        Executa alteracao(sessao) -> (sucesso, mensagem, resultado) sob a trava
+        da sessão, depois de liberar as reservas vencidas; grava se sucesso
+        """
+        arquivo = self._arquivo(sessao_id)
+        if self._carregar(sessao_id) is None:
+            return False, SESSAO_NAO_ENCONTRADA, None
+
+        with trava_arquivo(arquivo + '.lock'):
+            sessao = self._carregar(sessao_id)
+            if sessao is None:
+                return False, SESSAO_NAO_ENCONTRADA, None
+
+            try:
+                expiradas = self._expirar(sessao)
+                sucesso, mensagem, resultado = alteracao(sessao)
+                if sucesso or expiradas:
+                    self._salvar(sessao)
+            except Exception:
+                # Memória pode ter divergido do arquivo: relê na próxima vez
+                with self._lock:
+                    self._sessoes.pop(sessao_id, None)
+                raise
+        return sucesso, mensagem, resultado
+
+    def _expirar(self, sessao):
+        """Libera os assentos das reservas vencidas; retorna quantas foram"""
+        vencidas = sessao.fila.vencidos(time.time())
+        for reserva_id in vencidas:
+            reserva = sessao.reservas.pop(reserva_id, None)
+            if reserva:
+                sessao.mapa.liberar(reserva['assentos'])
+        return len(vencidas)
+
+    def _atual(self, sessao_id):
+        """Sessão carregada, já sem reservas vencidas"""
+        sessao = self._carregar(sessao_id)
+        if sessao is None:
+            return None
+        proximo = sessao.fila.proximo_vencimento()
+        if proximo is not None and proximo <= time.time():
+            self._alterar(sessao_id, lambda s: (False, "", None))
+            sessao = self._carregar(sessao_id)
+        return sessao
+
+    # ================== SESSÕES ==================
+
+    def criar_sessao(self, filme, inicio, sala, fileiras, por_fileira, preco=None):
+        """
+        Cria uma sessão com todos os assentos livres
+
+        Args:
+            filme: Título do filme
+            inicio: Data e hora ("dd/mm/aaaa HH:MM")
+            sala: Nome/número da sala
+            fileiras: Quantidade de fileiras (A, B, C...)
+            por_fileira: Assentos por fileira
+            preco: Preço da inteira (None = preço do filme)
+
+        Returns:
+            Tupla (sucesso, mensagem, sessao)
+        """
+        try:
+            datetime.strptime(inicio, FORMATO_DATA)
+        except (TypeError, ValueError):
+            return False, "⚠️ Data/hora inválida (use dd/mm/aaaa HH:MM).", None
+
+        try:
+            preco = float(preco) if preco is not None else None
+            fileiras = int(fileiras)
+            por_fileira = int(por_fileira)
+        except (TypeError, ValueError):
+            return False, "⚠️ Preço, fileiras e assentos por fileira devem ser números.", None
+
+        if preco is not None and not (math.isfinite(preco) and preco > 0):
+            return False, "⚠️ O preço deve ser maior que zero.", None
+        # A sala vira um bytearray em memória e no arquivo da sessão: limita o tamanho
+        if not 1 <= por_fileira <= self.max_por_fileira:
+            return False, f"⚠️ A fileira deve ter de 1 a {self.max_por_fileira} assentos.", None
+
+        try:
+            dados = {
+                'id': uuid.uuid4().hex[:12],
+                'filme': filme,
+                'inicio': inicio,
+                'sala': str(sala or ''),
+                'preco': preco,
+                'fileiras': fileiras,
+                'por_fileira': por_fileira,
+                'reservas': {},
+            }
+            sessao = Sessao(dados)
+        except (TypeError, ValueError) as e:
+            return False, f"⚠️ Sessão inválida: {e}", None
+
+        self._salvar(sessao)
+        with self._lock:
+            self._sessoes[sessao.id] = sessao
+        return True, "✅ Sessão criada com sucesso!", sessao.resumo()
+
+    def listar(self, filme=None):
+        """Sessões (resumo), em ordem de horário, opcionalmente de um filme"""
+        sessoes = []
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith('.json'):
+                continue
+            sessao = self._atual(nome[:-5])
+            if sessao and (filme is None or sessao.filme == filme):
+                sessoes.append(sessao.resumo())
+        return sorted(sessoes, key=lambda s: datetime.strptime(s['inicio'], FORMATO_DATA))
+
+    def obter(self, sessao_id):
+        """Resumo da sessão com o mapa de assentos por fileira (ou None)"""
+        sessao = self._atual(sessao_id)
+        if sessao is None:
+            return None
+        dados = sessao.resumo()
+        dados['fileiras'] = sessao.mapa.fileiras_texto()
+        return dados
+
+    def filme(self, sessao_id):
+        """Título do filme da sessão (ou None se ela não existir)"""
+        sessao = self._carregar(sessao_id)
+        return sessao.filme if sessao else None
+
+    def excluir_sessao(self, sessao_id):
+        """Remove uma sessão"""
+        arquivo = self._arquivo(sessao_id)
+        if self._carregar(sessao_id) is None:
+            return False, SESSAO_NAO_ENCONTRADA, None
+        with trava_arquivo(arquivo + '.lock'):
+            os.remove(arquivo)
+            with self._lock:
+                self._sessoes.pop(sessao_id, None)
+        return True, "Sessão removida", None
+
+    # ================== RESERVAS ==================
+
+    def reservar(self, sessao_id, usuario, assentos=None, quantidade=None):
+        """
+        Reserva assentos por `tempo_reserva` segundos
+
+        Args:
+            sessao_id: Sessão
+            usuario: Dono da reserva (só ele confirma ou cancela)
+            assentos: Assentos escolhidos (['C7', 'C8']) ou None
+            quantidade: Sem `assentos`, reserva os melhores lugares juntos
+
+        Returns:
+            Tupla (sucesso, mensagem, reserva) — reserva com id, assentos e expira_em
+        """
+        def alteracao(sessao):
+            mapa = sessao.mapa
+            if assentos:
+                try:
+                    indices = sorted({mapa.indice(nome) for nome in assentos})
+                except ValueError as e:
+                    return False, f"⚠️ {e}", None
+            else:
+                try:
+                    total = int(quantidade or 0)
+                except (TypeError, ValueError):
+                    return False, "⚠️ A quantidade deve ser um número válido.", None
+                if total <= 0:
+                    return False, "⚠️ A quantidade deve ser maior que zero.", None
+                indices = mapa.melhores_assentos(total)
+                if indices is None:
+                    return False, f"⚠️ Não há {total} assentos livres juntos nesta sessão.", None
+
+            if len(indices) > self.max_assentos:
+                return False, f"⚠️ Máximo de {self.max_assentos} assentos por reserva.", None
+            if not mapa.reservar(indices):
+                return False, "⚠️ Um ou mais assentos não estão mais disponíveis.", None
+
+            reserva_id = uuid.uuid4().hex[:16]
+            expira_em = time.time() + self.tempo_reserva
+            sessao.reservas[reserva_id] = {
+                'assentos': indices,
+                'expira_em': expira_em,
+                'usuario': usuario,
+            }
+            sessao.fila.agendar(reserva_id, expira_em)
+            return True, "Assentos reservados", self._dados_reserva(sessao, reserva_id)
+
+        return self._alterar(sessao_id, alteracao)
+
+    def cancelar_reserva(self, sessao_id, reserva_id, usuario):
+        """Libera os assentos de uma reserva em aberto"""
+        def alteracao(sessao):
+            reserva = sessao.reservas.get(reserva_id)
+            if not reserva or reserva['usuario'] != usuario:
+                return False, RESERVA_NAO_ENCONTRADA, None
+            del sessao.reservas[reserva_id]
+            sessao.fila.cancelar(reserva_id)
+            sessao.mapa.liberar(reserva['assentos'])
+            return True, "Reserva cancelada", None
+
+        return self._alterar(sessao_id, alteracao)
+
+    def confirmar(self, sessao_id, reserva_id, usuario):
+        """
+        Transforma a reserva em venda (assentos ficam VENDIDO)
+
+        Returns:
+            Tupla (sucesso, mensagem, dados) — dados com filme, sessão,
+            assentos e preço da inteira
+        """
+        def alteracao(sessao):
+            reserva = sessao.reservas.get(reserva_id)
+            if not reserva or reserva['usuario'] != usuario:
+                return False, RESERVA_NAO_ENCONTRADA, None
+            dados = self._dados_reserva(sessao, reserva_id)
+            if not sessao.mapa.vender(reserva['assentos']):
+                return False, "⚠️ Um ou mais assentos não estão mais disponíveis.", None
+            del sessao.reservas[reserva_id]
+            sessao.fila.cancelar(reserva_id)
+            return True, "Assentos vendidos", dados
+
+        return self._alterar(sessao_id, alteracao)
+
+    def estornar(self, sessao_id, assentos):
+        """
+        Libera assentos de uma venda confirmada que não chegou ao histórico
+
+        Args:
+            assentos: Nomes dos assentos (['C7', 'C8']), como em confirmar()
+        """
+        def alteracao(sessao):
+            try:
+                indices = [sessao.mapa.indice(nome) for nome in assentos]
+            except ValueError as e:
+                return False, f"⚠️ {e}", None
+            sessao.mapa.estornar(indices)
+            return True, "Venda desfeita", None
+
+        return self._alterar(sessao_id, alteracao)
+
+    @staticmethod
+    def _dados_reserva(sessao, reserva_id):
+        reserva = sessao.reservas[reserva_id]
+        return {
+            'id': reserva_id,
+            'sessao': sessao.id,
+            'filme': sessao.filme,
+            'inicio': sessao.inicio,
+            'sala': sessao.sala,
+            'preco': sessao.preco,
+            'assentos': [sessao.mapa.nome(i) for i in reserva['assentos']],
+            'expira_em': reserva['expira_em'],
+        }
@@ -1,16 +1,58 @@
 """Serviço para integração com a API do TMDB"""
 
+import json
+import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import Config
+from utils.cache_http import CacheRespostas
+from utils.metricas import metricas
+
+# Quantidade de resultados por página nas listagens do TMDB
+RESULTADOS_POR_PAGINA = 20
 
 
 class TMDBService:
     """Classe para gerenciar requisições à API do TMDB"""
 
-    def __init__(self):
-        self.api_key = Config.TMDB_API_KEY
-        self.base_url = Config.TMDB_BASE_URL
+    def __init__(self, api_key=None, base_url=None, max_workers=None, timeout=None, cache=None):
+        self.api_key = api_key if api_key is not None else Config.TMDB_API_KEY
+        self.base_url = base_url or Config.TMDB_BASE_URL
         self.image_base_url = Config.TMDB_IMAGE_BASE_URL
+        self.max_workers = max_workers or Config.TMDB_MAX_WORKERS
+        self.timeout = timeout or Config.TMDB_TIMEOUT
+        self.session = self._criar_sessao()
+
+        # cache=False desliga; None usa o cache em disco definido no Config
+        if cache is None and Config.TMDB_CACHE_ATIVO:
+            cache = CacheRespostas(Config.ARQUIVO_CACHE_TMDB, Config.TMDB_CACHE_MAX_MB * 1024 * 1024)
+        self.cache = cache or None
+
+    def _criar_sessao(self):
+        """
+        Sessão HTTP compartilhada: conexões keep-alive reaproveitadas (sem um
+        handshake TLS por requisição) e novas tentativas com backoff para
+        falhas temporárias e limite de taxa (429)
+        """
+        tentativas = Retry(
+            total=Config.TMDB_TENTATIVAS,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+        )
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=tentativas)
+
+        sessao = requests.Session()
+        sessao.mount("https://", adaptador)
+        sessao.mount("http://", adaptador)
+        return sessao
 
     def _fazer_requisicao(self, endpoint, params=None):
         """Método privado para fazer requisições à API"""
@@ -26,14 +68,84 @@ class TMDBService:
 
         url = self.base_url + endpoint
 
+        if self.cache is None:
+            try:
+                with metricas.medir('tmdb', self._operacao(endpoint)):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.RequestException as e:
+                print(f"Erro na requisição à API TMDB: {e}")
+                return None
+
+        return self._requisicao_com_cache(endpoint, url, params)
+
+    @staticmethod
+    def _operacao(endpoint):
+        """Endpoint sem os IDs para as métricas: /movie/603/credits -> movie/:id/credits"""
+        return re.sub(r"\d+", ":id", endpoint.lstrip("/"))
+
+    def _chave_cache(self, endpoint, params):
+        """Chave estável da resposta: endpoint + parâmetros ordenados, sem a api_key"""
+        parametros = sorted((k, str(v)) for k, v in params.items() if k != "api_key")
+        return endpoint + "?" + urlencode(parametros)
+
+    def _ttl(self, endpoint):
+        """Validade da resposta: primeiro prefixo de Config.TMDB_CACHE_TTL que casar"""
+        endpoint = endpoint.lstrip("/")
+        for prefixo, ttl in Config.TMDB_CACHE_TTL.items():
+            if endpoint.startswith(prefixo):
+                return ttl
+        return Config.TMDB_CACHE_TTL_PADRAO
+
+    def _requisicao_com_cache(self, endpoint, url, params):
+        """
+        Requisição passando pelo cache em disco
+
+        Resposta dentro da validade: nenhuma requisição. Vencida: requisição
+        condicional com o ETag / Last-Modified guardado; um 304 só renova a
+        validade. Se a API falhar, a cópia vencida é usada no lugar de nada.
+        """
+        chave = self._chave_cache(endpoint, params)
+        entrada = self.cache.obter(chave)
+
+        if entrada and time.time() - entrada["armazenado_em"] < self._ttl(endpoint):
+            self.cache.acertos += 1
+            return json.loads(entrada["corpo"])
+
+        cabecalhos = {}
+        if entrada:
+            if entrada["etag"]:
+                cabecalhos["If-None-Match"] = entrada["etag"]
+            if entrada["last_modified"]:
+                cabecalhos["If-Modified-Since"] = entrada["last_modified"]
+
         try:
-            response = requests.get(url, params=params, timeout=10)
+            with metricas.medir('tmdb', self._operacao(endpoint)):
+                response = self.session.get(url, params=params, headers=cabecalhos, timeout=self.timeout)
+
+            if response.status_code == 304 and entrada:
+                self.cache.revalidacoes += 1
+                self.cache.renovar(chave)
+                return json.loads(entrada["corpo"])
+
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            dados = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Erro na requisição à API TMDB: {e}")
+            if entrada:
+                return json.loads(entrada["corpo"])
             return None
 
+        self.cache.falhas += 1
+        self.cache.guardar(
+            chave,
+            response.text,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+        return dados
+
     def filmes_em_cartaz(self, pagina=1):
         """Busca filmes em cartaz no Brasil"""
         params = {"page": pagina, "region": "BR"}
@@ -103,12 +215,38 @@ class TMDBService:
             print(f"Erro ao formatar filme: {e}")
             return None
 
-    def atualizar_catalogo(self, quantidade=None):
+    def _listar(self, buscar_pagina, quantidade):
+        """
+        Junta os resultados de várias páginas de uma listagem
+
+        A primeira página informa o total; as demais são buscadas em paralelo.
+        """
+        primeira = buscar_pagina(1)
+        if not primeira or not primeira.get("results"):
+            return []
+
+        paginas_necessarias = math.ceil(quantidade / RESULTADOS_POR_PAGINA)
+        ultima = min(paginas_necessarias, primeira.get("total_pages") or 1)
+
+        resultados = list(primeira["results"])
+        if ultima > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for pagina in executor.map(buscar_pagina, range(2, ultima + 1)):
+                    if pagina and pagina.get("results"):
+                        resultados.extend(pagina["results"])
+
+        return resultados[:quantidade]
+
+    def atualizar_catalogo(self, quantidade=None, progresso=None):
         """
         Busca filmes da API e retorna formatados para o sistema
 
+        Os detalhes de cada filme são buscados em paralelo (até
+        Config.TMDB_MAX_WORKERS requisições simultâneas na mesma sessão).
+
         Args:
             quantidade: Número de filmes a buscar (padrão: Config.QUANTIDADE_FILMES_CATALOGO)
+            progresso: Função opcional progresso(feitos, total), chamada a cada filme processado
 
         Returns:
             Dicionário com filmes formatados {titulo: dados}
@@ -117,24 +255,96 @@ class TMDBService:
             quantidade = Config.QUANTIDADE_FILMES_CATALOGO
 
         # Tenta buscar filmes em cartaz primeiro
-        resultado = self.filmes_em_cartaz()
+        resultados = self._listar(self.filmes_em_cartaz, quantidade)
 
         # Se não conseguir, busca populares
-        if not resultado or not resultado.get("results"):
-            resultado = self.filmes_populares()
+        if not resultados:
+            resultados = self._listar(self.filmes_populares, quantidade)
 
-        if not resultado or not resultado.get("results"):
+        if not resultados:
             print("Não foi possivel buscar filmes da API")
             return {}
 
-        # Processa os filmes
+        # Processa os filmes (detalhes em paralelo, ordem preservada)
         filmes_formatado = {}
 
-        for filme_tmdb in resultado["results"][:quantidade]:
-            titulo = filme_tmdb["title"]
-            filme_formatado = self.formatar_para_sistema(filme_tmdb)
-
-            if filme_formatado:
-                filmes_formatado[titulo] = filme_formatado
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            formatados = executor.map(self.formatar_para_sistema, resultados)
+            for feitos, (filme_tmdb, filme_formatado) in enumerate(zip(resultados, formatados), 1):
+                if filme_formatado:
+                    filmes_formatado[filme_tmdb["title"]] = filme_formatado
+                if progresso:
+                    progresso(feitos, len(resultados))
 
         return filmes_formatado
+
+    # ================== IMPORTAÇÃO EM MASSA ==================
+
+    @staticmethod
+    def id_informado(entrada):
+        """
+        ID do TMDB quando a entrada já é um (inteiro ou "tmdb:603"); senão None
+
+        Texto só com dígitos continua sendo título ("1917", "2012").
+        """
+        if isinstance(entrada, int):
+            return entrada
+        texto = str(entrada).strip()
+        if texto.lower().startswith("tmdb:") and texto[5:].strip().isdigit():
+            return int(texto[5:])
+        return None
+
+    def resolver_ids(self, entradas):
+        """
+        Converte títulos e IDs em IDs do TMDB (buscas em paralelo)
+
+        Args:
+            entradas: Títulos (vale o primeiro resultado da busca) ou IDs,
+                que não custam requisição
+
+        Returns:
+            Lista de IDs na ordem das entradas (None = título não encontrado)
+        """
+        def resolver(entrada):
+            tmdb_id = self.id_informado(entrada)
+            if tmdb_id is not None:
+                return tmdb_id
+            resultado = self.buscar_filme(str(entrada).strip())
+            if not resultado or not resultado.get("results"):
+                return None
+            return resultado["results"][0].get("id")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(resolver, entradas))
+
+    def filmes_por_id(self, ids, progresso=None):
+        """
+        Detalhes de vários filmes já no formato do sistema (em paralelo)
+
+        Uma requisição por ID: os detalhes já trazem os gêneros, então
+        formatar_para_sistema não busca de novo.
+
+        Args:
+            ids: IDs do TMDB (repetidos são buscados uma vez)
+            progresso: Função opcional progresso(feitos, total)
+
+        Returns:
+            Dicionário {tmdb_id: (titulo, dados)}; IDs não encontrados ficam de fora
+        """
+        ids = list(dict.fromkeys(ids))
+
+        def buscar(tmdb_id):
+            detalhes = self.detalhes_filme(tmdb_id)
+            if not detalhes or not detalhes.get("title"):
+                return None
+            dados = self.formatar_para_sistema(detalhes)
+            return (detalhes["title"], dados) if dados else None
+
+        filmes = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for feitos, (tmdb_id, filme) in enumerate(zip(ids, executor.map(buscar, ids)), 1):
+                if filme:
+                    filmes[tmdb_id] = filme
+                if progresso:
+                    progresso(feitos, len(ids))
+        return filmes
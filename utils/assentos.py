@@ -0,0 +1,159 @@
+""" Mapa de assentos de uma sessão: um byte por assento num bytearray """
+import re
+import string
+from functools import lru_cache
+
+# Estado de cada assento (valor do byte)
+LIVRE = 0
+RESERVADO = 1
+VENDIDO = 2
+
+# Letra de cada fileira: A (tela) ... Z
+LETRAS_FILEIRAS = string.ascii_uppercase
+
+# Símbolo de cada estado na representação em texto das fileiras
+SIMBOLOS = {LIVRE: 'L', RESERVADO: 'R', VENDIDO: 'V'}
+
+
+@lru_cache(maxsize=64)
+def _sequencia_livre(quantidade):
+    """Regex de `quantidade` ou mais assentos LIVRE seguidos"""
+    return re.compile(rb'\x00{%d,}' % quantidade)
+
+
+class MapaAssentos:
+    """
+    Assentos de uma sala (fileiras x assentos por fileira)
+
+    Um byte por assento: reservar/liberar/vender é O(1) por assento e a
+    procura de assentos juntos percorre os trechos livres da fileira com
+    uma regex sobre os bytes (varredura em C). Uma sala de 500 lugares
+    ocupa 500 bytes.
+    """
+
+    __slots__ = ('fileiras', 'por_fileira', 'estados')
+
+    def __init__(self, fileiras, por_fileira, estados=None):
+        if not 1 <= fileiras <= len(LETRAS_FILEIRAS):
+            raise ValueError(f"A sala deve ter de 1 a {len(LETRAS_FILEIRAS)} fileiras")
+        if por_fileira < 1:
+            raise ValueError("A fileira deve ter pelo menos 1 assento")
+
+        self.fileiras = fileiras
+        self.por_fileira = por_fileira
+        total = fileiras * por_fileira
+        if estados is None:
+            self.estados = bytearray(total)
+        elif len(estados) != total:
+            raise ValueError("Mapa de assentos com tamanho diferente da sala")
+        else:
+            self.estados = bytearray(estados)
+
+    def __len__(self):
+        return len(self.estados)
+
+    # ================== NOMES ==================
+
+    def indice(self, nome):
+        """Posição do assento 'C7' (fileira C, assento 7) no mapa"""
+        nome = str(nome).strip().upper()
+        try:
+            fileira = LETRAS_FILEIRAS.index(nome[0])
+            numero = int(nome[1:])
+        except (IndexError, ValueError):
+            raise ValueError(f"Assento inválido: {nome}")
+        if fileira >= self.fileiras or not 1 <= numero <= self.por_fileira:
+            raise ValueError(f"Assento inexistente: {nome}")
+        return fileira * self.por_fileira + numero - 1
+
+    def nome(self, indice):
+        """Nome do assento na posição `indice` ('C7')"""
+        fileira, coluna = divmod(indice, self.por_fileira)
+        return f"{LETRAS_FILEIRAS[fileira]}{coluna + 1}"
+
+    # ================== ESTADO ==================
+
+    def estado(self, indice):
+        return self.estados[indice]
+
+    def contar(self, estado=LIVRE):
+        """Quantidade de assentos no estado informado"""
+        return self.estados.count(estado)
+
+    def reservar(self, indices):
+        """Reserva os assentos se todos estiverem livres (tudo ou nada)"""
+        estados = self.estados
+        if any(estados[i] != LIVRE for i in indices):
+            return False
+        for i in indices:
+            estados[i] = RESERVADO
+        return True
+
+    def liberar(self, indices):
+        """Devolve assentos reservados (os vendidos não mudam)"""
+        estados = self.estados
+        for i in indices:
+            if estados[i] == RESERVADO:
+                estados[i] = LIVRE
+
+    def vender(self, indices):
+        """Confirma a venda de assentos reservados (tudo ou nada)"""
+        estados = self.estados
+        if any(estados[i] != RESERVADO for i in indices):
+            return False
+        for i in indices:
+            estados[i] = VENDIDO
+        return True
+
+    def estornar(self, indices):
+        """Desfaz a venda de assentos (venda não registrada): voltam a ficar livres"""
+        estados = self.estados
+        for i in indices:
+            if estados[i] == VENDIDO:
+                estados[i] = LIVRE
+
+    # ================== BUSCA ==================
+
+    def melhores_assentos(self, quantidade):
+        """
+        Melhor bloco de `quantidade` assentos livres lado a lado
+
+        Prefere as fileiras do meio da sala e, dentro da fileira, o bloco
+        mais próximo do centro.
+
+        Returns:
+            Lista de índices ou None se nenhuma fileira tiver o bloco livre
+        """
+        if not 1 <= quantidade <= self.por_fileira:
+            return None
+
+        sequencia = _sequencia_livre(quantidade)
+        centro_fileira = (self.fileiras - 1) / 2
+        centro_coluna = (self.por_fileira - quantidade) / 2
+
+        for fileira in sorted(range(self.fileiras), key=lambda f: (abs(f - centro_fileira), f)):
+            inicio = fileira * self.por_fileira
+            centro = inicio + centro_coluna
+
+            # Cada trecho livre grande o bastante: o bloco mais central dentro dele
+            melhor = None
+            for trecho in sequencia.finditer(self.estados, inicio, inicio + self.por_fileira):
+                posicao = min(max(round(centro), trecho.start()), trecho.end() - quantidade)
+                distancia = abs(posicao - centro)
+                if melhor is None or distancia < melhor[0]:
+                    melhor = (distancia, posicao)
+
+            if melhor:
+                return list(range(melhor[1], melhor[1] + quantidade))
+        return None
+
+    # ================== REPRESENTAÇÃO ==================
+
+    def fileiras_texto(self):
+        """Uma string por fileira com L (livre), R (reservado) e V (vendido)"""
+        tabela = bytes.maketrans(bytes(SIMBOLOS), ''.join(SIMBOLOS.values()).encode('ascii'))
+        texto = self.estados.translate(tabela).decode('ascii')
+        return {
+            LETRAS_FILEIRAS[f]: texto[f * self.por_fileira:(f + 1) * self.por_fileira]
+            for f in range(self.fileiras)
+        }
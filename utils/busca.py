@@ -0,0 +1,244 @@
+""" Índice invertido para busca de filmes (sem acentos, ranqueada) """
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+# Peso de cada campo do filme no ranking
+PESOS_CAMPOS = {
+    'titulo': 3.0,
+    'genero': 2.0,
+    'ano': 2.0,
+    'sinopse': 1.0,
+}
+
+# Fator da pontuação conforme o tipo de casamento do termo com o token
+CASAMENTO_EXATO = 1.0
+CASAMENTO_PREFIXO = 0.7
+CASAMENTO_PARCIAL = 0.4
+
+# Bônus quando a busca inteira aparece no título (ex: "poderoso chefao")
+BONUS_TITULO = 5.0
+
+_NAO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar(texto):
+    """
+    Minúsculas, sem acentos e sem pontuação: "O Poderoso Chefão!" -> "o poderoso chefao"
+    """
+    texto = str(texto)
+    if not texto.isascii():
+        # NFKD separa letra e acento ("ã" -> "a" + "~"); o acento cai no encode
+        texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return _NAO_ALFANUMERICO.sub(' ', texto.lower()).strip()
+
+
+def tokenizar(texto):
+    """Lista de tokens normalizados de um texto"""
+    return normalizar(texto).split()
+
+
+def trigramas(token):
+    """Conjunto de trigramas de um token (vazio se tiver menos de 3 letras)"""
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class IndiceBusca:
+    """
+    Índice invertido sobre título, gênero, ano e sinopse do catálogo
+
+    token -> {titulo: peso}; o vocabulário fica ordenado (prefixos por busca
+    binária) e indexado por trigramas (trechos no meio da palavra). Cada
+    busca toca só os tokens que casam com os termos, não o catálogo inteiro.
+
+    `sincronizar` compara o catálogo com o que já está indexado e reindexa
+    apenas os filmes incluídos, alterados ou removidos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versao = None
+        self._assinaturas = {}    # titulo -> campos indexados (detecta alterações)
+        self._tokens_filme = {}   # titulo -> {token: peso}
+        self._titulos = {}        # titulo -> título normalizado
+        self._postings = {}       # token -> {titulo: peso}
+        self._vocabulario = []    # tokens ordenados
+        self._trigramas = {}      # trigrama -> {token}
+
+    def __len__(self):
+        return len(self._tokens_filme)
+
+    # ================== MANUTENÇÃO ==================
+
+    @staticmethod
+    def _assinatura(titulo, dados):
+        return (titulo, dados.get('genero', ''), dados.get('ano', ''), dados.get('sinopse', ''))
+
+    @staticmethod
+    def _pesos(titulo, dados):
+        """Peso de cada token do filme (o maior entre os campos em que aparece)"""
+        campos = {
+            'titulo': titulo,
+            'genero': dados.get('genero', ''),
+            'ano': dados.get('ano') or '',
+            'sinopse': dados.get('sinopse', ''),
+        }
+        pesos = {}
+        for campo, texto in campos.items():
+            peso = PESOS_CAMPOS[campo]
+            for token in tokenizar(texto):
+                if peso > pesos.get(token, 0):
+                    pesos[token] = peso
+        return pesos
+
+    def _adicionar(self, titulo, dados, ordenar=True):
+        pesos = self._pesos(titulo, dados)
+        self._tokens_filme[titulo] = pesos
+        self._titulos[titulo] = normalizar(titulo)
+        self._assinaturas[titulo] = self._assinatura(titulo, dados)
+
+        for token, peso in pesos.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                if ordenar:
+                    insort(self._vocabulario, token)
+                else:
+                    self._vocabulario.append(token)
+                for trigrama in trigramas(token):
+                    self._trigramas.setdefault(trigrama, set()).add(token)
+            posting[titulo] = peso
+
+    def _remover(self, titulo):
+        pesos = self._tokens_filme.pop(titulo)
+        del self._titulos[titulo]
+        del self._assinaturas[titulo]
+
+        for token in pesos:
+            posting = self._postings[token]
+            del posting[titulo]
+            if posting:
+                continue
+            del self._postings[token]
+            del self._vocabulario[bisect_left(self._vocabulario, token)]
+            for trigrama in trigramas(token):
+                tokens = self._trigramas[trigrama]
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigramas[trigrama]
+
+    def sincronizar(self, filmes, versao=None):
+        """
+        Deixa o índice igual ao catálogo `filmes`
+
+        Args:
+            filmes: Catálogo {titulo: dados}
+            versao: Versão do catálogo; se for a mesma da última chamada nada é feito
+
+        Returns:
+            Número de filmes reindexados (incluídos + alterados + removidos)
+        """
+        if versao is not None and versao == self._versao:
+            return 0
+
+        with self._lock:
+            if versao is not None and versao == self._versao:
+                return 0
+
+            if not self._tokens_filme:
+                # Carga inicial: ordena o vocabulário uma única vez no final
+                for titulo, dados in filmes.items():
+                    self._adicionar(titulo, dados, ordenar=False)
+                self._vocabulario.sort()
+                self._versao = versao
+                return len(filmes)
+
+            alterados = 0
+            for titulo in [t for t in self._tokens_filme if t not in filmes]:
+                self._remover(titulo)
+                alterados += 1
+
+            for titulo, dados in filmes.items():
+                assinatura = self._assinaturas.get(titulo)
+                if assinatura == self._assinatura(titulo, dados):
+                    continue
+                if assinatura is not None:
+                    self._remover(titulo)
+                self._adicionar(titulo, dados)
+                alterados += 1
+
+            self._versao = versao
+            return alterados
+
+    # ================== CONSULTA ==================
+
+    def _casamentos(self, termo):
+        """Tokens do vocabulário que casam com `termo` e o fator de cada um"""
+        casamentos = {}
+
+        # Prefixo: faixa contígua do vocabulário ordenado
+        vocabulario = self._vocabulario
+        posicao = bisect_left(vocabulario, termo)
+        while posicao < len(vocabulario) and vocabulario[posicao].startswith(termo):
+            token = vocabulario[posicao]
+            casamentos[token] = CASAMENTO_EXATO if token == termo else CASAMENTO_PREFIXO
+            posicao += 1
+
+        # Trecho no meio da palavra: tokens que têm todos os trigramas do termo
+        grams = trigramas(termo)
+        if grams:
+            candidatos = None
+            for trigrama in sorted(grams, key=lambda g: len(self._trigramas.get(g, ()))):
+                tokens = self._trigramas.get(trigrama)
+                if not tokens:
+                    candidatos = None
+                    break
+                candidatos = set(tokens) if candidatos is None else candidatos & tokens
+                if not candidatos:
+                    break
+            for token in candidatos or ():
+                if token not in casamentos and termo in token:
+                    casamentos[token] = CASAMENTO_PARCIAL
+
+        return casamentos
+
+    def buscar(self, consulta, limite=None):
+        """
+        Filmes que contêm todos os termos da consulta, do mais relevante ao menos
+
+        Args:
+            consulta: Texto digitado (acentos e maiúsculas são ignorados)
+            limite: Máximo de resultados (None = todos)
+
+        Returns:
+            Lista de títulos ordenada por relevância
+        """
+        termos = tokenizar(consulta)
+        if not termos:
+            return []
+
+        with self._lock:
+            pontuacao = None
+            for termo in termos:
+                pontos_termo = {}
+                for token, fator in self._casamentos(termo).items():
+                    for titulo, peso in self._postings[token].items():
+                        pontos = peso * fator
+                        if pontos > pontos_termo.get(titulo, 0):
+                            pontos_termo[titulo] = pontos
+
+                if pontuacao is None:
+                    pontuacao = pontos_termo
+                else:
+                    pontuacao = {t: p + pontos_termo[t] for t, p in pontuacao.items() if t in pontos_termo}
+                if not pontuacao:
+                    return []
+
+            frase = ' '.join(termos)
+            for titulo in pontuacao:
+                if frase in self._titulos[titulo]:
+                    pontuacao[titulo] += BONUS_TITULO
+
+        ordenados = sorted(pontuacao, key=lambda t: (-pontuacao[t], t))
+        return ordenados[:limite] if limite else ordenados
@@ -0,0 +1,142 @@
+""" Caches em memória (por worker) """
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheVersionado:
+    """
+    Cache de um único valor, recarregado apenas quando a versão da fonte muda
+
+    A versão é barata de obter (mtime/tamanho/inode de um arquivo, contador
+    no banco...) e a carga completa só acontece quando ela muda.
+    """
+
+    def __init__(self, carregar, versao):
+        """
+        Args:
+            carregar: Função que lê o valor completo da fonte
+            versao: Função que retorna um identificador da versão atual da fonte
+        """
+        self._carregar = carregar
+        self._versao = versao
+        self._lock = threading.Lock()
+        # (valor, versão) numa única tupla: o caminho sem trava de obter()
+        # lê o par de uma vez e nunca vê o valor de uma versão com outra
+        self._entrada = (None, None)
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self):
+        """Retorna o valor em cache, recarregando se a fonte mudou"""
+        versao = self._versao()
+        valor, versao_valor = self._entrada
+        if versao_valor is not None and versao == versao_valor:
+            self.acertos += 1
+            return valor
+
+        with self._lock:
+            valor, versao_valor = self._entrada
+            if versao_valor is None or versao != versao_valor:
+                # Lê a versão antes da carga: se a fonte mudar no meio,
+                # a próxima chamada detecta a diferença e recarrega
+                valor = self._carregar()
+                self._entrada = (valor, versao)
+                self.falhas += 1
+            else:
+                self.acertos += 1
+            return valor
+
+    def versao(self):
+        """Versão do valor atualmente em cache"""
+        return self._entrada[1]
+
+    def atualizar(self, valor, versao):
+        """Substitui o valor em cache após uma escrita feita por este processo"""
+        with self._lock:
+            self._entrada = (valor, versao)
+
+    def invalidar(self):
+        """Força recarga na próxima chamada"""
+        with self._lock:
+            self._entrada = (None, None)
+
+    def estatisticas(self):
+        """Contadores de acertos e falhas para monitoramento"""
+        total = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': round(self.acertos / total, 4) if total else 0.0,
+        }
+
+
+class CacheLRU:
+    """
+    Cache chave -> valor com tamanho máximo (LRU) e tempo de vida (TTL)
+
+    Thread-safe; cada worker tem o seu.
+    """
+
+    def __init__(self, max_itens=1024, ttl=60.0):
+        """
+        Args:
+            max_itens: Quantidade máxima de itens (os menos usados saem primeiro)
+            ttl: Segundos que um item permanece válido (0 = sem expiração)
+        """
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave, padrao=None):
+        """Retorna o valor da chave ou `padrao` se ausente/expirado"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return padrao
+
+            valor, expira_em = item
+            if expira_em and expira_em < time.monotonic():
+                del self._itens[chave]
+                self.falhas += 1
+                return padrao
+
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def definir(self, chave, valor):
+        """Guarda um valor, descartando o item menos usado se estiver cheio"""
+        expira_em = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, chave):
+        """Remove uma chave do cache"""
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        """Remove todos os itens"""
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def estatisticas(self):
+        """Contadores de acertos e falhas para monitoramento"""
+        total = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'itens': len(self._itens),
+            'taxa_acerto': round(self.acertos / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,145 @@
+""" Cache persistente de respostas HTTP (SQLite) com TTL, LRU e revalidação """
+import os
+import sqlite3
+import threading
+import time
+
+ESQUEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS respostas (
+    chave         TEXT PRIMARY KEY,
+    corpo         TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    armazenado_em REAL NOT NULL,
+    acessado_em   REAL NOT NULL,
+    tamanho       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_respostas_acessado_em ON respostas (acessado_em);
+
+-- Tamanho total das respostas, mantido pelos gatilhos (sem SUM a cada gravação)
+CREATE TABLE IF NOT EXISTS totais (
+    id    INTEGER PRIMARY KEY CHECK (id = 1),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totais (id, bytes) SELECT 1, COALESCE(SUM(tamanho), 0) FROM respostas;
+CREATE TRIGGER IF NOT EXISTS trg_respostas_insert AFTER INSERT ON respostas
+BEGIN UPDATE totais SET bytes = bytes + NEW.tamanho WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS trg_respostas_update AFTER UPDATE OF tamanho ON respostas
+BEGIN UPDATE totais SET bytes = bytes - OLD.tamanho + NEW.tamanho WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS trg_respostas_delete AFTER DELETE ON respostas
+BEGIN UPDATE totais SET bytes = bytes - OLD.tamanho WHERE id = 1; END;
+COMMIT;
+"""
+
+# Acertos só regravam acessado_em se a marca for mais velha que isto (s):
+# a ordem do LRU não precisa de precisão de segundos, e a leitura não vira
+# uma transação de escrita disputada pelos workers
+INTERVALO_ACESSO = 60
+
+
+class CacheRespostas:
+    """
+    Respostas HTTP guardadas em disco, compartilhadas entre workers e reinícios
+
+    Cada entrada guarda o corpo e os validadores (ETag / Last-Modified) para
+    revalidação condicional depois que o TTL vence. O tamanho total é
+    limitado: ao passar do limite, as entradas acessadas há mais tempo saem
+    primeiro (LRU).
+    """
+
+    def __init__(self, arquivo='dados/cache_tmdb.db', max_bytes=50 * 1024 * 1024,
+                 intervalo_acesso=INTERVALO_ACESSO):
+        self.arquivo = arquivo
+        self.max_bytes = max_bytes
+        self.intervalo_acesso = intervalo_acesso
+        self._local = threading.local()
+        self.acertos = 0
+        self.revalidacoes = 0
+        self.falhas = 0
+        os.makedirs(os.path.dirname(arquivo) or '.', exist_ok=True)
+        self._conexao().executescript(ESQUEMA)
+
+    def _conexao(self):
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.arquivo, timeout=30, isolation_level=None)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def obter(self, chave):
+        """
+        Retorna a entrada da chave (dict com corpo, etag, last_modified e
+        armazenado_em) ou None
+        """
+        con = self._conexao()
+        linha = con.execute(
+            "SELECT corpo, etag, last_modified, armazenado_em, acessado_em FROM respostas WHERE chave = ?",
+            (chave,),
+        ).fetchone()
+        if linha is None:
+            return None
+        entrada = dict(linha)
+        agora = time.time()
+        if agora - entrada.pop('acessado_em') >= self.intervalo_acesso:
+            con.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, chave))
+        return entrada
+
+    def guardar(self, chave, corpo, etag=None, last_modified=None):
+        """Guarda (ou substitui) uma resposta e aplica o limite de tamanho"""
+        agora = time.time()
+        con = self._conexao()
+        # Upsert (e não INSERT OR REPLACE): a substituição passa pelo gatilho
+        # de UPDATE e o total em `totais` continua certo
+        con.execute(
+            "INSERT INTO respostas "
+            "(chave, corpo, etag, last_modified, armazenado_em, acessado_em, tamanho) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (chave) DO UPDATE SET corpo = excluded.corpo, etag = excluded.etag, "
+            "last_modified = excluded.last_modified, armazenado_em = excluded.armazenado_em, "
+            "acessado_em = excluded.acessado_em, tamanho = excluded.tamanho",
+            (chave, corpo, etag, last_modified, agora, agora, len(corpo.encode('utf-8'))),
+        )
+        self._despejar(con)
+
+    def renovar(self, chave):
+        """Marca a entrada como recém-validada (resposta 304 Not Modified)"""
+        agora = time.time()
+        self._conexao().execute(
+            "UPDATE respostas SET armazenado_em = ?, acessado_em = ? WHERE chave = ?", (agora, agora, chave)
+        )
+
+    def _despejar(self, con):
+        """Remove as entradas menos usadas até o total caber em max_bytes"""
+        total = con.execute("SELECT bytes FROM totais WHERE id = 1").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excesso = total - self.max_bytes
+        removidas = []
+        for linha in con.execute("SELECT chave, tamanho FROM respostas ORDER BY acessado_em"):
+            removidas.append((linha["chave"],))
+            excesso -= linha["tamanho"]
+            if excesso <= 0:
+                break
+        con.executemany("DELETE FROM respostas WHERE chave = ?", removidas)
+
+    def limpar(self):
+        """Remove todas as entradas"""
+        self._conexao().execute("DELETE FROM respostas")
+
+    def estatisticas(self):
+        """Contadores para monitoramento"""
+        linha = self._conexao().execute(
+            "SELECT (SELECT COUNT(*) FROM respostas), bytes FROM totais WHERE id = 1"
+        ).fetchone()
+        return {
+            'acertos': self.acertos,
+            'revalidacoes': self.revalidacoes,
+            'falhas': self.falhas,
+            'entradas': linha[0],
+            'bytes': linha[1],
+        }
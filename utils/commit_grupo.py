@@ -0,0 +1,150 @@
+""" Commit em grupo: junta escritas de várias requisições numa só """
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.metricas import metricas
+
+# Limites (inclusivos) das faixas do histograma de tamanho dos lotes
+FAIXAS_TAMANHO_LOTE = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class CommitEmGrupo:
+    """
+    Escritor que agrupa itens enviados por threads concorrentes
+
+    Cada `enviar(item)` entra numa fila; uma thread escritora pega o primeiro
+    item, espera no máximo `espera_maxima` segundos (ou até juntar
+    `max_itens`) por outros e chama `executar_lote(itens)` uma única vez. Quem
+    enviou só recebe a resposta depois que o lote inteiro foi gravado, então
+    o custo de uma escrita durável (fsync, commit) é dividido pelo lote.
+
+    Com pouco movimento o lote tem um item só e a espera é curta: o primeiro
+    item de uma fila vazia espera no máximo `espera_maxima`.
+    """
+
+    def __init__(self, executar_lote, max_itens=64, espera_maxima=0.005, nome='commit-grupo'):
+        """
+        Args:
+            executar_lote: Função que recebe a lista de itens e retorna a lista
+                de resultados, na mesma ordem
+            max_itens: Tamanho máximo de um lote
+            espera_maxima: Tempo máximo (s) que um item espera o lote encher
+            nome: Nome da thread escritora
+        """
+        self.executar_lote = executar_lote
+        self.max_itens = max(1, int(max_itens))
+        self.espera_maxima = max(0.0, espera_maxima)
+        self.nome = nome
+        self._fila = queue.SimpleQueue()
+        self._escritor = None
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.lotes = 0
+        self.itens = 0
+        self.falhas = 0
+        self.maior_lote = 0
+        self.tempo_commit_total = 0.0
+        self.tempo_commit_maximo = 0.0
+        self.espera_total = 0.0
+        self.histograma = {faixa: 0 for faixa in FAIXAS_TAMANHO_LOTE}
+        self.histograma['+Inf'] = 0
+
+    def enviar(self, item):
+        """
+        Entrega o item para o próximo lote e espera a gravação
+
+        Returns:
+            Resultado do item devolvido por `executar_lote`
+
+        Raises:
+            A exceção levantada por `executar_lote`, se o lote falhar
+        """
+        if self._escritor is None:
+            self._iniciar()
+        futuro = Future()
+        self._fila.put((item, futuro, time.perf_counter()))
+        return futuro.result()
+
+    # ================== ESCRITOR ==================
+
+    def _iniciar(self):
+        with self._lock:
+            if self._escritor is None:
+                self._escritor = threading.Thread(target=self._laco, name=self.nome, daemon=True)
+                self._escritor.start()
+
+    def _juntar_lote(self):
+        """Bloqueia até o primeiro item e junta o que chegar até o prazo"""
+        lote = [self._fila.get()]
+        prazo = time.perf_counter() + self.espera_maxima
+        while len(lote) < self.max_itens:
+            restante = prazo - time.perf_counter()
+            try:
+                lote.append(self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _laco(self):
+        # Qualquer falha (inclusive BaseException) vai para os futuros do lote:
+        # se a thread morresse, todo enviar() seguinte esperaria para sempre
+        while True:
+            lote = self._juntar_lote()
+            inicio = time.perf_counter()
+            try:
+                resultados = self.executar_lote([item for item, _, _ in lote])
+                if len(resultados) != len(lote):
+                    raise RuntimeError("executar_lote deve devolver um resultado por item")
+            except BaseException as e:
+                self.falhas += 1
+                for _, futuro, _ in lote:
+                    futuro.set_exception(e)
+                continue
+            finally:
+                try:
+                    self._registrar(lote, inicio)
+                except Exception as e:
+                    print(f"Erro ao registrar métricas do commit em grupo: {e}")
+
+            for (_, futuro, _), resultado in zip(lote, resultados):
+                futuro.set_result(resultado)
+
+    # ================== MÉTRICAS ==================
+
+    def _registrar(self, lote, inicio):
+        fim = time.perf_counter()
+        duracao = fim - inicio
+        tamanho = len(lote)
+
+        self.lotes += 1
+        self.itens += tamanho
+        self.maior_lote = max(self.maior_lote, tamanho)
+        self.tempo_commit_total += duracao
+        self.tempo_commit_maximo = max(self.tempo_commit_maximo, duracao)
+        metricas.registrar('commit_grupo', self.nome, duracao)
+        self.espera_total += sum(inicio - enviado for _, _, enviado in lote)
+        for faixa in FAIXAS_TAMANHO_LOTE:
+            if tamanho <= faixa:
+                self.histograma[faixa] += 1
+                break
+        else:
+            self.histograma['+Inf'] += 1
+
+    def estatisticas(self):
+        """Tamanho dos lotes, tempo de commit e espera média por item"""
+        return {
+            'lotes': self.lotes,
+            'itens': self.itens,
+            'falhas': self.falhas,
+            'tamanho_medio': round(self.itens / self.lotes, 2) if self.lotes else 0.0,
+            'maior_lote': self.maior_lote,
+            'commit_medio_ms': round(self.tempo_commit_total / self.lotes * 1000, 3) if self.lotes else 0.0,
+            'commit_maximo_ms': round(self.tempo_commit_maximo * 1000, 3),
+            'espera_media_ms': round(self.espera_total / self.itens * 1000, 3) if self.itens else 0.0,
+            'histograma_tamanho': {str(faixa): total for faixa, total in self.histograma.items()},
+            'max_itens': self.max_itens,
+            'espera_maxima_ms': self.espera_maxima * 1000,
+        }
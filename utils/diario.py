@@ -0,0 +1,249 @@
+""" Diário de vendas em JSON Lines (somente acréscimo) """
+import json
+import os
+import threading
+import time
+
+from utils.helpers import carregar_json
+from utils.metricas import metricas
+from utils.travas import trava_arquivo
+
+
+class DiarioVendas:
+    """
+    Registro de vendas append-only: uma venda por linha (JSON Lines)
+
+    Registrar uma venda custa um único append no fim do arquivo, em vez de
+    reler e reescrever o histórico inteiro. O fsync é feito em lotes para
+    não pagar uma sincronização de disco por compra.
+    """
+
+    def __init__(self, arquivo, arquivo_legado=None, fsync_lote=1, fsync_intervalo=0.0):
+        """
+        Args:
+            arquivo: Caminho do diário (.jsonl)
+            arquivo_legado: historico.json antigo (lista JSON) a migrar, se existir
+            fsync_lote: Faz fsync a cada N vendas anexadas
+            fsync_intervalo: Faz fsync se passou este tempo (s) desde o último
+        """
+        self.arquivo = arquivo
+        self.arquivo_legado = arquivo_legado
+        # Serializa migração e reescritas entre workers (os acréscimos não travam)
+        self.arquivo_trava = f"{arquivo}.lock"
+        self.fsync_lote = max(1, int(fsync_lote))
+        self.fsync_intervalo = fsync_intervalo
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._ultimo_fsync = time.monotonic()
+
+        os.makedirs(os.path.dirname(arquivo) or '.', exist_ok=True)
+        self._migrar_legado()
+
+    # ================== ESCRITA ==================
+
+    def anexar(self, venda):
+        """Anexa uma venda ao fim do diário"""
+        self.anexar_varias([venda])
+
+    def anexar_varias(self, vendas, sincronizar=False):
+        """
+        Anexa várias vendas com uma única escrita
+
+        Args:
+            vendas: Lista de vendas
+            sincronizar: Faz fsync agora, sem esperar completar o lote de fsync
+        """
+        if not vendas:
+            return
+
+        dados = ''.join(self._serializar(venda) for venda in vendas).encode('utf-8')
+
+        with self._lock, metricas.medir('armazenamento', 'anexar_diario'):
+            # O_APPEND + um único write: linhas de processos diferentes não se misturam
+            fd = os.open(self.arquivo, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, dados)
+                self._pendentes += len(vendas)
+                if sincronizar or self._deve_sincronizar():
+                    os.fsync(fd)
+                    self._pendentes = 0
+                    self._ultimo_fsync = time.monotonic()
+            finally:
+                os.close(fd)
+
+    def reescrever(self, vendas):
+        """
+        Substitui todo o conteúdo do diário (arquivo temporário + rename)
+
+        Usado apenas em manutenção (compactação, migração); o caminho de compra
+        usa sempre anexar().
+        """
+        with trava_arquivo(self.arquivo_trava):
+            self._reescrever(vendas)
+
+    def _reescrever(self, vendas):
+        """reescrever() sem a trava entre processos (chamar com ela adquirida)"""
+        temporario = f"{self.arquivo}.{os.getpid()}.tmp"
+        with self._lock:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                for venda in vendas:
+                    f.write(self._serializar(venda))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.arquivo)
+            self._pendentes = 0
+
+    def compactar(self):
+        """
+        Reescreve o diário descartando linhas corrompidas ou incompletas
+        (por exemplo, um append interrompido por queda do servidor)
+
+        Returns:
+            Quantidade de vendas mantidas
+        """
+        mantidas = 0
+
+        def vendas():
+            nonlocal mantidas
+            for venda in self.iterar():
+                mantidas += 1
+                yield venda
+
+        # Lê o diário atual enquanto grava o temporário: memória constante
+        self.reescrever(vendas())
+        return mantidas
+
+    # ================== LEITURA ==================
+
+    def iterar(self):
+        """Gera as vendas uma a uma, sem carregar o arquivo inteiro na memória"""
+        try:
+            with open(self.arquivo, 'r', encoding='utf-8') as f:
+                for numero, linha in enumerate(f, start=1):
+                    linha = linha.strip()
+                    if not linha:
+                        continue
+                    try:
+                        yield json.loads(linha)
+                    except json.JSONDecodeError:
+                        print(f"Linha {numero} inválida em {self.arquivo}. Ignorando.")
+        except FileNotFoundError:
+            return
+
+    def carregar(self):
+        """Carrega todas as vendas em uma lista"""
+        return list(self.iterar())
+
+    def iterar_desde(self, posicao=0):
+        """
+        Gera (venda, posicao_final) a partir do byte `posicao` do diário
+
+        A posição final de cada venda serve para retomar a leitura depois
+        (resumos incrementais, paginação). Uma última linha sem quebra de
+        linha é um append em andamento e não é consumida.
+        """
+        try:
+            with open(self.arquivo, 'rb') as f:
+                f.seek(posicao)
+                for linha in f:
+                    if not linha.endswith(b'\n'):
+                        return
+                    posicao += len(linha)
+                    linha = linha.strip()
+                    if not linha:
+                        continue
+                    try:
+                        yield json.loads(linha), posicao
+                    except json.JSONDecodeError:
+                        print(f"Linha inválida em {self.arquivo} (byte {posicao}). Ignorando.")
+        except FileNotFoundError:
+            return
+
+    def buscar_posicao(self, chave, alvo):
+        """
+        Busca binária no diário: posição (byte) da primeira linha com chave >= alvo
+
+        Vale quando o diário está ordenado pela chave (ex: data da venda,
+        já que as vendas são anexadas em ordem cronológica). Linhas sem
+        chave válida são tratadas como menores que o alvo.
+
+        Args:
+            chave: Função venda -> valor comparável (ou None)
+            alvo: Valor procurado
+        """
+        _, tamanho = self.identidade()
+        baixo, alto = 0, tamanho
+
+        try:
+            with open(self.arquivo, 'rb') as f:
+                def inicio_linha(posicao):
+                    # Primeira linha que começa em `posicao` ou depois
+                    if posicao == 0:
+                        return 0
+                    f.seek(posicao - 1)
+                    f.readline()
+                    return f.tell()
+
+                while baixo < alto:
+                    meio = (baixo + alto) // 2
+                    f.seek(inicio_linha(meio))
+                    linha = f.readline()
+                    if not linha.endswith(b'\n'):
+                        alto = meio
+                        continue
+                    try:
+                        valor = chave(json.loads(linha))
+                    except json.JSONDecodeError:
+                        valor = None
+                    if valor is None or valor < alvo:
+                        baixo = meio + 1
+                    else:
+                        alto = meio
+
+                return inicio_linha(baixo)
+        except FileNotFoundError:
+            return 0
+
+    def identidade(self):
+        """
+        (inode, tamanho) do diário
+
+        O inode muda quando o diário é reescrito (compactação), o que
+        invalida posições guardadas anteriormente.
+        """
+        try:
+            info = os.stat(self.arquivo)
+        except FileNotFoundError:
+            return None, 0
+        return info.st_ino, info.st_size
+
+    # ================== INTERNOS ==================
+
+    @staticmethod
+    def _serializar(venda):
+        return json.dumps(venda, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    def _deve_sincronizar(self):
+        if self._pendentes >= self.fsync_lote:
+            return True
+        return time.monotonic() - self._ultimo_fsync >= self.fsync_intervalo > 0
+
+    def _migrar_legado(self):
+        """
+        Converte o historico.json antigo para o diário, uma única vez
+
+        Vários workers iniciam juntos: só migra quem pegar a trava e ainda
+        não encontrar o diário, senão um os.replace tardio apagaria vendas
+        já anexadas por outro worker.
+        """
+        if os.path.exists(self.arquivo):
+            return
+        if not self.arquivo_legado or not os.path.exists(self.arquivo_legado):
+            return
+
+        with trava_arquivo(self.arquivo_trava):
+            if os.path.exists(self.arquivo):
+                return
+            vendas = carregar_json(self.arquivo_legado, [])
+            self._reescrever(vendas)
+        print(f"✅ Histórico migrado para {self.arquivo} ({len(vendas)} vendas)")
@@ -0,0 +1,74 @@
+""" Fila de expiração (heap) para reservas temporárias """
+import heapq
+import itertools
+import threading
+
+
+class FilaExpiracao:
+    """
+    Chaves com prazo de validade, ordenadas num heap pelo vencimento
+
+    agendar/cancelar/renovar são O(log n) / O(1) e o próximo vencimento é
+    consultado em O(1), então a varredura só trabalha quando há algo vencido.
+    Cancelamentos são preguiçosos: a entrada antiga fica no heap e é
+    descartada quando chega ao topo.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._prazos = {}  # chave -> vencimento atual
+        self._sequencia = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._prazos)
+
+    def __contains__(self, chave):
+        return chave in self._prazos
+
+    def agendar(self, chave, expira_em):
+        """Agenda (ou reagenda) o vencimento de uma chave"""
+        with self._lock:
+            self._prazos[chave] = expira_em
+            heapq.heappush(self._heap, (expira_em, next(self._sequencia), chave))
+            # Muitas entradas canceladas/reagendadas: reconstrói o heap só com as atuais
+            if len(self._heap) > 2 * len(self._prazos) + 64:
+                self._heap = [(prazo, next(self._sequencia), c) for c, prazo in self._prazos.items()]
+                heapq.heapify(self._heap)
+
+    def cancelar(self, chave):
+        """Remove a chave; retorna False se ela não estava agendada"""
+        with self._lock:
+            return self._prazos.pop(chave, None) is not None
+
+    def prazo(self, chave):
+        """Vencimento atual da chave (ou None)"""
+        return self._prazos.get(chave)
+
+    def proximo_vencimento(self):
+        """Menor vencimento agendado (ou None se a fila estiver vazia)"""
+        with self._lock:
+            self._descartar_cancelados()
+            return self._heap[0][0] if self._heap else None
+
+    def vencidos(self, agora):
+        """Remove e retorna as chaves vencidas até `agora`, da mais antiga à mais nova"""
+        vencidas = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= agora:
+                expira_em, _, chave = heapq.heappop(self._heap)
+                if self._prazos.get(chave) == expira_em:
+                    del self._prazos[chave]
+                    vencidas.append(chave)
+            self._descartar_cancelados()
+        return vencidas
+
+    def limpar(self):
+        with self._lock:
+            self._heap.clear()
+            self._prazos.clear()
+
+    def _descartar_cancelados(self):
+        heap = self._heap
+        while heap and self._prazos.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
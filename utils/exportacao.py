@@ -0,0 +1,98 @@
+""" Exportação do histórico de vendas em CSV ou JSON Lines, em streaming """
+import csv
+import io
+import json
+import zlib
+
+from utils.helpers import timestamp_venda
+
+# Colunas do CSV (os assentos viram texto separado por espaço)
+CAMPOS_CSV = ('data', 'timestamp', 'filme', 'tipo', 'quantidade', 'total', 'sessao', 'assentos')
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# Tamanho aproximado (bytes) de cada pedaço enviado ao cliente
+TAMANHO_PEDACO = 64 * 1024
+
+
+def _agrupar(textos, tamanho=TAMANHO_PEDACO):
+    """Junta as linhas em pedaços de ~`tamanho` bytes (menos escritas no socket)"""
+    buffer, acumulado = [], 0
+    for texto in textos:
+        dados = texto.encode('utf-8')
+        buffer.append(dados)
+        acumulado += len(dados)
+        if acumulado >= tamanho:
+            yield b''.join(buffer)
+            buffer, acumulado = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _linha_csv(venda):
+    assentos = venda.get('assentos')
+    if isinstance(assentos, (list, tuple)):
+        assentos = ' '.join(str(assento) for assento in assentos)
+    return (venda.get('data'), timestamp_venda(venda), venda.get('filme'), venda.get('tipo'),
+            venda.get('quantidade'), venda.get('total'), venda.get('sessao'), assentos)
+
+
+def linhas_csv(vendas):
+    """Gera o CSV (cabeçalho + uma linha por venda) em pedaços de texto"""
+    saida = io.StringIO()
+    escritor = csv.writer(saida, lineterminator='\n')
+    escritor.writerow(CAMPOS_CSV)
+    for venda in vendas:
+        escritor.writerow(_linha_csv(venda))
+        if saida.tell() >= TAMANHO_PEDACO:
+            yield saida.getvalue()
+            saida.seek(0)
+            saida.truncate()
+    if saida.tell():
+        yield saida.getvalue()
+
+
+def linhas_jsonl(vendas):
+    """Gera uma venda por linha, em JSON (todos os campos)"""
+    for venda in vendas:
+        if 'timestamp' not in venda:
+            venda = dict(venda, timestamp=timestamp_venda(venda))
+        yield json.dumps(venda, ensure_ascii=False) + '\n'
+
+
+def comprimir_gzip(pedacos, nivel=6):
+    """Comprime os pedaços em gzip à medida que são gerados"""
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+    for pedaco in pedacos:
+        comprimido = compressor.compress(pedaco)
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+
+def exportar_vendas(vendas, formato='csv', gzip=False):
+    """
+    Serializa as vendas em pedaços de bytes, em memória constante
+
+    Args:
+        vendas: Iterável de vendas (ex: RepositorioVendas.iterar_filtrado)
+        formato: 'csv' ou 'jsonl'
+        gzip: Comprime a saída (arquivo .gz)
+
+    Returns:
+        Gerador de bytes
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato}")
+    linhas = linhas_csv(vendas) if formato == 'csv' else linhas_jsonl(vendas)
+    pedacos = _agrupar(linhas)
+    return comprimir_gzip(pedacos) if gzip else pedacos
+
+
+def nome_arquivo(formato, gzip=False, sufixo=''):
+    """Nome sugerido do arquivo exportado (vendas-<sufixo>.csv[.gz])"""
+    nome = f"vendas{'-' + sufixo if sufixo else ''}.{formato}"
+    return nome + '.gz' if gzip else nome
@@ -1,7 +1,14 @@
 """ Funções auxiliares do sistema """
 import json
 import os
+import threading
+from datetime import datetime
+from functools import lru_cache
 from config import Config
+from utils.metricas import metricas
+
+# Formato das datas gravadas nas vendas
+FORMATO_DATA = "%d/%m/%Y %H:%M"
 
 def criar_diretorios():
     """Cria diretórios necessários se não existirem"""
@@ -26,7 +33,7 @@ def carregar_json(arquivo, padrao=None):
         padrao = {}
     
     try:
-        with open(arquivo, 'r', encoding='utf-8') as f:
+        with metricas.medir('armazenamento', 'carregar_json'), open(arquivo, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
         return padrao
@@ -36,36 +43,181 @@ def carregar_json(arquivo, padrao=None):
     
 def salvar_json(arquivo, dados):
     """
-    Salva dados em um arquivo JSON
+    Salva dados em um arquivo JSON de forma atômica
+    
+    Escreve em um arquivo temporário e troca pelo original com os.replace,
+    assim uma queda no meio da escrita nunca deixa o arquivo truncado.
     
     Args:
         arquivo: Caminho do arquivo
         dados: Dados a serem salvos
     """
     # Garante que o diretório existe
-    os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+    os.makedirs(os.path.dirname(arquivo) or '.', exist_ok=True)
 
-    with open(arquivo, 'w', encoding='utf-8') as f:
-        json.dump(dados, f, indent=2, ensure_ascii=False)
+    temporario = f"{arquivo}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with metricas.medir('armazenamento', 'salvar_json'):
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, arquivo)
 
-def mesclar_filmes(filmes_atuais, filmes_novos, manter_estoque=True):
+def timestamp_venda(venda):
     """
-    Mescla filmes atuais com novos filmes da API
+    Retorna o instante da venda em segundos desde a época (epoch)
+
+    Usa o campo 'timestamp' quando existir; senão converte o campo 'data'.
+    
+    Returns:
+        Inteiro ou None se a data for inválida
+    """
+    if venda.get('timestamp') is not None:
+        return int(venda['timestamp'])
+    return _timestamp_data(venda.get('data', ''))
+
+def _timestamp_data(data):
+    # O strptime é lento: converte só "dd/mm/aaaa HH" (com cache, uma vez por
+    # hora do histórico) e soma os minutos. Mudanças de horário de verão
+    # acontecem em hora cheia, então a soma não cruza a mudança.
+    if isinstance(data, str) and len(data) > 3 and data[-3] == ':' and data[-2:].isdigit():
+        minutos = int(data[-2:])
+        hora = _timestamp_hora(data[:-3])
+        if hora is not None and minutos < 60:
+            return hora + minutos * 60
+    try:
+        return int(datetime.strptime(data, FORMATO_DATA).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+@lru_cache(maxsize=16384)
+def _timestamp_hora(prefixo):
+    try:
+        return int(datetime.strptime(prefixo, "%d/%m/%Y %H").timestamp())
+    except ValueError:
+        return None
+
+def venda_atende_filtros(venda, filme=None, tipo=None, inicio=None, fim=None):
+    """
+    Verifica se uma venda passa nos filtros do histórico
     
+    Args:
+        venda: Dicionário da venda
+        filme: Título exato do filme
+        tipo: 'Meia' ou 'Inteira'
+        inicio: Epoch inicial (inclusivo)
+        fim: Epoch final (exclusivo)
+    """
+    if filme and venda.get('filme') != filme:
+        return False
+    if tipo and venda.get('tipo') != tipo:
+        return False
+    if inicio is not None or fim is not None:
+        instante = timestamp_venda(venda)
+        if instante is None:
+            return False
+        if inicio is not None and instante < inicio:
+            return False
+        if fim is not None and instante >= fim:
+            return False
+    return True
+
+# Campos definidos no sistema (admin), preservados quando o TMDB é consultado de novo
+CAMPOS_LOCAIS = ('estoque', 'preco')
+
+# Origem dos filmes trazidos pela listagem do TMDB (atualização do catálogo):
+# só eles são retirados quando saem da listagem
+ORIGEM_LISTAGEM = 'listagem'
+
+def filme_retirado(dados):
+    """Filme que saiu do catálogo do TMDB: continua guardado (histórico), mas não é vendido"""
+    return bool(dados.get('retirado'))
+
+def filmes_em_cartaz(filmes):
+    """Catálogo sem os filmes retirados"""
+    return {titulo: dados for titulo, dados in filmes.items() if not dados.get('retirado')}
+
+def mesclar_catalogo(filmes_atuais, filmes_novos, manter_estoque=True):
+    """
+    Mescla o catálogo atual com os filmes vindos da API, sem apagar nada
+
+    Cada filme novo é casado com o atual pelo tmdb_id (ou pelo título, se um
+    dos dois não tiver tmdb_id). O filme casado mantém o título do catálogo
+    (as vendas apontam para ele) e, com manter_estoque, o estoque e o preço
+    locais; os demais campos vêm da API. Os filmes adicionados aqui ganham
+    origem 'listagem'; os atuais dessa origem que a API não trouxe são
+    marcados como retirados em vez de removidos e voltam se reaparecerem.
+    Filmes importados ou cadastrados de outra forma (ou de antes da origem
+    existir) nunca são retirados pela mescla.
+
+    Tempo linear: um índice por tmdb_id e uma passada em cada catálogo.
+    Filmes sem mudança continuam sendo o mesmo objeto, e o repositório
+    SQLite só grava as linhas alteradas.
+
     Args:
         filmes_atuais: Dicionário com filmes atuais
         filmes_novos: Dicionário com filmes novos da API
-        manter_estoque: Se True, mantém estoque dos filmes existentes
-        
+        manter_estoque: Se True, mantém estoque e preço dos filmes existentes
+
+    Returns:
+        Tupla (filmes mesclados, diferença) — diferença com as listas de
+        títulos 'adicionados', 'atualizados', 'retirados' e 'ignorados'
+        (filme novo com o título de outro já no catálogo, sem ano que
+        os diferencie)
+    """
+    por_tmdb = {dados['tmdb_id']: titulo for titulo, dados in filmes_atuais.items()
+                if dados.get('tmdb_id') is not None}
+    mesclados = dict(filmes_atuais)
+    diferenca = {'adicionados': [], 'atualizados': [], 'retirados': [], 'ignorados': []}
+    vistos = set()
+
+    for titulo, dados in filmes_novos.items():
+        tmdb_id = dados.get('tmdb_id')
+        atual = por_tmdb.get(tmdb_id) if tmdb_id is not None else None
+        if atual is None and titulo in filmes_atuais:
+            existente = filmes_atuais[titulo].get('tmdb_id')
+            if existente is None or tmdb_id is None:
+                atual = titulo
+
+        if atual is None:
+            # Outro filme com o mesmo título (remake): diferencia pelo ano
+            if titulo in mesclados and dados.get('ano'):
+                titulo = f"{titulo} ({dados['ano']})"
+            if titulo in mesclados:
+                diferenca['ignorados'].append(titulo)
+                continue
+            mesclados[titulo] = {**dados, 'origem': ORIGEM_LISTAGEM}
+            vistos.add(titulo)
+            diferenca['adicionados'].append(titulo)
+            continue
+
+        if atual in vistos:
+            continue
+        vistos.add(atual)
+        anterior = filmes_atuais[atual]
+        novo = {**anterior, **dados}
+        novo.pop('retirado', None)
+        if manter_estoque:
+            for campo in CAMPOS_LOCAIS:
+                if campo in anterior:
+                    novo[campo] = anterior[campo]
+        if novo != anterior:
+            mesclados[atual] = novo
+            diferenca['atualizados'].append(atual)
+
+    for titulo, dados in filmes_atuais.items():
+        if (titulo not in vistos and dados.get('origem') == ORIGEM_LISTAGEM
+                and not dados.get('retirado')):
+            mesclados[titulo] = {**dados, 'retirado': True}
+            diferenca['retirados'].append(titulo)
+
+    return mesclados, diferenca
+
+def mesclar_filmes(filmes_atuais, filmes_novos, manter_estoque=True):
+    """
+    Mescla filmes atuais com novos filmes da API (ver mesclar_catalogo)
+
     Returns:
         Dicionário com filmes mesclados
     """
-    filmes_mesclados = filmes_novos.copy()
-
-    if manter_estoque:
-        for titulo, dados in filmes_mesclados.items():
-            if titulo in filmes_atuais:
-                # Mantém o estoque do filme atual
-                dados['estoque'] = filmes_atuais[titulo]['estoque']
-                
-    return filmes_mesclados
\ No newline at end of file
+    return mesclar_catalogo(filmes_atuais, filmes_novos, manter_estoque)[0]
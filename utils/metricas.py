@@ -0,0 +1,188 @@
+""" Métricas de latência (histogramas) no formato texto do Prometheus """
+import threading
+import time
+
+# Limites (segundos) das faixas dos histogramas de latência
+FAIXAS_PADRAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """
+    Histograma cumulativo por combinação de rótulos (como no Prometheus)
+
+    Cada observação custa uma busca linear nas faixas (poucas) e três
+    somas sob um lock.
+    """
+
+    def __init__(self, nome, ajuda, rotulos=(), faixas=FAIXAS_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.faixas = tuple(sorted(faixas))
+        self._series = {}  # valores dos rótulos -> [contagens por faixa..., +Inf, soma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores_rotulos):
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [0] * (len(self.faixas) + 1) + [0.0]
+            for posicao, limite in enumerate(self.faixas):
+                if valor <= limite:
+                    serie[posicao] += 1
+                    break
+            else:
+                serie[len(self.faixas)] += 1
+            serie[-1] += valor
+
+    def exportar(self):
+        """Linhas no formato texto do Prometheus (faixas acumuladas)"""
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            series = {rotulos: list(serie) for rotulos, serie in self._series.items()}
+
+        for valores, serie in sorted(series.items()):
+            base = [f'{rotulo}="{_escapar(valor)}"' for rotulo, valor in zip(self.rotulos, valores)]
+            acumulado = 0
+            for limite, quantidade in zip(self.faixas + ('+Inf',), serie):
+                acumulado += quantidade
+                rotulos = ','.join(base + [f'le="{limite}"'])
+                linhas.append(f"{self.nome}_bucket{{{rotulos}}} {acumulado}")
+            sufixo = '{' + ','.join(base) + '}' if base else ''
+            linhas.append(f"{self.nome}_sum{sufixo} {serie[-1]:.6f}")
+            linhas.append(f"{self.nome}_count{sufixo} {acumulado}")
+        return linhas
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metricas:
+    """
+    Registro de histogramas e acumulador de tempos por requisição
+
+    Desligado (`ativo = False`), `medir` devolve um contexto vazio já pronto
+    e nada é registrado: o custo nos pontos instrumentados é uma checagem de
+    atributo. Ligado, cada trecho medido vai para o histograma do tipo e,
+    se houver uma requisição em andamento na thread, soma no tempo daquela
+    requisição (usado no cabeçalho Server-Timing).
+
+    As métricas são por processo: com vários workers do gunicorn, cada um
+    responde o /metrics com os próprios números.
+    """
+
+    def __init__(self, ativo=False):
+        self.ativo = ativo
+        self._histogramas = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def histograma(self, nome, ajuda, rotulos=(), faixas=FAIXAS_PADRAO):
+        """Histograma registrado com esse nome (criado na primeira chamada)"""
+        histograma = self._histogramas.get(nome)
+        if histograma is None:
+            with self._lock:
+                histograma = self._histogramas.setdefault(nome, Histograma(nome, ajuda, rotulos, faixas))
+        return histograma
+
+    # ================== MEDIÇÃO ==================
+
+    def medir(self, tipo, operacao):
+        """
+        Mede o bloco `with` e registra em cinema_<tipo>_segundos{operacao=...}
+
+        Args:
+            tipo: Grupo da medida (armazenamento, template, tmdb, senha)
+            operacao: Operação dentro do grupo (carregar_json, movie/popular...)
+        """
+        if not self.ativo:
+            return _NULO
+        return _Cronometro(self, tipo, operacao)
+
+    def registrar(self, tipo, operacao, duracao):
+        """Registra uma duração já medida (segundos)"""
+        if not self.ativo:
+            return
+        self.histograma(
+            f"cinema_{tipo}_segundos", f"Duração das operações de {tipo} (segundos)", ('operacao',)
+        ).observar(duracao, operacao)
+
+        tempos = getattr(self._local, 'tempos', None)
+        if tempos is not None:
+            tempos[tipo] = tempos.get(tipo, 0.0) + duracao
+
+    # ================== REQUISIÇÕES ==================
+
+    def iniciar_requisicao(self):
+        """Começa a acumular os tempos da requisição desta thread"""
+        self._local.tempos = {}
+        self._local.inicio = time.perf_counter()
+
+    def encerrar_requisicao(self, rota, metodo, status):
+        """
+        Registra a duração total da requisição
+
+        Returns:
+            Dicionário {tipo: segundos} com os tempos acumulados, incluindo 'total'
+        """
+        tempos = getattr(self._local, 'tempos', None)
+        if tempos is None:
+            return {}
+        total = time.perf_counter() - self._local.inicio
+        self._local.tempos = None
+
+        self.histograma(
+            "cinema_requisicao_segundos", "Duração das requisições HTTP (segundos)",
+            ('rota', 'metodo', 'status'),
+        ).observar(total, rota, metodo, str(status))
+
+        tempos['total'] = total
+        return tempos
+
+    # ================== EXPORTAÇÃO ==================
+
+    def exportar(self):
+        """Todas as métricas no formato texto do Prometheus"""
+        linhas = []
+        for nome in sorted(self._histogramas):
+            linhas.extend(self._histogramas[nome].exportar())
+        return '\n'.join(linhas) + '\n'
+
+
+def server_timing(tempos):
+    """Valor do cabeçalho Server-Timing: 'armazenamento;dur=1.20, total;dur=8.31' (ms)"""
+    return ', '.join(f"{tipo};dur={duracao * 1000:.2f}" for tipo, duracao in tempos.items())
+
+
+class _Cronometro:
+    __slots__ = ('metricas', 'tipo', 'operacao', 'inicio')
+
+    def __init__(self, metricas, tipo, operacao):
+        self.metricas = metricas
+        self.tipo = tipo
+        self.operacao = operacao
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        self.metricas.registrar(self.tipo, self.operacao, time.perf_counter() - self.inicio)
+        return False
+
+
+class _ContextoNulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+
+_NULO = _ContextoNulo()
+
+# Registro global usado pelos pontos instrumentados (ligado pela aplicação)
+metricas = Metricas()
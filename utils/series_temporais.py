@@ -0,0 +1,118 @@
+""" Séries temporais em colunas (array) com baldes de tamanho fixo """
+import base64
+from array import array
+
+
+class SerieTemporal:
+    """
+    Agregados por balde (hora, dia...) guardados em colunas densas
+
+    Cada coluna é um `array` (inteiros de 64 bits ou double) indexado pelo
+    número do balde menos `inicio`: somar uma venda é O(1) e percorrer um
+    intervalo de baldes é uma fatia contígua, sem dicionários por balde.
+    Um ano de baldes por hora ocupa ~8.760 posições por coluna.
+
+    O número do balde é decidido por quem usa a série (ex: epoch // 3600
+    para horas, date.toordinal() para dias).
+    """
+
+    __slots__ = ('colunas', 'inicio', '_dados')
+
+    def __init__(self, colunas, inicio=None, dados=None):
+        """
+        Args:
+            colunas: Dicionário {nome: código do array} ('q' inteiro, 'd' double)
+            inicio: Número do primeiro balde (None = série vazia)
+            dados: Colunas já preenchidas {nome: array} (ex: lidas de um arquivo)
+        """
+        self.colunas = dict(colunas)
+        self.inicio = inicio
+        self._dados = dados or {nome: array(codigo) for nome, codigo in self.colunas.items()}
+
+    def __len__(self):
+        return len(next(iter(self._dados.values()))) if self._dados else 0
+
+    @property
+    def fim(self):
+        """Número do último balde (None se a série estiver vazia)"""
+        return None if self.inicio is None else self.inicio + len(self) - 1
+
+    def _garantir(self, balde):
+        """Estende as colunas para incluir `balde` (antes ou depois do intervalo atual)"""
+        if self.inicio is None:
+            self.inicio = balde
+        if balde < self.inicio:
+            faltando = self.inicio - balde
+            for nome, coluna in self._dados.items():
+                self._dados[nome] = array(coluna.typecode, bytes(faltando * coluna.itemsize)) + coluna
+            self.inicio = balde
+        tamanho = balde - self.inicio + 1
+        if tamanho > len(self):
+            faltando = tamanho - len(self)
+            for coluna in self._dados.values():
+                coluna.frombytes(bytes(faltando * coluna.itemsize))
+        return balde - self.inicio
+
+    def somar(self, balde, **valores):
+        """Soma os valores nas colunas do balde"""
+        posicao = self._garantir(balde)
+        for nome, valor in valores.items():
+            self._dados[nome][posicao] += valor
+
+    def intervalo(self, primeiro, ultimo):
+        """
+        Colunas do balde `primeiro` ao `ultimo` (inclusivos), com zeros
+        nos baldes sem dados
+
+        Returns:
+            Dicionário {coluna: lista}
+        """
+        tamanho = ultimo - primeiro + 1
+        if tamanho <= 0:
+            return {nome: [] for nome in self._dados}
+
+        resultado = {}
+        for nome, coluna in self._dados.items():
+            valores = [0] * tamanho
+            if self.inicio is not None:
+                de = max(primeiro, self.inicio)
+                ate = min(ultimo, self.fim)
+                if de <= ate:
+                    valores[de - primeiro:ate - primeiro + 1] = coluna[de - self.inicio:ate - self.inicio + 1]
+            resultado[nome] = valores
+        return resultado
+
+    def baldes(self, primeiro=None, ultimo=None):
+        """Gera (balde, {coluna: valor}) dos baldes com alguma venda no intervalo"""
+        if self.inicio is None:
+            return
+        de = self.inicio if primeiro is None else max(primeiro, self.inicio)
+        ate = self.fim if ultimo is None else min(ultimo, self.fim)
+        nomes = list(self._dados)
+        colunas = [self._dados[nome] for nome in nomes]
+        for posicao in range(de - self.inicio, ate - self.inicio + 1):
+            valores = [coluna[posicao] for coluna in colunas]
+            if any(valores):
+                yield self.inicio + posicao, dict(zip(nomes, valores))
+
+    # ================== SERIALIZAÇÃO ==================
+
+    def exportar(self):
+        """Dicionário serializável em JSON (colunas em base64)"""
+        return {
+            'inicio': self.inicio,
+            'colunas': {nome: base64.b64encode(coluna.tobytes()).decode('ascii')
+                        for nome, coluna in self._dados.items()},
+        }
+
+    @classmethod
+    def importar(cls, colunas, dados):
+        """Recria a série a partir de exportar()"""
+        arrays = {}
+        for nome, codigo in colunas.items():
+            coluna = array(codigo)
+            coluna.frombytes(base64.b64decode(dados['colunas'][nome]))
+            arrays[nome] = coluna
+        if len({len(coluna) for coluna in arrays.values()}) > 1:
+            raise ValueError("Colunas da série com tamanhos diferentes")
+        return cls(colunas, dados['inicio'], arrays)
@@ -0,0 +1,51 @@
+""" Trava exclusiva entre processos baseada em arquivo """
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Serializa também as threads do mesmo processo (msvcrt trava por processo)
+_travas_locais = {}
+_travas_locais_lock = threading.Lock()
+
+
+def _trava_local(caminho):
+    with _travas_locais_lock:
+        return _travas_locais.setdefault(os.path.abspath(caminho), threading.Lock())
+
+
+@contextmanager
+def trava_arquivo(caminho):
+    """
+    Mantém uma trava exclusiva sobre `caminho` enquanto o bloco executa
+
+    Funciona entre workers do gunicorn (processos diferentes) e entre threads
+    do mesmo processo. O arquivo de trava é criado se não existir.
+
+    Args:
+        caminho: Arquivo usado como trava (ex: 'dados/filmes.json.lock')
+    """
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+
+    with _trava_local(caminho):
+        fd = os.open(caminho, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)